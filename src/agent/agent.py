@@ -47,7 +47,8 @@ class Agent:
             return
 
         self.model_wrapper = config_agent.get_llm_wrapper(
-            config_model=config_agent.config_model
+            config_model=config_agent.config_model,
+            cache_path=environment.cache_path / "llm.sqlite",
         )
         self.agent = ToolCallingAgent(
             tools=self.tools,
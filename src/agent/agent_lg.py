@@ -31,7 +31,10 @@ class AgentLG:
             self.agent = None
             return
 
-        self.model_wrapper = config_agent.get_llm_wrapper(config_agent.config_model)
+        self.model_wrapper = config_agent.get_llm_wrapper(
+            config_agent.config_model,
+            cache_path=environment.cache_path / "llm.sqlite",
+        )
         self.agent = ToolCallingAgent(
             tools=self.tools,
             model=self.model_wrapper,
@@ -4,11 +4,13 @@ from pathlib import Path
 from typing import Optional
 
 import litellm
-from pydantic import Field, conint
+from pydantic import Field, confloat, conint
 from smolagents import LiteLLMModel, HfApiModel
 
 from src.config.config_model import ConfigModel
 from src.config.yaml_object import YamlObject
+from src.utils.llm_cache import CachedModel
+from src.utils.sqlite_cache import SqliteCache
 
 litellm.track_token_usage = True
 
@@ -39,7 +41,13 @@ class ConfigAgent(YamlObject):
     )
     num_patches: conint(gt=0, le=5) = Field(
         1,
-        description="Number of agent max retries. Must be >0.",
+        description="Candidate patches generated concurrently per attempt.",
+    )
+    candidate_temperature_step: confloat(ge=0, le=1) = Field(
+        0.3, description="Temperature added per candidate index when num_patches > 1."
+    )
+    candidates_forwarded: conint(gt=0, le=5) = Field(
+        1, description="Best-ranked candidates sent to SWE-bench evaluation."
     )
     patch_prompt_path: Optional[Path] = None
     max_retries: conint(gt=0, le=10) = Field(
@@ -49,10 +57,64 @@ class ConfigAgent(YamlObject):
     max_tool_output_chars: conint(gt=0, le=10_000) = Field(
         10_000, description="Maximum tool output chars"
     )
+    bash_timeout_seconds: conint(gt=0) = Field(
+        30, description="Default deadline of a BashTool command."
+    )
+    bash_max_timeout_seconds: conint(gt=0) = Field(
+        600, description="Upper bound on a per-call BashTool deadline."
+    )
+    code_search_max_tokens: conint(gt=0) = Field(
+        1500, description="Token budget of one code_search tool result."
+    )
+    symbol_tool_max_tokens: conint(gt=0) = Field(
+        1500, description="Token budget of one symbol_navigator tool result."
+    )
+    patch_fuzz_factor: conint(ge=0, le=3) = Field(
+        2, description="Context lines a hunk may drop at each end to apply."
+    )
+    patch_max_offset_lines: conint(gt=0) = Field(
+        1000, description="Max distance a hunk may apply from its stated line."
+    )
+    local_tests_enabled: bool = Field(
+        True, description="Run FAIL_TO_PASS tests locally before full evaluation."
+    )
+    local_test_max_attempts: conint(gt=0, le=10) = Field(
+        3, description="Local test rounds before evaluation; 1 never regenerates."
+    )
+    local_test_command: str = Field(
+        "python -m pytest", description="Command that runs pytest in the checkout."
+    )
+    local_test_workers: conint(ge=0) = Field(
+        0, description="pytest-xdist workers for local tests, 0 for one per core."
+    )
+    local_test_pass_to_pass_sample: conint(ge=0) = Field(
+        20, description="PASS_TO_PASS tests sampled into each local test run."
+    )
+    local_test_timeout_seconds: conint(gt=0) = Field(
+        300, description="Deadline of one local test run."
+    )
     evaluation_detailed: bool = Field(
         True, description="Evaluation type regular or detailed."
     )
     evaluation_debug: bool = Field(False, description="Evaluation debug.")
+    evaluation_max_workers: conint(gt=0, le=64) = Field(
+        4, description="SWE-bench harness workers used for batched evaluation."
+    )
+    evaluation_batch_size: conint(gt=0) = Field(
+        8, description="Max predictions evaluated together in one harness run."
+    )
+    evaluation_batch_wait_seconds: confloat(gt=0) = Field(
+        120.0, description="Max time a prediction waits for its batch to fill."
+    )
+    evaluation_cache_max_mb: conint(gt=0) = Field(
+        256, description="Size bound of the persistent evaluation result cache."
+    )
+    llm_cache_max_mb: conint(gt=0) = Field(
+        512, description="Size bound of the persistent LLM response cache."
+    )
+    blob_cache_max_mb: conint(gt=0) = Field(
+        1024, description="Size bound of the persistent per-blob analysis cache."
+    )
     patch_prompt_path_first_attempt: Optional[Path] = None
     patch_prompt_path_retry: Optional[Path] = None
 
@@ -88,8 +150,19 @@ class ConfigAgent(YamlObject):
                 vendor, Path("src/prompts/openai_patch_retry.prompt")
             )
 
+    def get_llm_wrapper(self, config_model, cache_path: Optional[Path] = None):
+        model = self._make_llm(config_model)
+        if cache_path is None or not (self.load_cache or self.save_cache):
+            return model
+        return CachedModel(
+            model,
+            SqliteCache(cache_path, max_bytes=self.llm_cache_max_mb * 1024 * 1024),
+            load_cache=self.load_cache,
+            save_cache=self.save_cache,
+        )
+
     @staticmethod
-    def get_llm_wrapper(config_model):
+    def _make_llm(config_model):
         common_kwargs = {
             "temperature": config_model.temperature,
             "top_p": config_model.top_p,
@@ -23,14 +23,21 @@ def make_evaluate_detailed_patch_node(problem, environment, config_agent):
             }
 
         try:
-            result = evaluator.evaluate(patch=state["patch"])
-            eval_data = result.get("evaluation", {})
-            status = eval_data.get("status", "UNKNOWN")
-            log_output = eval_data.get("log", "")
-            report = eval_data.get("report", {})
+            # The top-ranked candidates, when several were selected, in order.
+            patches = state.get("selected_patches") or [state["patch"]]
+            for patch in patches:
+                result = evaluator.evaluate(patch=patch)
+                eval_data = result.get("evaluation", {})
+                status = eval_data.get("status", "UNKNOWN")
+                log_output = eval_data.get("log", "")
+                report = eval_data.get("report", {})
+                if status == "RESOLVED":
+                    break
 
             return {
                 **state,
+                # Unresolved, the top-ranked candidate stays the answer.
+                "patch": patch if status == "RESOLVED" else patches[0],
                 "evaluation_result": (
                     RESULT.PASSED if status == "RESOLVED" else RESULT.ERROR
                 ),
@@ -24,15 +24,22 @@ def make_evaluate_patch_node(problem, environment, config_agent):
             }
 
         try:
-            result = evaluator.evaluate(patch=state["patch"])
-            evaluation = result.get("evaluation", {})
-            log_output = result.get("evaluation_log", "")
-            log_summary = extract_patch_failure_summary(log_output)
-
-            is_resolved = problem.instance_id in evaluation.get("resolved_ids", [])
+            # The top-ranked candidates, when several were selected, in order.
+            patches = state.get("selected_patches") or [state["patch"]]
+            for patch in patches:
+                result = evaluator.evaluate(patch=patch)
+                evaluation = result.get("evaluation", {})
+                log_output = result.get("evaluation_log", "")
+                log_summary = extract_patch_failure_summary(log_output)
+
+                is_resolved = problem.instance_id in evaluation.get("resolved_ids", [])
+                if is_resolved:
+                    break
 
             return {
                 **state,
+                # Unresolved, the top-ranked candidate stays the answer.
+                "patch": patch if is_resolved else patches[0],
                 "evaluation_result": RESULT.PASSED if is_resolved else RESULT.ERROR,
                 "evaluation_err_msg": log_summary if not is_resolved else "",
                 "evaluation_attempts": attempts,
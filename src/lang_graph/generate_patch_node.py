@@ -1,11 +1,14 @@
 # generate_patch_node.py
+from typing import Optional
+
 from langchain_core.runnables import RunnableLambda
 
 from src.config.config_agent import ConfigAgent
 from src.lang_graph.patch_state import PatchState
-from src.models.enums import GRAPH_STATE
+from src.models.enums import GRAPH_STATE, RESULT
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.workflow.candidate_pool import CandidatePool
 from src.workflow.patch_generator_lg import PatchGeneratorLG
 
 
@@ -13,6 +16,7 @@ def make_generate_patch_node(
     problem: Problem,
     environment: Environment,
     config_agent: ConfigAgent,
+    candidates: Optional[CandidatePool] = None,
 ):
     generator = PatchGeneratorLG(
         problem=problem,
@@ -21,11 +25,30 @@ def make_generate_patch_node(
     )
 
     def generate_patch(state: PatchState) -> PatchState:
+        attempts = state.get("generation_attempts", 0) + 1
+        if candidates is not None and not generator.config_agent.evaluation_debug:
+            generated = candidates.generate(state)
+            patches = [c["patch"] for c in generated if c["patch"].strip()]
+            # With no patch at all, validation reports every candidate's
+            # error and routes back here.
+            return {
+                **state,
+                "candidates": generated,
+                "patch": patches[0] if patches else "",
+                "generation_result": RESULT.PASSED if patches else RESULT.ERROR,
+                "generation_err_msg": "\n\n".join(
+                    f"Candidate {c['index']}: {c['generation_err_msg']}"
+                    for c in generated
+                    if c["generation_err_msg"]
+                ),
+                "generation_attempts": attempts,
+                "graph_state": GRAPH_STATE.GENERATE_PATCH,
+            }
+
         if generator.config_agent.evaluation_debug:
             patch_str = generator.problem.patch
         else:
             patch_str = generator.generate_patch(state)
-        attempts = state.get("generation_attempts", 0) + 1
 
         return {
             **state,
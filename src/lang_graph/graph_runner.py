@@ -1,4 +1,7 @@
 # graph_runner.py
+from typing import Any
+
+from langchain_core.tracers.context import tracing_v2_enabled
 from langgraph.graph import StateGraph, START, END
 
 from src.config.config_agent import ConfigAgent
@@ -10,7 +13,9 @@ from src.lang_graph.evaluate_patch_node import (
     route_from_evaluation,
 )
 from src.lang_graph.generate_patch_node import make_generate_patch_node
-from src.lang_graph.patch_state import PatchState
+from src.lang_graph.local_test_node import make_local_test_node, make_local_test_router
+from src.lang_graph.patch_state import PatchState, make_initial_patch_state
+from src.lang_graph.select_candidates_node import make_select_candidates_node
 from src.lang_graph.validate_patch_node import (
     make_validate_patch_node,
     route_from_validation,
@@ -18,6 +23,7 @@ from src.lang_graph.validate_patch_node import (
 from src.models.enums import GRAPH_STATE
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.workflow.candidate_pool import CandidatePool
 
 
 def build_patch_graph(
@@ -25,14 +31,19 @@ def build_patch_graph(
 ):
     graph = StateGraph(PatchState)
 
+    # Several candidates per attempt are generated and validated together
+    candidates = None
+    if config_agent.num_patches > 1:
+        candidates = CandidatePool(problem, environment, config_agent)
+
     # Add nodes using enum values
     graph.add_node(
         GRAPH_STATE.GENERATE_PATCH,
-        make_generate_patch_node(problem, environment, config_agent),
+        make_generate_patch_node(problem, environment, config_agent, candidates),
     )
     graph.add_node(
         GRAPH_STATE.VALIDATE_PATCH,
-        make_validate_patch_node(problem, environment, config_agent),
+        make_validate_patch_node(problem, environment, config_agent, candidates),
     )
 
     # Choose evaluation node based on config
@@ -45,6 +56,40 @@ def build_patch_graph(
 
     graph.add_node(GRAPH_STATE.EVALUATE_PATCH, eval_node)
 
+    # Validated patches run their target tests locally first, when enabled,
+    # and only reach the SWE-bench harness once those pass. Several
+    # candidates are ranked instead, and only the best are forwarded.
+    after_validation = GRAPH_STATE.EVALUATE_PATCH
+    if candidates is not None:
+        # Candidates are tested in their own worktrees while being ranked.
+        graph.add_node(
+            GRAPH_STATE.SELECT_CANDIDATES,
+            make_select_candidates_node(problem, environment, config_agent, candidates),
+        )
+        graph.add_conditional_edges(
+            GRAPH_STATE.SELECT_CANDIDATES,
+            make_local_test_router(config_agent),
+            {
+                GRAPH_STATE.GENERATE_PATCH: GRAPH_STATE.GENERATE_PATCH,
+                GRAPH_STATE.EVALUATE_PATCH: GRAPH_STATE.EVALUATE_PATCH,
+            },
+        )
+        after_validation = GRAPH_STATE.SELECT_CANDIDATES
+    elif config_agent.local_tests_enabled:
+        graph.add_node(
+            GRAPH_STATE.LOCAL_TEST,
+            make_local_test_node(problem, environment, config_agent),
+        )
+        graph.add_conditional_edges(
+            GRAPH_STATE.LOCAL_TEST,
+            make_local_test_router(config_agent),
+            {
+                GRAPH_STATE.GENERATE_PATCH: GRAPH_STATE.GENERATE_PATCH,
+                GRAPH_STATE.EVALUATE_PATCH: GRAPH_STATE.EVALUATE_PATCH,
+            },
+        )
+        after_validation = GRAPH_STATE.LOCAL_TEST
+
     # Edges
     graph.add_edge(START, GRAPH_STATE.GENERATE_PATCH)
     graph.add_edge(GRAPH_STATE.GENERATE_PATCH, GRAPH_STATE.VALIDATE_PATCH)
@@ -54,7 +99,7 @@ def build_patch_graph(
         route_from_validation,
         {
             GRAPH_STATE.GENERATE_PATCH: GRAPH_STATE.GENERATE_PATCH,
-            GRAPH_STATE.EVALUATE_PATCH: GRAPH_STATE.EVALUATE_PATCH,
+            GRAPH_STATE.EVALUATE_PATCH: after_validation,
             END: END,
         },
     )
@@ -71,4 +116,16 @@ def build_patch_graph(
     return graph.compile()
 
 
+def run_patch_graph(
+    problem: Problem, environment: Environment, config_agent: ConfigAgent
+) -> dict[str, Any]:
+    graph = build_patch_graph(
+        problem=problem, environment=environment, config_agent=config_agent
+    )
+    initial_state = make_initial_patch_state()
+    initial_state["gold_patch"] = problem.patch
+    with tracing_v2_enabled(project_name="SWE"):
+        return graph.invoke(input=initial_state)
+
+
 # EOF
@@ -0,0 +1,55 @@
+# local_test_node.py
+from langchain_core.runnables import RunnableLambda
+
+from src.lang_graph.patch_state import PatchState
+from src.models.enums import RESULT, GRAPH_STATE
+from src.workflow.local_test_runner import LocalTestRunner
+
+
+def make_local_test_node(problem, environment, config_agent):
+    runner = LocalTestRunner(problem, environment, config_agent)
+
+    def local_test(state: PatchState) -> PatchState:
+        attempts = state.get("local_test_attempts", 0) + 1
+
+        try:
+            result = runner.run(state["patch"])
+        except Exception as e:
+            # A broken local setup must not block the real evaluation.
+            environment.logger.warning(f"[LocalTests] ⚠️ Local tests crashed: {e}")
+            result = {"status": "SKIPPED", "feedback": f"Local tests crashed: {e}"}
+
+        status = result["status"]
+        environment.logger.info(f"[LocalTests] Result: {status}")
+        return {
+            **state,
+            "local_test_result": RESULT.ERROR if status == "ERROR" else RESULT.PASSED,
+            "local_test_err_msg": result["feedback"] if status == "ERROR" else "",
+            "local_test_attempts": attempts,
+            "local_test_report": {
+                "status": status,
+                "failed": result.get("failed", []),
+                "passed": result.get("passed", []),
+            },
+            "graph_state": GRAPH_STATE.LOCAL_TEST,
+        }
+
+    return RunnableLambda(local_test).with_config({"run_name": GRAPH_STATE.LOCAL_TEST})
+
+
+def make_local_test_router(config_agent):
+    max_attempts = config_agent.local_test_max_attempts
+
+    def route_from_local_test(state: PatchState) -> str:
+        # Out of local attempts, the harness still gets the last word.
+        if (
+            state.get("local_test_result") == RESULT.ERROR
+            and state.get("local_test_attempts", 0) < max_attempts
+        ):
+            return GRAPH_STATE.GENERATE_PATCH
+        return GRAPH_STATE.EVALUATE_PATCH
+
+    return route_from_local_test
+
+
+# EOF
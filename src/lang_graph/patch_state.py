@@ -8,12 +8,20 @@ from src.models.prompt_arg import PromptArg
 
 
 class PatchState(TypedDict, total=False):
-    """State container for patch lifecycle in LangGraph pipeline (generate → validate → evaluate)."""
+    """State container for patch lifecycle in LangGraph pipeline (generate → validate → local test → evaluate)."""
 
     graph_state: GRAPH_STATE
     patch: str
     gold_patch: str
 
+    # With num_patches > 1: one dict per candidate (index, temperature, patch,
+    # generation/validation results); `patch` is the one passed downstream.
+    candidates: List[dict]
+    # Score breakdown per validated candidate, best first, and the patches of
+    # the top-ranked ones, which evaluation tries in order.
+    candidate_scores: List[dict]
+    selected_patches: List[str]
+
     generation_result: RESULT
     generation_err_msg: Optional[str]
     generation_attempts: int
@@ -22,6 +30,11 @@ class PatchState(TypedDict, total=False):
     validation_err_msg: Optional[str]
     validation_attempts: int
 
+    local_test_result: RESULT
+    local_test_err_msg: Optional[str]
+    local_test_attempts: int
+    local_test_report: dict
+
     evaluation_result: RESULT
     evaluation_err_msg: Optional[str]
     evaluation_attempts: int
@@ -46,6 +59,12 @@ def patch_state_to_prompt_args(state: PatchState) -> List[PromptArg]:
         PromptArg(
             name="validation_err_msg", data=str(state.get("validation_err_msg", ""))
         ),
+        PromptArg(
+            name="local_test_result", data=str(state.get("local_test_result", ""))
+        ),
+        PromptArg(
+            name="local_test_err_msg", data=str(state.get("local_test_err_msg", ""))
+        ),
         PromptArg(
             name="evaluation_result", data=str(state.get("evaluation_result", ""))
         ),
@@ -67,9 +86,11 @@ def make_initial_patch_state() -> PatchState:
         "graph_state": GRAPH_STATE.START,
         "generation_result": RESULT.INIT,
         "validation_result": RESULT.INIT,
+        "local_test_result": RESULT.INIT,
         "evaluation_result": RESULT.INIT,
         "generation_attempts": 0,
         "validation_attempts": 0,
+        "local_test_attempts": 0,
         "evaluation_attempts": 0,
     }
 
@@ -0,0 +1,84 @@
+# select_candidates_node.py
+from langchain_core.runnables import RunnableLambda
+
+from src.lang_graph.local_test_node import make_local_test_node
+from src.lang_graph.patch_state import PatchState
+from src.models.enums import RESULT, GRAPH_STATE
+from src.workflow.candidate_pool import CandidatePool
+from src.workflow.candidate_ranker import score_candidates
+
+
+def make_select_candidates_node(
+    problem, environment, config_agent, candidates: CandidatePool
+):
+    top_k = config_agent.candidates_forwarded
+    single_patch = None
+    if config_agent.local_tests_enabled:
+        single_patch = make_local_test_node(problem, environment, config_agent)
+
+    def select_candidates(state: PatchState) -> PatchState:
+        pool = state.get("candidates", [])
+        if not pool:
+            # No candidates were generated (e.g. evaluation_debug uses the
+            # gold patch): treat `patch` as the only one.
+            state = {**state, "candidate_scores": [], "selected_patches": []}
+            if single_patch is not None:
+                return single_patch.invoke(state)
+            return {
+                **state,
+                "local_test_result": RESULT.PASSED,
+                "graph_state": GRAPH_STATE.SELECT_CANDIDATES,
+            }
+
+        attempts = state.get("local_test_attempts", 0)
+        if config_agent.local_tests_enabled:
+            pool = candidates.test(pool)
+            attempts += 1
+
+        scores = score_candidates(pool, problem.problem_statement)
+        by_index = {c["index"]: c for c in pool}
+        # Candidates proven wrong by their own tests are never forwarded.
+        ranked = [by_index[s["index"]] for s in scores]
+        eligible = [
+            c for c in ranked if (c.get("local_test") or {}).get("status") != "ERROR"
+        ]
+        for score in scores:
+            environment.logger.info(f"[Selection] Candidate score: {score}")
+
+        if not eligible:
+            best = ranked[0]
+            return {
+                **state,
+                "candidates": pool,
+                "candidate_scores": scores,
+                "selected_patches": [],
+                "patch": best["patch"],
+                "local_test_result": RESULT.ERROR,
+                "local_test_err_msg": best["local_test"]["feedback"],
+                "local_test_attempts": attempts,
+                "graph_state": GRAPH_STATE.SELECT_CANDIDATES,
+            }
+
+        selected = [c["patch"] for c in eligible[:top_k]]
+        environment.logger.info(
+            f"[Selection] Forwarding candidates "
+            f"{[c['index'] for c in eligible[:top_k]]} to evaluation"
+        )
+        return {
+            **state,
+            "candidates": pool,
+            "candidate_scores": scores,
+            "selected_patches": selected,
+            "patch": selected[0],
+            "local_test_result": RESULT.PASSED,
+            "local_test_err_msg": "",
+            "local_test_attempts": attempts,
+            "graph_state": GRAPH_STATE.SELECT_CANDIDATES,
+        }
+
+    return RunnableLambda(select_candidates).with_config(
+        {"run_name": GRAPH_STATE.SELECT_CANDIDATES}
+    )
+
+
+# EOF
@@ -1,5 +1,6 @@
 # validate_patch_node.py
 import json
+from typing import Optional
 
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END
@@ -7,9 +8,12 @@ from langgraph.graph import END
 from src.lang_graph.patch_state import PatchState
 from src.models.enums import RESULT, GRAPH_STATE
 from src.tools.patch_validator_tool import PatchValidatorTool
+from src.workflow.candidate_pool import CandidatePool
 
 
-def make_validate_patch_node(problem, environment, config_agent):
+def make_validate_patch_node(
+    problem, environment, config_agent, candidates: Optional[CandidatePool] = None
+):
     tool_runner = PatchValidatorTool(problem, environment, config_agent)
     max_retries = config_agent.max_retries
 
@@ -26,6 +30,9 @@ def make_validate_patch_node(problem, environment, config_agent):
                 "graph_state": GRAPH_STATE.VALIDATE_PATCH,
             }
 
+        if candidates is not None and state.get("candidates"):
+            return validate_candidates(state, attempts)
+
         try:
             result = json.loads(tool_runner.forward(patch))
         except json.JSONDecodeError as e:
@@ -66,6 +73,30 @@ def make_validate_patch_node(problem, environment, config_agent):
             "graph_state": GRAPH_STATE.VALIDATE_PATCH,
         }
 
+    def validate_candidates(state: PatchState, attempts: int) -> PatchState:
+        validated = candidates.validate(state["candidates"])
+        passed = [c for c in validated if c["validation_result"] == RESULT.PASSED]
+        if passed:
+            return {
+                **state,
+                "candidates": validated,
+                "patch": passed[0]["patch"],
+                "validation_result": RESULT.PASSED,
+                "validation_err_msg": "",
+                "validation_attempts": attempts,
+                "graph_state": GRAPH_STATE.VALIDATE_PATCH,
+            }
+        return {
+            **state,
+            "candidates": validated,
+            "validation_result": RESULT.ERROR,
+            "validation_err_msg": "\n\n".join(
+                f"Candidate {c['index']}: {c['validation_err_msg']}" for c in validated
+            ),
+            "validation_attempts": attempts,
+            "graph_state": GRAPH_STATE.VALIDATE_PATCH,
+        }
+
     return RunnableLambda(validate_patch).with_config(
         {"run_name": GRAPH_STATE.VALIDATE_PATCH}
     )
@@ -7,18 +7,18 @@ from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
-from langchain_core.tracers.context import tracing_v2_enabled
 from rich.logging import RichHandler
 
 from src.config.config_agent import ConfigAgent
 from src.config.config_model import ConfigModel
-from src.lang_graph.graph_runner import build_patch_graph
-from src.lang_graph.patch_state import make_initial_patch_state
+from src.lang_graph.graph_runner import run_patch_graph
 from src.models.environment import Environment
 from src.models.problem import Problem
 from src.tools.patch_validator_tool import PatchValidatorTool
 from src.utils.io_utils import project_root
-from src.utils.swe_bench_util import load_swe_bench_difficulty
+from src.utils.run_ledger import RunLedger
+from src.utils.swe_bench_util import load_swe_bench, load_swe_bench_difficulty
+from src.workflow.batch_runner import AccuracyReport, BatchRunner
 from src.workflow.patch_evaluator import PatchEvaluator
 from src.workflow.patch_generator import PatchGenerator
 
@@ -27,21 +27,19 @@ logging.basicConfig(
 )
 
 
+def make_config_agent() -> ConfigAgent:
+    # config_model_openai = ConfigModel(model_name="gpt-4o", vendor_name="openai")
+    config_model_anthropic = ConfigModel(
+        model_name="claude-3-7-sonnet-20250219", vendor_name="anthropic"
+    )
+    return ConfigAgent(config_model=config_model_anthropic)
+
+
 def run_graph(problem: Problem, environment: Environment) -> dict[str, Any]:
     try:
-        # config_model_openai = ConfigModel(model_name="gpt-4o", vendor_name="openai")
-        config_model_anthropic = ConfigModel(
-            model_name="claude-3-7-sonnet-20250219", vendor_name="anthropic"
+        return run_patch_graph(
+            problem=problem, environment=environment, config_agent=make_config_agent()
         )
-        config_agent = ConfigAgent(config_model=config_model_anthropic)
-        graph = build_patch_graph(
-            problem=problem, environment=environment, config_agent=config_agent
-        )
-        initial_state = make_initial_patch_state()
-        initial_state["gold_patch"] = problem.patch
-        with tracing_v2_enabled(project_name="SWE"):
-            result = graph.invoke(input=initial_state)
-        return result
 
     except Exception as e:
         logging.getLogger("rich").exception(f"[Agent] ❌ Unhandled error: {e}")
@@ -79,35 +77,62 @@ def validate_patch_on_problem(
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--local", action="store_true")
+    p.add_argument("--instance_id", type=str, default=None)
+    p.add_argument(
+        "--workers", type=int, default=1, help="Number of parallel worker processes."
+    )
+    p.add_argument(
+        "--limit", type=int, default=1, help="Max instances to run (0 = all)."
+    )
+    p.add_argument("--output", type=Path, default=None, help="Root output folder.")
+    p.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip instances already completed in the run ledger under --output.",
+    )
     args = p.parse_args()
-    if args.local:
+    if args.resume and not args.output:
+        p.error("--resume requires --output: the run ledger lives there.")
+    if args.output:
+        root_output = args.output
+    elif args.local:
         root_output = Path("/Users/coby/TEMP")
     else:
         root_output = Path(tempfile.mkdtemp(prefix="swe_"))
     root_path = project_root() if args.local else Path("/app")
     root_output.mkdir(parents=True, exist_ok=True)
+    if args.output:
+        # Inherited by the worker processes; see Environment.cache_path.
+        os.environ.setdefault("SWE_CACHE", str(root_output / "cache"))
     if args.local:
         load_dotenv(os.path.join(root_path, ".env"))
-    problems = load_swe_bench_difficulty()
-    resolved_count = 0
-    total = 0
-    for problem in problems[0:1]:
-        environment = Environment(
-            problem=problem,
-            root_output=root_output,
-            root_path=root_path,
-        )
-        result = run_graph(problem=problem, environment=environment)
-
-        # Extract result flag
-        is_resolved = result.get("evaluation_report", {}).get("resolved", False)
-        resolved_count += int(is_resolved)
-        total += 1
-        status_icon = "✅" if is_resolved else "❌"
-        print(f"{status_icon} {problem.instance_id} - Resolved: {is_resolved}")
-
-    print("\n🔢 Accuracy Report")
-    print(f"Resolved: {resolved_count}/{total}")
-    print(f"Accuracy: {resolved_count / total:.2%}")
+    if args.instance_id:
+        problems = load_swe_bench(instance_id=args.instance_id)
+    else:
+        problems = load_swe_bench_difficulty()
+    if args.limit > 0:
+        problems = problems[: args.limit]
+
+    ledger = RunLedger(root_output / "ledger.sqlite")
+    report = AccuracyReport()
+    if args.resume:
+        selected_ids = {problem.instance_id for problem in problems}
+        for result in ledger.completed_results():
+            if result.instance_id in selected_ids:
+                report.add(result)
+        completed = ledger.completed_ids()
+        problems = [p for p in problems if p.instance_id not in completed]
+        print(f"[Resume] ⏭️ Skipping {report.total} completed instances.")
+
+    runner = BatchRunner(
+        root_path=Path(root_path),
+        root_output=root_output,
+        config_agent=make_config_agent(),
+        max_workers=args.workers,
+        ledger=ledger,
+        batch_evaluation=args.workers > 1,
+    )
+    report = runner.run(problems, report=report)
+    report.print_summary()
 
 # EOF
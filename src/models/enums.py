@@ -12,8 +12,17 @@ class GRAPH_STATE(str, Enum):
     START = "start"
     GENERATE_PATCH = "generate_patch"
     VALIDATE_PATCH = "validate_patch"
+    LOCAL_TEST = "local_test"
+    SELECT_CANDIDATES = "select_candidates"
     EVALUATE_PATCH = "evaluate_patch"
     END = "end"
 
 
+class INSTANCE_STATUS(str, Enum):
+    RUNNING = "RUNNING"
+    RESOLVED = "RESOLVED"
+    UNRESOLVED = "UNRESOLVED"
+    ERROR = "ERROR"
+
+
 # EOF
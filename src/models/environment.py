@@ -1,13 +1,26 @@
 # environment.py
 import logging
+import os
 from pathlib import Path
+from typing import Dict
 
 from pydantic import Field, PrivateAttr
 from rich.logging import RichHandler
 
 from src.config.yaml_object import YamlObject
 from src.models.problem import Problem
-from src.utils.io_utils import clone_repo
+from src.utils.code_index import drop_code_index
+from src.utils.edit_journal import drop_edit_journal
+from src.utils.io_utils import (
+    add_worktree,
+    clone_repo,
+    remove_worktree,
+    reset_worktree,
+    user_cache_folder,
+)
+from src.utils.shell_session import close_shell_sessions
+from src.utils.symbol_index import drop_symbol_index
+from src.utils.tool_memo import drop_tool_memo
 from src.utils.trajectory_logger import TrajectoryLogger
 
 # Set up global terminal logging with Rich
@@ -16,6 +29,14 @@ logging.basicConfig(
 )
 
 
+def _drop_repo_state(repo_path: Path):
+    close_shell_sessions(repo_path)
+    drop_tool_memo(repo_path)
+    drop_edit_journal(repo_path)
+    drop_code_index(repo_path)
+    drop_symbol_index(repo_path)
+
+
 class Environment(YamlObject):
     instance_id: str = Field(
         ..., description="Unique identifier for this workflow instance."
@@ -40,6 +61,8 @@ class Environment(YamlObject):
         ..., description="Problem object that describes the issue to be solved."
     )
     _traj_logger: TrajectoryLogger = PrivateAttr()
+    _file_handler: logging.Handler = PrivateAttr()
+    _candidates: Dict[int, "Environment"] = PrivateAttr(default_factory=dict)
 
     def __init__(self, root_path: Path, root_output: Path, problem: Problem):
         # Set fields manually via __setattr__ to bypass Pydantic validation in __init__
@@ -56,11 +79,11 @@ class Environment(YamlObject):
 
         # Add file logging to output_path
         file_log_path = self.output_path / "log.txt"
-        file_handler = logging.FileHandler(file_log_path, mode="w")
-        file_handler.setFormatter(
+        self._file_handler = logging.FileHandler(file_log_path, mode="w")
+        self._file_handler.setFormatter(
             logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
         )
-        logging.getLogger().addHandler(file_handler)
+        logging.getLogger().addHandler(self._file_handler)
 
         # Clone repo and set path
         self.repo_path = clone_repo(
@@ -71,6 +94,50 @@ class Environment(YamlObject):
             logger=self.logger,
         )
 
+    def candidate(self, index: int) -> "Environment":
+        """
+        A copy of this environment for candidate patch `index`, with its own
+        git worktree at base_commit, output directory and trajectory, so
+        candidates can be generated concurrently. Worktrees are kept, reset,
+        across attempts and removed by `close()`.
+        """
+        if index in self._candidates:
+            candidate = self._candidates[index]
+            reset_worktree(candidate.repo_path, self.problem.base_commit)
+            return candidate
+        worktree = self.root_output / "worktrees" / self.instance_id / str(index)
+        add_worktree(self.repo_path, worktree, self.problem.base_commit, self.logger)
+        candidate = self.model_copy(
+            update={
+                "repo_path": worktree,
+                "output_path": self.output_path / "candidates" / str(index),
+            }
+        )
+        candidate.output_path.mkdir(parents=True, exist_ok=True)
+        candidate._traj_logger = TrajectoryLogger()
+        candidate._candidates = {}
+        self._candidates[index] = candidate
+        return candidate
+
+    def close(self):
+        """Detach the instance log file and drop the repo's shell and tool state."""
+        for candidate in self._candidates.values():
+            _drop_repo_state(candidate.repo_path)
+            remove_worktree(self.repo_path, candidate.repo_path)
+        self._candidates.clear()
+        _drop_repo_state(self.repo_path)
+        logging.getLogger().removeHandler(self._file_handler)
+        self._file_handler.close()
+
+    @property
+    def cache_path(self) -> Path:
+        """
+        Persistent caches shared by every instance, worker and run:
+        $SWE_CACHE (main.py points it under --output), else the user cache
+        folder, so reruns reuse responses and results.
+        """
+        return Path(os.environ.get("SWE_CACHE", user_cache_folder()))
+
     @property
     def logger(self) -> logging.Logger:
         return logging.getLogger("rich")
@@ -0,0 +1,28 @@
+# instance_result.py
+from typing import Optional
+
+from pydantic import Field
+
+from src.config.yaml_object import YamlObject
+from src.models.enums import INSTANCE_STATUS
+
+
+class InstanceResult(YamlObject):
+    """
+    Outcome of running the patch graph on a single SWE-bench instance.
+
+    Produced by batch workers and consumed by the accuracy report.
+    """
+
+    instance_id: str = Field(..., description="SWE-bench instance identifier.")
+    status: INSTANCE_STATUS = Field(..., description="Final status of the instance.")
+    resolved: bool = Field(False, description="True if the evaluation resolved it.")
+    patch: str = Field("", description="Final patch produced by the graph.")
+    error: Optional[str] = Field(None, description="Error message if the run crashed.")
+    duration_seconds: float = Field(0.0, description="Wall-clock time of the run.")
+    evaluation_report: dict = Field(
+        default_factory=dict, description="Evaluation report returned by the graph."
+    )
+
+
+# EOF
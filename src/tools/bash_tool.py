@@ -1,29 +1,37 @@
 # bash_tool.py
-import shlex
-import subprocess  # nosec B603
 from time import perf_counter
+from typing import Optional
 
 from smolagents.tools import Tool
 
 from src.config.config_agent import ConfigAgent
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.utils.shell_session import ShellResult, ShellSession, get_shell_session
+from src.utils.tool_memo import READ, WRITE, classify_command, get_tool_memo
 
 
 class BashTool(Tool):
     name = "bash"
     description = """Run commands in a bash shell.\n
-* Commands are executed from the repository root.\n
+* Commands run in a persistent bash session that starts at the repository root.\n
+* `cd`, exported variables and activated virtualenvs persist between calls.\n
 * Use `grep`, `sed`, `find`, or `ruff` to inspect and lint files.\n
 * You can view file content ranges using: `sed -n 10,25p file.py`.\n
-* Output may be truncated. Avoid commands that span multiple files.\n
+* Long output keeps only its head and tail; byte and line totals are reported.\n
+* Commands time out after a default deadline; pass `timeout` (seconds) for slow ones.\n
 """
 
     inputs = {
         "command": {
             "type": "string",
-            "description": "The bash command to run (no pipes, no redirects).",
-        }
+            "description": "The bash command to run.",
+        },
+        "timeout": {
+            "type": "integer",
+            "description": "Optional deadline in seconds for this command.",
+            "nullable": True,
+        },
     }
     output_type = "string"
 
@@ -40,39 +48,75 @@ class BashTool(Tool):
         self.logger = environment.logger
         self.traj_logger = environment.traj_logger
         self.MAX_OUTPUT_CHARS = getattr(config_agent, "max_tool_output_chars", 10_000)
+        self.timeout = getattr(config_agent, "bash_timeout_seconds", 30)
+        self.max_timeout = getattr(config_agent, "bash_max_timeout_seconds", 600)
 
-    def forward(self, command: str) -> str:
+    def forward(self, command: str, timeout: Optional[int] = None) -> str:
         start = perf_counter()
+        memo = get_tool_memo(self.environment.repo_path)
+        kind = classify_command(command)
+        session = get_shell_session(self.environment.repo_path)
+        key = ("bash", session.cwd, command)
+        generation = memo.generation
+
+        output = memo.get(key) if kind == READ else None
+        memoized = output is not None
+        result = None
+        was_truncated = False
+        if not memoized:
+            output, result, was_truncated = self._execute(session, command, timeout)
+            if kind == WRITE:
+                memo.bump()
+            elif kind == READ and result and not result.timed_out:
+                memo.put(key, output, generation)
+
+        if self.traj_logger:
+            self.traj_logger.log_step(
+                response="",
+                thought="Run shell command in the persistent session.",
+                action=f"bash: {command}",
+                observation=output,
+                query=[{"role": "user", "content": command}],
+                state={
+                    "repo_path": str(self.environment.repo_path),
+                    "working_dir": str(key[1]),
+                    "exit_code": result.exit_code if result else -1,
+                    "duration_seconds": perf_counter() - start,
+                    "truncated": was_truncated or bool(result and result.elided_bytes),
+                    "stdout_bytes": result.stdout_bytes if result else 0,
+                    "stderr_bytes": result.stderr_bytes if result else 0,
+                    "memoized": memoized,
+                },
+            )
+
+        return output
+
+    def _execute(
+        self, session: ShellSession, command: str, timeout: Optional[int]
+    ) -> tuple[str, Optional[ShellResult], bool]:
         stdout = ""
         stderr = ""
         error = ""
         result = None
-        working_dir = self.environment.repo_path
+        deadline = min(timeout or self.timeout, self.max_timeout)
 
         try:
-            command_list = shlex.split(command)
-            print(f"[BashTool] Running: {' '.join(command_list)}")
-            print(f"[BashTool] CWD: {working_dir}")
-
-            result = subprocess.run(
-                command_list,
-                capture_output=True,
-                timeout=30,
-                cwd=str(working_dir),
-            )
-
-            try:
-                stdout = result.stdout.decode("utf-8")
-            except UnicodeDecodeError:
-                stdout = result.stdout.decode("utf-8", errors="ignore")
+            print(f"[BashTool] Running: {command}")
+            print(f"[BashTool] CWD: {session.cwd}")
 
-            try:
-                stderr = result.stderr.decode("utf-8")
-            except UnicodeDecodeError:
-                stderr = result.stderr.decode("utf-8", errors="ignore")
+            # Each stream keeps at most half of the tool output budget.
+            result = session.run(
+                command, timeout=deadline, output_limit=self.MAX_OUTPUT_CHARS // 2
+            )
+            stdout, stderr = result.stdout, result.stderr
+            if result.timed_out:
+                error = (
+                    f"Command timed out after {deadline} seconds; "
+                    f"the shell restarts in {result.cwd}"
+                )
+            elif result.exit_code < 0:
+                error = "The shell exited; a new one starts on the next command"
 
-        except subprocess.TimeoutExpired:
-            error = "Command timed out after 30 seconds"
         except Exception as e:
             error = str(e)
 
@@ -86,24 +130,14 @@ class BashTool(Tool):
                 "\n\n⚠️ Output truncated due to tool output limits "
                 f"({self.MAX_OUTPUT_CHARS} chars max). Please refine your command.\n"
             )
-
-        if self.traj_logger:
-            self.traj_logger.log_step(
-                response="",
-                thought="Run shell command in project root.",
-                action=f"bash: {command}",
-                observation=output,
-                query=[{"role": "user", "content": command}],
-                state={
-                    "repo_path": str(self.environment.repo_path),
-                    "working_dir": str(working_dir),
-                    "exit_code": result.returncode if result else -1,
-                    "duration_seconds": perf_counter() - start,
-                    "truncated": was_truncated,
-                },
+        if result and result.elided_bytes:
+            output += (
+                f"\n\n⚠️ Output elided: stdout was {result.stdout_bytes} bytes / "
+                f"{result.stdout_lines} lines, stderr {result.stderr_bytes} bytes / "
+                f"{result.stderr_lines} lines; only the head and tail of each are "
+                "shown. Narrow the command (grep, head, sed -n) to see the rest.\n"
             )
-
-        return output
+        return output, result, was_truncated
 
 
 # EOF
@@ -0,0 +1,136 @@
+# code_search_tool.py
+import re
+from time import perf_counter
+from typing import Optional
+
+from smolagents.tools import Tool
+
+from src.config.config_agent import ConfigAgent
+from src.models.environment import Environment
+from src.models.problem import Problem
+from src.utils.code_index import SearchResult, get_code_index
+from src.utils.tool_memo import get_tool_memo
+
+CHARS_PER_TOKEN = 4
+
+
+class CodeSearchTool(Tool):
+    name = "code_search"
+    description = """Search the repository through a prebuilt index (much faster than `grep -rn`).\n
+* `mode="identifier"` (default) finds whole-word uses of a name; definitions come first.\n
+* `mode="regex"` matches a Python regular expression line by line.\n
+* `path_glob` restricts the files searched, e.g. `astropy/io/*.py` or `*tests*`.\n
+* Results are ranked (definitions, then source, then tests) and cut to a token budget.\n
+"""
+
+    inputs = {
+        "query": {
+            "type": "string",
+            "description": "Identifier or regular expression to search for.",
+        },
+        "mode": {
+            "type": "string",
+            "enum": ["identifier", "regex"],
+            "description": "`identifier` (default) or `regex`.",
+            "nullable": True,
+        },
+        "path_glob": {
+            "type": "string",
+            "description": "Optional glob on repo-relative paths.",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def __init__(
+        self,
+        problem: Problem,
+        environment: Environment,
+        config_agent: ConfigAgent,
+    ):
+        super().__init__()
+        self.problem = problem
+        self.environment = environment
+        self.config_agent = config_agent
+        self.logger = environment.logger
+        self.traj_logger = environment.traj_logger
+        self.max_tokens = getattr(config_agent, "code_search_max_tokens", 1500)
+
+    def forward(
+        self,
+        query: str,
+        mode: Optional[str] = None,
+        path_glob: Optional[str] = None,
+    ) -> str:
+        start = perf_counter()
+        mode = mode or "identifier"
+        memo = get_tool_memo(self.environment.repo_path)
+        generation = memo.generation
+        key = ("code_search", query, mode, path_glob)
+
+        result = memo.get(key)
+        memoized = result is not None
+        if not memoized:
+            try:
+                search = get_code_index(self.environment.repo_path).search(
+                    query, identifier=mode == "identifier", path_glob=path_glob
+                )
+                result = self._render(search)
+                memo.put(key, result, generation)
+            except re.error as e:
+                result = f"Error: invalid regular expression {query!r}: {e}"
+            except Exception as e:
+                result = f"Error during code search: {e}"
+
+        if self.traj_logger:
+            self.traj_logger.log_step(
+                response="",
+                thought="Search the indexed repository.",
+                action=f"{self.name}: {mode} {query}",
+                observation=result,
+                query=[{"role": "user", "content": query}],
+                state={
+                    "repo_path": str(self.environment.repo_path),
+                    "mode": mode,
+                    "path_glob": path_glob,
+                    "memoized": memoized,
+                    "duration_seconds": perf_counter() - start,
+                },
+            )
+
+        return result
+
+    def _render(self, search: SearchResult) -> str:
+        hits = search.hits
+        if not hits:
+            return f"No matches (searched {search.files_searched} candidate files)."
+
+        files = len({hit.path for hit in hits})
+        more = "+" if search.truncated else ""
+        lines = [f"{len(hits)}{more} matching lines in {files}{more} files."]
+        budget = self.max_tokens * CHARS_PER_TOKEN - len(lines[0])
+        current_path = None
+        shown = 0
+        for hit in hits:
+            entry = []
+            if hit.path != current_path:
+                entry.append(hit.path)
+            marker = "  [definition]" if hit.definition else ""
+            entry.append(f"  {hit.line}: {hit.text}{marker}")
+            cost = sum(len(e) + 1 for e in entry)
+            if cost > budget:
+                break
+            budget -= cost
+            lines.extend(entry)
+            current_path = hit.path
+            shown += 1
+
+        if shown < len(hits):
+            lines.append(
+                f"... {len(hits) - shown}{more} more matching lines not shown; "
+                "narrow the query or pass `path_glob`."
+            )
+        return "\n".join(lines)
+
+
+# EOF
@@ -2,12 +2,24 @@
 import os
 from pathlib import Path
 from time import perf_counter
+from typing import Dict, List, Tuple
 
 from smolagents.tools import Tool
 
 from src.config.config_agent import ConfigAgent
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.utils.batch_edit import FileEdit, plan_file_edit, write_atomically
+from src.utils.dir_listing import list_directory
+from src.utils.edit_journal import EditJournal, get_edit_journal
+from src.utils.file_index import (
+    LineIndex,
+    find_all,
+    get_line_index,
+    invalidate_line_index,
+    splice_file,
+)
+from src.utils.tool_memo import get_tool_memo
 
 
 def resolve_path(repo_path: Path, input_path: str) -> Path:
@@ -18,16 +30,24 @@ def resolve_path(repo_path: Path, input_path: str) -> Path:
 class EditorTool(Tool):
     name = "str_replace_editor"
     description = """Custom editing tool for viewing, creating, editing files.\n
-* `view` shows file content with line numbers or directory listing (2 levels deep).\n
+* `view` shows file content with line numbers or directory listing (2 levels deep,\n  skipping .git, build artifacts and .gitignored paths).\n
 * `create` creates a new file.\n
 * `str_replace` replaces a unique text block.\n
 * `insert` inserts text after a line number.\n
-* `undo_edit` is not implemented.\n
+* `undo_edit` reverts the last edit of a file; repeat to go further back.\n
+* `batch_edit` applies `operations` (str_replace/insert, each with an optional\n  `path`, defaulting to `path`) all or nothing, in one call. Matches and line\n  numbers refer to the files as they were before the batch.\n
 """
     inputs = {
         "command": {
             "type": "string",
-            "enum": ["view", "create", "str_replace", "insert", "undo_edit"],
+            "enum": [
+                "view",
+                "create",
+                "str_replace",
+                "insert",
+                "undo_edit",
+                "batch_edit",
+            ],
             "description": "Command to run",
         },
         "path": {
@@ -60,6 +80,15 @@ class EditorTool(Tool):
             "description": "Optional view line range [start, end]",
             "nullable": True,
         },
+        "operations": {
+            "type": "array",
+            "items": {"type": "object"},
+            "description": (
+                "For `batch_edit`: list of {command: str_replace|insert, path?, "
+                "old_str?, new_str, insert_line?}"
+            ),
+            "nullable": True,
+        },
     }
     output_type = "string"
 
@@ -85,6 +114,7 @@ class EditorTool(Tool):
         new_str: str = "",
         insert_line: int = 0,
         view_range: list[int] = None,
+        operations: list[dict] = None,
     ) -> str:
         start = perf_counter()
         resolved_path = None
@@ -97,69 +127,83 @@ class EditorTool(Tool):
                     f"Error: Access outside repository is not allowed: {resolved_path}"
                 )
 
-            if command == "view":
+            memo = get_tool_memo(self.environment.repo_path)
+            journal = get_edit_journal(self.environment.repo_path)
+            generation = memo.generation
+            view_key = ("view", str(resolved_path), tuple(view_range or ()))
+            cached = memo.get(view_key) if command == "view" else None
+
+            if cached is not None:
+                result = cached
+
+            elif command == "view":
                 if resolved_path.is_dir():
-                    files = []
-                    for root, _, filenames in os.walk(resolved_path, topdown=True):
-                        level = root.replace(str(resolved_path), "").count(os.sep)
-                        if level <= 2:
-                            indent = " " * 4 * level
-                            files.append(f"{indent}{os.path.basename(root)}/")
-                            subindent = " " * 4 * (level + 1)
-                            for f in filenames:
-                                if not f.startswith("."):
-                                    files.append(f"{subindent}{f}")
-                    result = "\n".join(files)
+                    result = list_directory(
+                        resolved_path, self.environment.repo_path, max_depth=2
+                    )
                 elif resolved_path.is_file():
-                    with resolved_path.open("r") as f:
-                        full_content = f.readlines()
+                    index = get_line_index(resolved_path)
+                    total = index.line_count
 
                     if view_range:
                         start_line = max(0, view_range[0] - 1)
-                        end_line = (
-                            view_range[1] if view_range[1] != -1 else len(full_content)
-                        )
-                        content = full_content[start_line:end_line]
-                        line_offset = start_line
+                        end_line = view_range[1] if view_range[1] != -1 else total
                     else:
-                        content = full_content
-                        line_offset = 0
                         start_line = 0
-                        end_line = len(content)
+                        end_line = total
+                    content = index.read_lines(start_line, end_line)
 
-                    header = f"[Showing lines {start_line + 1} to {end_line} of {len(full_content)}]\n"
+                    header = (
+                        f"[Showing lines {start_line + 1} to {end_line} of {total}]\n"
+                    )
                     result = header + "".join(
                         [
-                            f"{i + 1 + line_offset:4d} {line}"
+                            f"{i + 1 + start_line:4d} {line}"
                             for i, line in enumerate(content)
                         ]
                     )
                 else:
                     result = f"Error: {resolved_path} is not a file or directory."
+                memo.put(view_key, result, generation)
 
             elif command == "create":
                 if resolved_path.exists():
                     result = f"Error: {resolved_path} already exists."
                 else:
                     os.makedirs(resolved_path.parent, exist_ok=True)
-                    with resolved_path.open("w") as f:
-                        f.write(file_text)
+                    data = file_text.encode()
+                    resolved_path.write_bytes(data)
+                    journal.record(resolved_path, 0, b"", data, created=True)
+                    invalidate_line_index(resolved_path)
+                    memo.bump([resolved_path])
                     result = f"File created: {resolved_path}"
 
             elif command == "str_replace":
                 if not resolved_path.is_file():
                     result = f"Error: File does not exist: {resolved_path}"
                 else:
-                    with resolved_path.open("r") as f:
-                        content = f.read()
-                    occurrences = content.count(old_str)
+                    old_bytes, new_bytes = old_str.encode(), new_str.encode()
+                    positions = find_all(resolved_path, old_bytes)
+                    if not positions and b"\r\n" in resolved_path.read_bytes():
+                        # CRLF file: match the text with its own line endings.
+                        old_bytes = old_bytes.replace(b"\n", b"\r\n")
+                        new_bytes = new_bytes.replace(b"\n", b"\r\n")
+                        positions = find_all(resolved_path, old_bytes)
+                    occurrences = len(positions)
                     if occurrences == 0:
                         result = f"Error: old_str not found in {resolved_path}"
                     elif occurrences > 1:
                         result = f"Error: old_str appears {occurrences} times, must be unique"
                     else:
-                        with resolved_path.open("w") as f:
-                            f.write(content.replace(old_str, new_str))
+                        position = positions[0]
+                        removed = splice_file(
+                            resolved_path,
+                            position,
+                            position + len(old_bytes),
+                            new_bytes,
+                        )
+                        journal.record(resolved_path, position, removed, new_bytes)
+                        memo.bump([resolved_path])
                         result = f"Successfully replaced content in {resolved_path}"
 
             elif command == "insert":
@@ -171,20 +215,42 @@ class EditorTool(Tool):
                     except ValueError:
                         result = "Error: insert_line must be an integer"
                     else:
-                        with resolved_path.open("r") as f:
-                            content = f.readlines()
-                        if insert_line < 0 or insert_line > len(content):
+                        index = get_line_index(resolved_path)
+                        if insert_line < 0 or insert_line > index.line_count:
                             result = f"Error: insert_line {insert_line} out of range"
                         else:
-                            content.insert(insert_line, new_str.rstrip("\n") + "\n")
-                            with resolved_path.open("w") as f:
-                                f.writelines(content)
+                            offset = index.offset(insert_line)
+                            text = new_str.rstrip("\n") + "\n"
+                            if offset == index.size and not self._ends_with_newline(
+                                resolved_path, index
+                            ):
+                                text = "\n" + text
+                            data = text.encode()
+                            splice_file(resolved_path, offset, offset, data)
+                            journal.record(resolved_path, offset, b"", data)
+                            memo.bump([resolved_path])
                             result = f"Inserted text at line {insert_line} in {resolved_path}"
 
             elif command == "undo_edit":
-                result = (
-                    f"Error: Undo functionality not implemented for {resolved_path}"
-                )
+                try:
+                    entry = journal.undo(resolved_path)
+                except (LookupError, ValueError) as e:
+                    result = f"Error: Cannot undo: {e}"
+                else:
+                    invalidate_line_index(resolved_path)
+                    memo.bump([resolved_path])
+                    if entry.created:
+                        result = f"Undid creation of {resolved_path} (file removed)"
+                    else:
+                        result = (
+                            f"Undid last edit to {resolved_path}; "
+                            f"{journal.depth(resolved_path)} earlier edit(s) can be undone"
+                        )
+
+            elif command == "batch_edit":
+                result, changed = self._batch_edit(operations or [], path, journal)
+                if changed:
+                    memo.bump(changed)
 
             else:
                 result = f"Error: Unknown command '{command}'"
@@ -209,5 +275,62 @@ class EditorTool(Tool):
 
         return result
 
+    def _batch_edit(
+        self, operations: list[dict], default_path: str, journal: EditJournal
+    ) -> Tuple[str, List[Path]]:
+        """Returns the tool result and the files that were written."""
+        if not operations:
+            return "Error: batch_edit needs a non-empty `operations` list", []
+
+        by_file: Dict[Path, list] = {}
+        errors = []
+        for number, operation in enumerate(operations, start=1):
+            target = resolve_path(
+                self.environment.repo_path, operation.get("path") or default_path
+            )
+            if not str(target).startswith(str(self.environment.repo_path)):
+                errors.append(f"operation {number}: {target} is outside the repository")
+            elif not target.is_file():
+                errors.append(f"operation {number}: file does not exist: {target}")
+            else:
+                by_file.setdefault(target, []).append((number, operation))
+
+        edits: Dict[Path, FileEdit] = {}
+        for target, file_operations in by_file.items():
+            try:
+                edits[target] = plan_file_edit(target, file_operations)
+            except ValueError as e:
+                errors.append(str(e))
+        if errors:
+            return (
+                "Error: batch_edit rejected, no file was changed:\n"
+                + "\n".join(f"- {error}" for error in errors),
+                [],
+            )
+
+        write_atomically(edits)
+        for edit in edits.values():
+            journal.record(
+                edit.path,
+                edit.start,
+                edit.original[edit.start : edit.old_end],
+                edit.content[edit.start : edit.new_end],
+            )
+            invalidate_line_index(edit.path)
+
+        summary = ", ".join(f"{path} ({len(by_file[path])} edit(s))" for path in edits)
+        return (
+            f"Applied {len(operations)} edit(s) across {len(edits)} file(s): {summary}",
+            list(edits),
+        )
+
+    @staticmethod
+    def _ends_with_newline(path: Path, index: LineIndex) -> bool:
+        if not index.size:
+            return True
+        with path.open("rb") as f:
+            f.seek(index.size - 1)
+            return f.read(1) == b"\n"
+
 
 # EOF
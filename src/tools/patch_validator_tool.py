@@ -1,22 +1,34 @@
+import difflib
 import json
-import re
 import shutil
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Set, Tuple
 
 from smolagents.tools import Tool
 
 from src.config.config_agent import ConfigAgent
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.utils.patch_model import (
+    FilePatch,
+    HunkPlacement,
+    apply_file_patch,
+    parse_patch,
+    split_lines,
+)
+from src.utils.syntax_check import PYTHON_SUFFIXES, check_syntax
+
+RUFF_CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml")
+RUFF_TIMEOUT_SECONDS = 120
 
 
 class PatchValidatorTool(Tool):
     name = "patch_validator_tool"
     description = (
-        "Validate a unified diff patch string using Ruff.\n\n"
+        "Validate a unified diff patch string: every patched Python file must "
+        "compile, then Ruff fixes what it can.\n\n"
         "Returns a JSON string in one of the following formats:\n"
         '{ "status": "PASSED", "cleaned_patch": "<patch>" }\n'
         "or\n"
@@ -48,32 +60,71 @@ class PatchValidatorTool(Tool):
 
     def forward(self, input: str) -> str:
         try:
-            chunks = self._extract_chunks(input)
-            fixed_diffs = []
-
-            for chunk in chunks:
-                path = chunk["path"]
-                original_diff = chunk["diff"]
-
-                patched_text, fixed_text = self._apply_patch(path, original_diff)
-
-                # Log intermediate patch/fix outputs
-                self.logger.debug(
-                    f"[PatchValidatorTool] Patched text for {path}:\n{patched_text}"
+            all_files = parse_patch(input).files
+            file_patches = [f for f in all_files if not f.is_deleted]
+            originals, patched, inexact = {}, {}, set()
+            for file_patch in file_patches:
+                path = file_patch.path
+                originals[path], patched[path], placements = self._apply_patch(
+                    file_patch
                 )
                 self.logger.debug(
-                    f"[PatchValidatorTool] Fixed text for {path}:\n{fixed_text}"
+                    f"[PatchValidatorTool] Patched text for {path}:\n{patched[path]}"
                 )
+                if not all(p.is_exact for p in placements):
+                    inexact.add(path)
+                    self.logger.info(
+                        f"[PatchValidatorTool] Hunks of {path} applied inexactly: "
+                        + ", ".join(
+                            f"#{p.hunk} offset {p.offset:+d} fuzz {p.fuzz}"
+                            + (" (whitespace)" if p.whitespace else "")
+                            for p in placements
+                            if not p.is_exact
+                        )
+                    )
 
-                unified_diff = self._generate_diff(path, patched_text, fixed_text)
-                self.logger.debug(
-                    f"[PatchValidatorTool] Unified diff for {path}:\n{unified_diff}"
+            # Ruff cannot repair a file that does not parse: fail fast, with
+            # locations the model can act on.
+            problems = check_syntax(patched)
+            if problems:
+                message = "\n".join(str(problem) for problem in problems)
+                self.logger.error(
+                    f"[PatchValidatorTool] Patched files do not compile:\n{message}"
+                )
+                return json.dumps(
+                    {
+                        "status": "ERROR",
+                        "error_message": f"Patched files do not compile:\n{message}",
+                    }
                 )
 
-                fixed_diffs.append(unified_diff)
-
-            output = "\n".join(diff for diff in fixed_diffs if diff.strip())
-            cleaned_patch = output if output.strip() else input
+            fixed = {
+                path: self._keep_patch_fixes(originals[path], patched[path], text)
+                for path, text in self._ruff_fix(patched).items()
+            }
+            # Kept fixes can undo a file's whole change (say, it only added
+            # an unused import): such files leave the patch.
+            unchanged = {
+                f.path
+                for f in file_patches
+                if not f.is_new and fixed[f.path] == originals[f.path]
+            }
+            if len(unchanged) == len(all_files):
+                self.logger.error(
+                    "[PatchValidatorTool] Patch has no effective changes."
+                )
+                return json.dumps(
+                    {
+                        "status": "ERROR",
+                        "error_message": "Patch has no effective changes.",
+                    }
+                )
+            if fixed == patched and not inexact and not unchanged:
+                cleaned_patch = input
+            else:
+                cleaned_patch = self._cleaned_patch(
+                    input, originals, fixed, patched, inexact, unchanged
+                )
 
             self.logger.info(f"[PatchValidatorTool] Cleaned patch:\n{cleaned_patch}")
 
@@ -93,47 +144,169 @@ class PatchValidatorTool(Tool):
                 }
             )
 
-    def _extract_chunks(self, patch: str) -> List[dict]:
-        parts = re.split(r"^diff --git a/(.+?) b/\1\n", patch, flags=re.MULTILINE)
-        return [
-            {
-                "path": parts[i],
-                "diff": f"diff --git a/{parts[i]} b/{parts[i]}\n{parts[i+1]}",
-            }
-            for i in range(1, len(parts), 2)
-        ]
+    def _cleaned_patch(
+        self,
+        patch: str,
+        originals: Dict[str, str],
+        fixed: Dict[str, str],
+        patched: Dict[str, str],
+        inexact: Set[str],
+        unchanged: Set[str],
+    ) -> str:
+        """
+        The patch with each file ruff changed, or whose hunks only applied
+        with an offset or fuzz, re-diffed from its original so that the
+        result applies exactly. Files in `unchanged` are left out.
+        """
+        diffs = []
+        for file_patch in parse_patch(patch).files:
+            path = file_patch.path
+            if path in unchanged:
+                continue
+            if path not in fixed or (
+                fixed[path] == patched[path] and path not in inexact
+            ):
+                diffs.append(file_patch.text)
+                continue
+            self.logger.debug(
+                f"[PatchValidatorTool] Fixed text for {path}:\n{fixed[path]}"
+            )
+            diffs.append(
+                self._generate_diff(
+                    path, originals[path], fixed[path], new_file=file_patch.is_new
+                )
+            )
+        return "".join(diff if diff.endswith("\n") else diff + "\n" for diff in diffs)
+
+    def _apply_patch(
+        self, file_patch: FilePatch
+    ) -> Tuple[str, str, List[HunkPlacement]]:
+        """Returns the original and patched text, and where each hunk went."""
+        file_path = self.repo_path / file_patch.path
+        original = "" if file_patch.is_new else file_path.read_bytes().decode("utf-8")
+        text, placements = apply_file_patch(
+            original,
+            file_patch,
+            fuzz=self.config_agent.patch_fuzz_factor,
+            max_offset=self.config_agent.patch_max_offset_lines,
+        )
+        return original, text, placements
 
-    def _apply_patch(self, path: str, diff: str) -> tuple[str, str]:
-        file_path = self.repo_path / path
-        original = "" if "@@ -0,0 +" in diff else file_path.read_text()
-        from src.utils.io_utils import apply_patch_to_file
+    def _ruff_fix(self, texts: Dict[str, str]) -> Dict[str, str]:
+        """
+        Runs `ruff check --fix` once over every Python file of the patch.
 
-        patched_text = apply_patch_to_file(original, diff, Path(path).name)
+        The files are laid out at their repo-relative paths in a scratch
+        tree, next to the repository's ruff configuration files, so project
+        settings and per-file rules apply as they would in the checkout.
+        """
+        fixed = dict(texts)
+        python_files = [p for p in texts if p.endswith(PYTHON_SUFFIXES)]
+        if not python_files:
+            return fixed
 
-        with tempfile.NamedTemporaryFile(mode="w+", suffix=".py", delete=False) as tmp:
-            tmp.write(patched_text)
-            tmp.flush()
+        with tempfile.TemporaryDirectory(prefix="patch-validator-") as scratch:
+            scratch_path = Path(scratch)
+            for path in python_files:
+                target = scratch_path / path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(texts[path])
+                self._copy_ruff_configs(Path(path).parent, scratch_path)
 
-            subprocess.run(
-                [self.ruff_bin, "check", "--fix", tmp.name],
+            command = [self.ruff_bin, "check", "--fix", "--exit-zero", "--quiet"]
+            result = subprocess.run(
+                command + python_files,
+                cwd=scratch_path,
                 capture_output=True,
                 text=True,
+                timeout=RUFF_TIMEOUT_SECONDS,
             )
+            if result.returncode != 0:
+                # Usually a config the scratch tree cannot resolve (e.g. an
+                # `extend` outside the copied files): lint with defaults.
+                self.logger.warning(
+                    f"[PatchValidatorTool] ruff failed with the repo config, "
+                    f"retrying isolated: {result.stderr.strip()}"
+                )
+                subprocess.run(
+                    command + ["--isolated"] + python_files,
+                    cwd=scratch_path,
+                    capture_output=True,
+                    text=True,
+                    timeout=RUFF_TIMEOUT_SECONDS,
+                )
+
+            for path in python_files:
+                fixed[path] = (scratch_path / path).read_text()
+        return fixed
 
-            tmp.seek(0)
-            fixed_text = tmp.read()
-            Path(tmp.name).unlink(missing_ok=True)
+    @staticmethod
+    def _keep_patch_fixes(original: str, patched: str, fixed: str) -> str:
+        """
+        `patched` with only those of ruff's fixes that fall on lines the
+        patch added: the rest of the file is not the patch's to rewrite, so
+        e.g. unused imports it already had stay. Deletions and line-for-line
+        rewrites are judged per line; any other fix that also touches
+        pre-existing lines (an import block re-sorted around an added
+        import) is dropped as a whole.
+        """
+        before, after, linted = (split_lines(t) for t in (original, patched, fixed))
+        added = set()
+        for tag, _, _, j1, j2 in difflib.SequenceMatcher(
+            None, before, after, autojunk=False
+        ).get_opcodes():
+            if tag in ("replace", "insert"):
+                added.update(range(j1, j2))
 
-        return patched_text, fixed_text
+        lines, cursor = [], 0
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(
+            None, after, linted, autojunk=False
+        ).get_opcodes():
+            lines.extend(after[cursor:i1])
+            cursor = i2
+            if tag == "equal":
+                lines.extend(after[i1:i2])
+            elif tag == "delete":
+                # Ruff deletes e.g. all unused imports of a block at once.
+                lines.extend(after[i] for i in range(i1, i2) if i not in added)
+            elif i2 - i1 == j2 - j1:
+                # Line-for-line rewrites are judged line by line.
+                lines.extend(
+                    linted[j1 + k] if i1 + k in added else after[i1 + k]
+                    for k in range(i2 - i1)
+                )
+            else:
+                if i2 > i1:
+                    inside = all(i in added for i in range(i1, i2))
+                else:  # an insertion, kept next to added lines only
+                    inside = i1 - 1 in added or i1 in added
+                lines.extend(linted[j1:j2] if inside else after[i1:i2])
+        lines.extend(after[cursor:])
+        return "".join(lines)
 
-    def _generate_diff(self, path: str, before: str, after: str) -> str:
-        import difflib
+    def _copy_ruff_configs(self, directory: Path, scratch_path: Path):
+        """Copies the config files of `directory` and its ancestors."""
+        for parent in [directory, *directory.parents]:
+            for name in RUFF_CONFIG_FILES:
+                source = self.repo_path / parent / name
+                target = scratch_path / parent / name
+                if source.is_file() and not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(source, target)
 
-        return "".join(
-            difflib.unified_diff(
-                before.splitlines(keepends=True),
-                after.splitlines(keepends=True),
-                fromfile=f"a/{path}",
-                tofile=f"b/{path}",
-            )
+    def _generate_diff(
+        self, path: str, before: str, after: str, new_file: bool = False
+    ) -> str:
+        lines = difflib.unified_diff(
+            split_lines(before),
+            split_lines(after),
+            fromfile="/dev/null" if new_file else f"a/{path}",
+            tofile=f"b/{path}",
+        )
+        header = f"diff --git a/{path} b/{path}\n"
+        if new_file:
+            header += "new file mode 100644\n"
+        return header + "".join(
+            line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+            for line in lines
         )
@@ -38,7 +38,8 @@ class SequentialThinkingTool(Tool):
         self.config_agent = config_agent
         self.max_steps = self.config_agent.agent_max_steps
         self.model = self.config_agent.get_llm_wrapper(
-            config_model=self.config_agent.config_model
+            config_model=self.config_agent.config_model,
+            cache_path=environment.cache_path / "llm.sqlite",
         )
 
     def forward(self, goal: str, problem_statement: str) -> str:
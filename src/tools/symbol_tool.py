@@ -0,0 +1,210 @@
+# symbol_tool.py
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from smolagents.tools import Tool
+
+from src.config.config_agent import ConfigAgent
+from src.models.environment import Environment
+from src.models.problem import Problem
+from src.tools.code_search_tool import CHARS_PER_TOKEN
+from src.tools.edit_tool import resolve_path
+from src.utils.blob_cache import BlobCache
+from src.utils.sqlite_cache import SqliteCache
+from src.utils.symbol_index import SymbolIndex, get_symbol_index
+from src.utils.tool_memo import get_tool_memo
+
+
+class SymbolTool(Tool):
+    name = "symbol_navigator"
+    description = """Navigate Python symbols through an AST index of the repository.\n
+* `find_definition` locates `symbol` (`name`, `Class.method` or `pkg.mod.Class`) with its line span and signature.\n
+* `find_references` lists the lines that import, call or use `symbol`.\n
+* `outline` shows the classes, functions and imports of the file at `path`.\n
+* For the find commands, `path` optionally restricts results to a file or directory.\n
+"""
+
+    inputs = {
+        "command": {
+            "type": "string",
+            "enum": ["find_definition", "find_references", "outline"],
+            "description": "Command to run",
+        },
+        "symbol": {
+            "type": "string",
+            "description": "Symbol name for the find commands.",
+            "nullable": True,
+        },
+        "path": {
+            "type": "string",
+            "description": "File to outline, or a file/directory restricting the find commands.",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def __init__(
+        self,
+        problem: Problem,
+        environment: Environment,
+        config_agent: ConfigAgent,
+    ):
+        super().__init__()
+        self.problem = problem
+        self.environment = environment
+        self.config_agent = config_agent
+        self.logger = environment.logger
+        self.traj_logger = environment.traj_logger
+        self.max_tokens = getattr(config_agent, "symbol_tool_max_tokens", 1500)
+        self._blobs: Optional[BlobCache] = None
+
+    def _index(self) -> SymbolIndex:
+        if self._blobs is None:
+            store = None
+            if self.config_agent.load_cache or self.config_agent.save_cache:
+                store = SqliteCache(
+                    self.environment.cache_path / "blobs.sqlite",
+                    max_bytes=self.config_agent.blob_cache_max_mb * 1024 * 1024,
+                )
+            self._blobs = BlobCache(store)
+        return get_symbol_index(
+            self.environment.repo_path, self.problem.base_commit, blobs=self._blobs
+        )
+
+    def forward(
+        self,
+        command: str,
+        symbol: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> str:
+        start = perf_counter()
+        memo = get_tool_memo(self.environment.repo_path)
+        generation = memo.generation
+        key = ("symbols", command, symbol, path)
+
+        result = memo.get(key)
+        memoized = result is not None
+        if not memoized:
+            try:
+                result = self._run(command, symbol, path)
+                memo.put(key, result, generation)
+            except Exception as e:
+                result = f"Error during '{command}': {e}"
+
+        if self.traj_logger:
+            self.traj_logger.log_step(
+                response="",
+                thought="Navigate the repository's symbol index.",
+                action=f"{self.name}: {command} {symbol or path}",
+                observation=result,
+                query=[{"role": "user", "content": symbol or path or command}],
+                state={
+                    "repo_path": str(self.environment.repo_path),
+                    "command": command,
+                    "memoized": memoized,
+                    "duration_seconds": perf_counter() - start,
+                },
+            )
+
+        return result
+
+    def _relative(self, path: str) -> Optional[str]:
+        repo_path = Path(self.environment.repo_path).resolve()
+        resolved = resolve_path(repo_path, path)
+        try:
+            return resolved.relative_to(repo_path).as_posix()
+        except ValueError:
+            return None
+
+    def _run(self, command: str, symbol: Optional[str], path: Optional[str]) -> str:
+        scope = self._relative(path) if path else ""
+        if scope is None:
+            return f"Error: Access outside repository is not allowed: {path}"
+
+        if command == "outline":
+            if not path:
+                return "Error: outline needs a `path`"
+            summary = self._index().outline(scope)
+            if summary is None:
+                return f"Error: {scope} is not an indexed Python file."
+            return self._fit(scope, self._outline_lines(summary))
+
+        if command not in ("find_definition", "find_references"):
+            return f"Error: Unknown command '{command}'"
+        if not symbol:
+            return f"Error: {command} needs a `symbol`"
+
+        def in_scope(rel: str) -> bool:
+            return not scope or rel == scope or rel.startswith(scope.rstrip("/") + "/")
+
+        index = self._index()
+        if command == "find_definition":
+            found = [d for d in index.find_definition(symbol) if in_scope(d.path)]
+            if not found:
+                return f"No definition of {symbol} found."
+            lines = [
+                f"{d.path}:{d.start}-{d.end}  {d.kind} {d.qualname}{d.signature}"
+                for d in found
+            ]
+            return self._fit(f"{len(found)} definition(s) of {symbol}:", lines)
+
+        found = [r for r in index.find_references(symbol) if in_scope(r.path)]
+        if not found:
+            return f"No references to {symbol} found."
+        return self._fit(
+            f"{len(found)} reference(s) to {symbol} in "
+            f"{len({r.path for r in found})} files:",
+            self._reference_lines(found),
+        )
+
+    def _reference_lines(self, references) -> List[str]:
+        lines, current_path, text = [], None, []
+        for reference in references:
+            if reference.path != current_path:
+                current_path = reference.path
+                lines.append(current_path)
+                try:
+                    text = (
+                        (self.environment.repo_path / current_path)
+                        .read_text(encoding="utf-8", errors="ignore")
+                        .splitlines()
+                    )
+                except OSError:
+                    text = []
+            source = (
+                text[reference.line - 1].strip() if reference.line <= len(text) else ""
+            )
+            lines.append(f"  {reference.line} [{reference.kind}] {source[:200]}")
+        return lines
+
+    @staticmethod
+    def _outline_lines(summary: Dict) -> List[str]:
+        lines = []
+        if summary.get("error"):
+            lines.append(f"  (could not parse: {summary['error']})")
+        for module, name, alias, line in summary["imports"]:
+            imported = f"from {module} import {name}" if name else f"import {module}"
+            lines.append(f"  {line}: {imported}{f' as {alias}' if alias else ''}")
+        for _, qualname, kind, start, end, signature in summary["definitions"]:
+            indent = "  " * (qualname.count(".") + 1)
+            lines.append(f"{indent}{start}-{end} {kind} {qualname}{signature}")
+        return lines
+
+    def _fit(self, header: str, lines: List[str]) -> str:
+        budget = self.max_tokens * CHARS_PER_TOKEN - len(header)
+        shown = []
+        for line in lines:
+            if len(line) + 1 > budget:
+                break
+            budget -= len(line) + 1
+            shown.append(line)
+        if len(shown) < len(lines):
+            shown.append(
+                f"... {len(lines) - len(shown)} more lines not shown; "
+                "pass `path` to narrow the results."
+            )
+        return "\n".join([header] + shown)
+
+
+# EOF
@@ -0,0 +1,145 @@
+# batch_edit.py
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_NEWLINE = re.compile(rb"\n")
+
+
+@dataclass
+class FileEdit:
+    """All operations of a batch on one file, resolved against one read."""
+
+    path: Path
+    original: bytes
+    content: bytes
+    # Changed region: [start, old_end) of `original`, [start, new_end) of `content`.
+    start: int
+    old_end: int
+    new_end: int
+
+
+def _line_offset(content: bytes, line: int) -> int:
+    """Offset where 0-based `line` starts; the size past the last line."""
+    if line == 0:
+        return 0
+    for count, match in enumerate(_NEWLINE.finditer(content), start=1):
+        if count == line:
+            return match.end()
+    return len(content)
+
+
+def _line_count(content: bytes) -> int:
+    return content.count(b"\n") + (0 if content.endswith(b"\n") or not content else 1)
+
+
+def _splice_for(content: bytes, operation: dict) -> Tuple[int, int, bytes]:
+    command = operation.get("command")
+    new_bytes = (operation.get("new_str") or "").encode()
+
+    if command == "str_replace":
+        old_bytes = (operation.get("old_str") or "").encode()
+        if not old_bytes:
+            raise ValueError("old_str is required")
+        occurrences = content.count(old_bytes)
+        if not occurrences and b"\r\n" in content:
+            # CRLF file: match the text with its own line endings.
+            old_bytes = old_bytes.replace(b"\n", b"\r\n")
+            new_bytes = new_bytes.replace(b"\n", b"\r\n")
+            occurrences = content.count(old_bytes)
+        if occurrences == 0:
+            raise ValueError("old_str not found")
+        if occurrences > 1:
+            raise ValueError(f"old_str appears {occurrences} times, must be unique")
+        start = content.find(old_bytes)
+        return start, start + len(old_bytes), new_bytes
+
+    if command == "insert":
+        try:
+            line = int(operation.get("insert_line"))
+        except (TypeError, ValueError):
+            raise ValueError("insert_line must be an integer")
+        if line < 0 or line > _line_count(content):
+            raise ValueError(f"insert_line {line} out of range")
+        offset = _line_offset(content, line)
+        text = new_bytes.rstrip(b"\n") + b"\n"
+        if offset == len(content) and content and not content.endswith(b"\n"):
+            text = b"\n" + text
+        return offset, offset, text
+
+    raise ValueError(f"unsupported command '{command}' (use str_replace or insert)")
+
+
+def plan_file_edit(path: Path, operations: List[Tuple[int, dict]]) -> FileEdit:
+    """
+    Resolves every operation against the same original content, so line
+    numbers and matches never depend on the order of the list.
+    Raises ValueError listing every operation that does not apply.
+    """
+    original = path.read_bytes()
+    splices, errors = [], []
+    for number, operation in operations:
+        try:
+            splices.append((*_splice_for(original, operation), number))
+        except ValueError as e:
+            errors.append(f"operation {number} ({path}): {e}")
+
+    splices.sort(key=lambda s: (s[0], s[1]))
+    for previous, current in zip(splices, splices[1:]):
+        if current[0] < previous[1]:
+            errors.append(f"operations {previous[3]} and {current[3]} ({path}) overlap")
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    parts, cursor = [], 0
+    for start, end, data, _ in splices:
+        parts.extend([original[cursor:start], data])
+        cursor = end
+    parts.append(original[cursor:])
+    content = b"".join(parts)
+
+    start = splices[0][0]
+    old_end = max(s[1] for s in splices)
+    return FileEdit(
+        path=path,
+        original=original,
+        content=content,
+        start=start,
+        old_end=old_end,
+        new_end=len(content) - (len(original) - old_end),
+    )
+
+
+def write_atomically(edits: Dict[Path, FileEdit]):
+    """
+    Writes every file once via a temp file and rename. If any write fails,
+    files already replaced are restored, so the batch is all or nothing.
+    """
+    written: List[FileEdit] = []
+    try:
+        for edit in edits.values():
+            _replace(edit.path, edit.content)
+            written.append(edit)
+    except Exception:
+        for edit in written:
+            _replace(edit.path, edit.original)
+        raise
+
+
+def _replace(path: Path, data: bytes):
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except Exception:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+# EOF
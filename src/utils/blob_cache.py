@@ -0,0 +1,129 @@
+# blob_cache.py
+import subprocess  # nosec B603
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from src.utils.sqlite_cache import SqliteCache
+
+_SYMLINK_MODE = "120000"
+
+
+def list_tree_blobs(
+    repo_path: Path, commit: str, suffixes: Tuple[str, ...] = (".py",)
+) -> Optional[Dict[str, str]]:
+    """
+    Repo-relative path -> blob id of the regular files of `commit` ending in
+    one of `suffixes`. None when `repo_path` is not a git checkout.
+    """
+    try:
+        out = subprocess.run(
+            ["git", "ls-tree", "-r", "-z", "--full-tree", commit],
+            cwd=repo_path,
+            capture_output=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    blobs = {}
+    for entry in out.decode().split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        mode, kind, oid = meta.split()
+        if kind == "blob" and mode != _SYMLINK_MODE and path.endswith(suffixes):
+            blobs[path] = oid
+    return blobs
+
+
+def read_blobs(repo_path: Path, oids: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+    """
+    Streams (blob id, content) through one `git cat-file --batch` process
+    instead of a `git show` per file. Missing objects are skipped.
+    """
+    oids = list(oids)
+    if not oids:
+        return
+    process = subprocess.Popen(
+        ["git", "cat-file", "--batch"],
+        cwd=repo_path,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+
+    def feed():
+        try:
+            process.stdin.write("".join(f"{oid}\n" for oid in oids).encode())
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    # Written from a thread so a full stdout pipe never blocks the writer.
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        for _ in oids:
+            header = process.stdout.readline().split()
+            if len(header) != 3:
+                continue  # "<oid> missing"
+            oid, _, size = header
+            data = process.stdout.read(int(size))
+            process.stdout.read(1)  # trailing newline
+            yield oid.decode(), data
+    finally:
+        writer.join()
+        process.stdout.close()
+        process.wait()
+
+
+class BlobCache:
+    """
+    Per-file analysis results keyed by git blob id, shared by every commit
+    and checkout of every repository writing to the same store.
+
+    Most files are byte-identical across the nearby base commits of one
+    repository, so a new instance only analyzes the blobs no earlier
+    instance has seen. Analyses are named, and a name should carry a
+    version (e.g. `symbols.v1`) so changing an analyzer never reuses stale
+    results. Without a store every blob is analyzed.
+    """
+
+    def __init__(self, store: Optional[SqliteCache] = None):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def analyze_tree(
+        self,
+        repo_path: Path,
+        commit: str,
+        analysis: str,
+        analyzer: Callable[[bytes], Any],
+        suffixes: Tuple[str, ...] = (".py",),
+    ) -> Optional[Dict[str, Any]]:
+        """
+        `analyzer` results for every file of `commit` ending in `suffixes`,
+        keyed by repo-relative path. None when `repo_path` is not a git
+        checkout. Results must be JSON-serializable.
+        """
+        blobs = list_tree_blobs(repo_path, commit, suffixes)
+        if blobs is None:
+            return None
+        keys = {oid: f"{analysis}:{oid}" for oid in set(blobs.values())}
+        known = self.store.get_many(keys.values()) if self.store is not None else {}
+        results = {oid: known[key] for oid, key in keys.items() if key in known}
+
+        missing = [oid for oid in keys if oid not in results]
+        computed = {}
+        for oid, data in read_blobs(repo_path, missing):
+            results[oid] = computed[keys[oid]] = analyzer(data)
+        if computed and self.store is not None:
+            self.store.put_many(computed)
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(computed)
+        return {path: results[oid] for path, oid in blobs.items() if oid in results}
+
+
+# EOF
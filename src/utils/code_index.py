@@ -0,0 +1,294 @@
+# code_index.py
+import fnmatch
+import os
+import re
+import subprocess  # nosec B603
+import sys
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from src.utils.dir_listing import ARTIFACT_DIRS
+from src.utils.tool_memo import get_tool_memo
+
+MAX_FILE_BYTES = 1024 * 1024
+MAX_LINE_CHARS = 200
+_WORD = re.compile(rb"[A-Za-z0-9_]+")
+_DEFINITION = re.compile(r"^\s*(?:async\s+def|def|class)\s+(\w+)|^(\w+)\s*[:=]")
+
+
+@dataclass
+class SearchHit:
+    path: str
+    line: int
+    text: str
+    definition: bool
+
+
+@dataclass
+class SearchResult:
+    hits: List[SearchHit]
+    files_searched: int
+    truncated: bool
+
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Literal strings every match of `pattern` must contain (top-level runs of
+    plain characters). Returns [] when nothing is required or the pattern
+    cannot be analysed, which makes the caller scan every file.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+    literals, run = [], []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+        else:
+            literals.append("".join(run))
+            run = []
+    literals.append("".join(run))
+    return [literal for literal in literals if literal]
+
+
+class CodeIndex:
+    """
+    Inverted index of a checkout: lower-cased identifier words -> files, plus
+    a trigram index over that vocabulary.
+
+    A query is narrowed to candidate files through the words its required
+    literals can touch, then verified with the real regex on those files
+    only, so selective searches cost little however large the repository.
+    Files changed through the tools are re-indexed on the next search; an
+    unknown change (shell write, reset) triggers a cheap (mtime, size) sweep.
+    """
+
+    def __init__(self, repo_path: Path):
+        self.repo_path = Path(repo_path).resolve()
+        self._files: Dict[str, Tuple[int, int, Tuple[str, ...]]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: Dict[str, Set[str]] = defaultdict(set)
+        self._dirty: Set[str] = set()
+        self._stale = True
+        self._lock = threading.RLock()
+
+    # ---- maintenance ----
+
+    def invalidate(self, paths: Optional[Iterable[Path]] = None):
+        """Marks `paths` for re-indexing, or everything when None."""
+        with self._lock:
+            if paths is None:
+                self._stale = True
+                return
+            for path in paths:
+                try:
+                    self._dirty.add(
+                        Path(path).resolve().relative_to(self.repo_path).as_posix()
+                    )
+                except ValueError:
+                    continue
+
+    def _list_files(self) -> List[str]:
+        try:
+            result = subprocess.run(
+                ["git", "ls-files", "-z", "-co", "--exclude-standard"],
+                cwd=self.repo_path,
+                capture_output=True,
+                check=True,
+            )
+            return [p for p in result.stdout.decode().split("\0") if p]
+        except (OSError, subprocess.CalledProcessError):
+            files = []
+            for root, dirs, names in os.walk(self.repo_path):
+                dirs[:] = [d for d in dirs if d not in ARTIFACT_DIRS]
+                rel_root = Path(root).relative_to(self.repo_path)
+                files.extend((rel_root / name).as_posix() for name in names)
+            return files
+
+    def _refresh(self):
+        stale, dirty = self._stale, self._dirty
+        self._stale, self._dirty = False, set()
+        if stale:
+            listed = set(self._list_files())
+            for rel in set(self._files) - listed:
+                self._remove(rel)
+            dirty |= listed
+        for rel in dirty:
+            self._update(rel)
+
+    def _update(self, rel: str):
+        path = self.repo_path / rel
+        try:
+            stat = path.stat()
+        except OSError:
+            self._remove(rel)
+            return
+        known = self._files.get(rel)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return
+        self._remove(rel)
+        if not path.is_file() or stat.st_size > MAX_FILE_BYTES:
+            return
+        data = path.read_bytes()
+        if b"\0" in data[:8192]:
+            return  # binary
+        # Interned, so each distinct word is stored once across all files.
+        words = tuple({sys.intern(w.decode().lower()) for w in _WORD.findall(data)})
+        self._files[rel] = (stat.st_mtime_ns, stat.st_size, words)
+        for word in words:
+            if not self._postings[word]:
+                for trigram in _trigrams(word):
+                    self._vocabulary[trigram].add(word)
+            self._postings[word].add(rel)
+
+    def _remove(self, rel: str):
+        known = self._files.pop(rel, None)
+        if not known:
+            return
+        for word in known[2]:
+            files = self._postings[word]
+            files.discard(rel)
+            if not files:
+                del self._postings[word]
+                for trigram in _trigrams(word):
+                    self._vocabulary[trigram].discard(word)
+
+    # ---- queries ----
+
+    def _words_containing(self, fragment: str) -> Set[str]:
+        if len(fragment) < 3:
+            return {w for w in self._postings if fragment in w}
+        trigrams = sorted(_trigrams(fragment), key=lambda t: len(self._vocabulary[t]))
+        words = set(self._vocabulary[trigrams[0]])
+        for trigram in trigrams[1:]:
+            words &= self._vocabulary[trigram]
+        return {w for w in words if fragment in w}
+
+    def _candidates(self, literals: List[str]) -> Set[str]:
+        candidates: Optional[Set[str]] = None
+        for literal in literals:
+            fragments = [f.lower() for f in re.findall(r"[A-Za-z0-9_]+", literal)]
+            for fragment in fragments:
+                if len(fragment) < 3 and len(fragments) > 1:
+                    continue  # too unselective next to longer fragments
+                files: Set[str] = set()
+                for word in self._words_containing(fragment):
+                    files |= self._postings[word]
+                candidates = files if candidates is None else candidates & files
+        return set(self._files) if candidates is None else candidates
+
+    def search(
+        self,
+        pattern: str,
+        identifier: bool = False,
+        path_glob: Optional[str] = None,
+        ignore_case: bool = False,
+        max_hits: int = 2000,
+    ) -> "SearchResult":
+        """
+        Searches the candidate files, one hit per matching line. Hits are
+        ranked definitions first, then non-test files, then path and line.
+        Scanning stops once `max_hits` hits are collected.
+        """
+        flags = re.IGNORECASE if ignore_case else 0
+        if identifier:
+            regex = re.compile(
+                rf"(?<![A-Za-z0-9_]){re.escape(pattern)}(?![A-Za-z0-9_])", flags
+            )
+            literals = [pattern]
+        else:
+            regex = re.compile(pattern, flags | re.MULTILINE)
+            literals = required_literals(pattern, flags)
+
+        with self._lock:
+            self._refresh()
+            candidates = sorted(self._candidates(literals))
+        if path_glob:
+            candidates = [c for c in candidates if fnmatch.fnmatch(c, path_glob)]
+
+        hits: List[SearchHit] = []
+        truncated = False
+        for rel in candidates:
+            if len(hits) >= max_hits:
+                truncated = True
+                break
+            try:
+                text = (self.repo_path / rel).read_text(
+                    encoding="utf-8", errors="ignore"
+                )
+            except OSError:
+                continue
+            lines, number, position, last_line = None, 1, 0, 0
+            for match in regex.finditer(text):
+                if lines is None:
+                    lines = text.split("\n")
+                number += text.count("\n", position, match.start())
+                position = match.start()
+                if number == last_line:
+                    continue  # one hit per line
+                last_line = number
+                line = lines[number - 1] if number <= len(lines) else ""
+                definition = _DEFINITION.match(line)
+                hits.append(
+                    SearchHit(
+                        path=rel,
+                        line=number,
+                        text=line.strip()[:MAX_LINE_CHARS],
+                        definition=bool(
+                            definition
+                            and (identifier is False or pattern in definition.groups())
+                        ),
+                    )
+                )
+
+        hits.sort(
+            key=lambda h: (not h.definition, _is_test_path(h.path), h.path, h.line)
+        )
+        return SearchResult(
+            hits=hits, files_searched=len(candidates), truncated=truncated
+        )
+
+
+def _is_test_path(path: str) -> bool:
+    parts = path.split("/")
+    return any(
+        p in ("tests", "test", "testing") or p.startswith("test_") for p in parts
+    )
+
+
+_indexes: Dict[str, CodeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(repo_path: Path) -> CodeIndex:
+    """
+    Returns the code index of `repo_path`, built on first search and kept
+    current through the repository's tool memo.
+    """
+    key = str(Path(repo_path).resolve())
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = CodeIndex(Path(key))
+            get_tool_memo(Path(key)).subscribe(_indexes[key].invalidate)
+        return _indexes[key]
+
+
+def drop_code_index(repo_path: Path):
+    with _indexes_lock:
+        _indexes.pop(str(Path(repo_path).resolve()), None)
+
+
+# EOF
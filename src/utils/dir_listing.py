@@ -0,0 +1,120 @@
+# dir_listing.py
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pathspec
+
+# Never worth listing, wherever they appear.
+ARTIFACT_DIRS = {
+    ".git",
+    ".hg",
+    ".svn",
+    "__pycache__",
+    ".eggs",
+    ".mypy_cache",
+    ".nox",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".tox",
+    ".venv",
+    "venv",
+    "node_modules",
+}
+# Build outputs, skipped at the repository root only (packages may be named so).
+ROOT_ARTIFACT_DIRS = {"build", "dist", "htmlcov"}
+
+Rules = List[Tuple[str, pathspec.GitIgnoreSpec]]
+
+
+def _load_rules(directory: str) -> Optional[pathspec.GitIgnoreSpec]:
+    gitignore = os.path.join(directory, ".gitignore")
+    try:
+        with open(gitignore, encoding="utf-8", errors="ignore") as f:
+            return pathspec.GitIgnoreSpec.from_lines(f)
+    except OSError:
+        return None
+
+
+def _is_ignored(path: str, is_dir: bool, rules: Rules) -> bool:
+    # The deepest .gitignore with an opinion wins, as in git.
+    for base, spec in reversed(rules):
+        relative = os.path.relpath(path, base) + ("/" if is_dir else "")
+        include = spec.check_file(relative).include
+        if include is not None:
+            return include
+    return False
+
+
+def _skip_dir(name: str, parent: str, repo_root: str) -> bool:
+    if name in ARTIFACT_DIRS or name.endswith(".egg-info"):
+        return True
+    return parent == repo_root and name in ROOT_ARTIFACT_DIRS
+
+
+def list_directory(directory: Path, repo_path: Path, max_depth: int = 2) -> str:
+    """
+    Renders `directory` as an indented tree, `max_depth` levels deep.
+
+    Traversal uses os.scandir and never descends below `max_depth`. VCS
+    metadata, caches, build artifacts and paths ignored by any .gitignore
+    between the repository root and the listed directory are skipped, as are
+    hidden files.
+    """
+    repo_root = str(Path(repo_path).resolve())
+    directory = str(Path(directory).resolve())
+
+    ancestors = [Path(repo_root)]
+    for part in Path(directory).relative_to(repo_root).parts:
+        ancestors.append(ancestors[-1] / part)
+    rules: Rules = []
+    for ancestor in map(str, ancestors):
+        spec = _load_rules(ancestor)
+        if spec is not None:
+            rules.append((ancestor, spec))
+
+    lines: List[str] = []
+    _walk(directory, 0, max_depth, rules, repo_root, lines, own_rules_loaded=True)
+    return "\n".join(lines)
+
+
+def _walk(
+    path: str,
+    level: int,
+    max_depth: int,
+    rules: Rules,
+    repo_root: str,
+    lines: List[str],
+    own_rules_loaded: bool = False,
+):
+    lines.append(f"{' ' * 4 * level}{os.path.basename(path)}/")
+    if not own_rules_loaded:
+        spec = _load_rules(path)
+        if spec is not None:
+            rules = rules + [(path, spec)]
+
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+
+    indent = " " * 4 * (level + 1)
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if not _skip_dir(entry.name, path, repo_root) and not _is_ignored(
+                entry.path, True, rules
+            ):
+                subdirs.append(entry.path)
+        elif not entry.name.startswith(".") and not _is_ignored(
+            entry.path, False, rules
+        ):
+            lines.append(f"{indent}{entry.name}")
+
+    if level < max_depth:
+        for subdir in subdirs:
+            _walk(subdir, level + 1, max_depth, rules, repo_root, lines)
+
+
+# EOF
@@ -0,0 +1,141 @@
+# edit_journal.py
+import threading
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, Tuple
+
+
+@dataclass(frozen=True, eq=False)
+class JournalEntry:
+    """
+    Reverse of one byte splice: putting `removed` back over the
+    `inserted_len` bytes at `offset` restores the previous content. A
+    `created` entry is undone by deleting the file. `inserted_crc` detects
+    files changed by something other than the editor since the edit.
+    """
+
+    offset: int
+    removed: bytes
+    inserted_len: int
+    inserted_crc: int
+    created: bool = False
+
+
+class EditJournal:
+    """
+    Per-file undo stacks of reverse splices for one repository.
+
+    Only the replaced bytes are kept, never whole-file copies. Once they add
+    up to more than `max_bytes`, or a file has more than `max_depth` entries,
+    the oldest entries are forgotten.
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, max_depth: int = 100):
+        self.max_bytes = max_bytes
+        self.max_depth = max_depth
+        self.size = 0
+        self._stacks: Dict[str, Deque[JournalEntry]] = {}
+        self._order: Deque[Tuple[str, JournalEntry]] = deque()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        path: Path,
+        offset: int,
+        removed: bytes,
+        inserted: bytes,
+        created: bool = False,
+    ):
+        entry = JournalEntry(
+            offset=offset,
+            removed=removed,
+            inserted_len=len(inserted),
+            inserted_crc=zlib.crc32(inserted),
+            created=created,
+        )
+        with self._lock:
+            stack = self._stacks.setdefault(str(path), deque())
+            stack.append(entry)
+            self._order.append((str(path), entry))
+            self.size += len(removed)
+            if len(stack) > self.max_depth:
+                self._forget(str(path), stack[0])
+            while self.size > self.max_bytes and self._order:
+                self._forget(*self._order[0])
+
+    def _forget(self, key: str, entry: JournalEntry):
+        stack = self._stacks[key]
+        stack.remove(entry)
+        if not stack:
+            del self._stacks[key]
+        self._order.remove((key, entry))
+        self.size -= len(entry.removed)
+
+    def depth(self, path: Path) -> int:
+        with self._lock:
+            return len(self._stacks.get(str(path), ()))
+
+    def undo(self, path: Path) -> JournalEntry:
+        """
+        Reverts the latest recorded edit of `path` on disk and returns it.
+        Raises LookupError without an entry, ValueError if the file no
+        longer holds what that edit wrote.
+        """
+        with self._lock:
+            stack = self._stacks.get(str(path))
+            if not stack:
+                raise LookupError(f"No edit history for {path}")
+            entry = stack[-1]
+
+            end = entry.offset + entry.inserted_len
+            with path.open("r+b") as f:
+                f.seek(entry.offset)
+                current = f.read(entry.inserted_len)
+                changed = zlib.crc32(current) != entry.inserted_crc
+                if entry.created:
+                    changed = changed or bool(f.read(1))
+                if changed:
+                    raise ValueError(
+                        f"{path} changed outside the editor since its last edit"
+                    )
+                if not entry.created:
+                    f.seek(end)
+                    tail = f.read()
+                    f.seek(entry.offset)
+                    f.write(entry.removed)
+                    f.write(tail)
+                    f.truncate()
+            if entry.created:
+                path.unlink()
+
+            self._forget(str(path), entry)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._stacks.clear()
+            self._order.clear()
+            self.size = 0
+
+
+_journals: Dict[str, EditJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_edit_journal(repo_path: Path) -> EditJournal:
+    """Returns the edit journal of the repository at `repo_path`."""
+    key = str(Path(repo_path).resolve())
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = EditJournal()
+        return _journals[key]
+
+
+def drop_edit_journal(repo_path: Path):
+    with _journals_lock:
+        _journals.pop(str(Path(repo_path).resolve()), None)
+
+
+# EOF
@@ -0,0 +1,51 @@
+# evaluation_cache.py
+import hashlib
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Optional
+
+from src.utils.sqlite_cache import SqliteCache
+
+
+def harness_version() -> str:
+    try:
+        return version("swebench")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def normalize_patch(patch: str) -> str:
+    """
+    Drops differences that cannot change the evaluation outcome: line endings,
+    git `index` lines and trailing blank lines.
+    """
+    lines = [
+        line
+        for line in patch.replace("\r\n", "\n").split("\n")
+        if not line.startswith("index ")
+    ]
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+
+class EvaluationCache:
+    """
+    Evaluation results keyed by (instance_id, normalized patch hash, harness
+    version), so resubmitting a byte-identical patch skips Docker entirely.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.cache = SqliteCache(path, max_bytes=max_bytes)
+        self.harness_version = harness_version()
+
+    def key(self, instance_id: str, patch: str) -> str:
+        patch_hash = hashlib.sha256(normalize_patch(patch).encode("utf-8"))
+        return f"{instance_id}:{patch_hash.hexdigest()}:{self.harness_version}"
+
+    def get(self, instance_id: str, patch: str) -> Optional[dict]:
+        return self.cache.get(self.key(instance_id, patch))
+
+    def put(self, instance_id: str, patch: str, result: dict):
+        self.cache.put(self.key(instance_id, patch), result)
+
+
+# EOF
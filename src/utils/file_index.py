@@ -0,0 +1,124 @@
+# file_index.py
+import mmap
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from src.utils.patch_model import split_lines
+
+_NEWLINE = re.compile(rb"\n")
+
+
+class LineIndex:
+    """
+    Byte offsets of every line start of a file, built once over a memory map.
+
+    Valid while the file keeps the (mtime, size) it was built with; ranged
+    reads then cost O(range) instead of reading the whole file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        stat = path.stat()
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self.starts = array("Q", [0])
+        if self.size:
+            with path.open("rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                self.starts.extend(m.end() for m in _NEWLINE.finditer(mm))
+        # A trailing newline does not open another line.
+        if self.starts[-1] == self.size:
+            self.starts.pop()
+
+    @property
+    def line_count(self) -> int:
+        return len(self.starts)
+
+    def is_current(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) == self.signature
+
+    def offset(self, line: int) -> int:
+        """Byte offset where 0-based `line` starts; the file size past the end."""
+        return self.starts[line] if line < self.line_count else self.size
+
+    def read_lines(self, start: int, end: int) -> list[str]:
+        """
+        Lines [start, end) (0-based), reading only their bytes. Split on
+        newlines only, as the index is: form feeds and other Unicode line
+        breaks stay inside their line.
+        """
+        start, end = max(0, start), min(end, self.line_count)
+        if start >= end:
+            return []
+        first, last = self.offset(start), self.offset(end)
+        with self.path.open("rb") as f:
+            f.seek(first)
+            data = f.read(last - first)
+        return split_lines(data.decode("utf-8"))
+
+
+_indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_INDEXES = 256
+
+
+def get_line_index(path: Path) -> LineIndex:
+    """Returns a current index of `path`, rebuilding it if the file changed."""
+    key = str(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and index.is_current():
+            _indexes.move_to_end(key)
+            return index
+    index = LineIndex(path)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def invalidate_line_index(path: Path):
+    with _indexes_lock:
+        _indexes.pop(str(path), None)
+
+
+def find_all(path: Path, needle: bytes) -> list[int]:
+    """Byte offsets of every non-overlapping occurrence of `needle` in `path`."""
+    if not needle or not path.stat().st_size:
+        return []
+    positions = []
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        position = mm.find(needle)
+        while position >= 0:
+            positions.append(position)
+            position = mm.find(needle, position + len(needle))
+    return positions
+
+
+def splice_file(path: Path, start: int, end: int, data: bytes) -> bytes:
+    """
+    Replaces bytes [start, end) of `path` with `data`, rewriting only the
+    bytes from `start` on. Returns the bytes that were replaced.
+    """
+    with path.open("r+b") as f:
+        f.seek(start)
+        old = f.read(end - start)
+        tail = f.read()
+        f.seek(start)
+        f.write(data)
+        f.write(tail)
+        f.truncate()
+    invalidate_line_index(path)
+    return old
+
+
+# EOF
@@ -1,46 +1,37 @@
 # io_utils.py
+import fcntl
 import logging
 import os
 import subprocess  # nosec B603
-from io import StringIO
+from contextlib import contextmanager
 from pathlib import Path
 from shutil import which
 from typing import Optional
 
 import pathspec
-from unidiff import PatchSet
 
+from src.utils.edit_journal import get_edit_journal
+from src.utils.patch_model import apply_file_patch, parse_patch
+from src.utils.tool_memo import get_tool_memo
 
-def apply_patch_to_file(original_content: str, unified_diff: str, filename: str) -> str:
-    patch = PatchSet(StringIO(unified_diff))
 
-    for patched_file in patch:
-        if patched_file.path == filename or patched_file.target_file.endswith(filename):
+def apply_patch_to_file(
+    original_content: str,
+    unified_diff: str,
+    filename: str,
+    fuzz: int = 0,
+    max_offset: Optional[int] = None,
+) -> str:
+    patch = parse_patch(unified_diff)
+
+    for file_patch in patch.files:
+        if file_patch.path == filename or file_patch.path.endswith(filename):
             break
     else:
         raise ValueError(f"No matching patch found for {filename}")
 
-    original_lines = original_content.splitlines(keepends=True)
-    output_lines = []
-    orig_idx = 0
-
-    for hunk in patched_file:
-        hunk_start = hunk.source_start - 1
-        while orig_idx < hunk_start:
-            output_lines.append(original_lines[orig_idx])
-            orig_idx += 1
-
-        for line in hunk:
-            if line.is_context:
-                output_lines.append(original_lines[orig_idx])
-                orig_idx += 1
-            elif line.is_removed:
-                orig_idx += 1
-            elif line.is_added:
-                output_lines.append(line.value)
-
-    output_lines.extend(original_lines[orig_idx:])
-    return "".join(output_lines)
+    patched, _ = apply_file_patch(original_content, file_patch, fuzz, max_offset)
+    return patched
 
 
 def project_root(marker=".git") -> str:
@@ -69,24 +60,33 @@ def clone_repo(
     base_commit: str,
     target_folder: Path,
     logger: Optional[logging.Logger] = None,
+    mirror_folder: Optional[Path] = None,
+    remote_url: Optional[str] = None,
 ) -> Path:
     """
-    Clones the repository from GitHub and checks out a specific commit.
+    Checks out a repository at a specific commit as a git worktree of a
+    locally cached bare mirror, so each repo's history is downloaded once.
 
     Args:
         instance_id (str): Unique ID for the problem instance.
         repo (str): GitHub repo name (e.g., "astropy/astropy").
         base_commit (str): Git commit to checkout.
-        target_folder (Path): Where the repo should be cloned.
+        target_folder (Path): Where the repo should be checked out.
         logger (Optional[Logger]): Logger instance for output.
+        mirror_folder (Optional[Path]): Where bare mirrors are cached. Defaults to
+            `default_mirror_folder()`.
+        remote_url (Optional[str]): Clone URL (e.g. file:// for local fixtures).
+            Defaults to the GitHub URL of `repo`.
 
     Returns:
         Path: Path to the checked-out repo.
     """
     logger = logger or logging.getLogger("rich")
     repo_path = target_folder / instance_id
+    mirror_folder = mirror_folder or default_mirror_folder()
+    mirror_path = mirror_folder / f"{repo.replace('/', '__')}.git"
 
-    # ✅ If already cloned and on correct commit
+    # ✅ If already checked out and on correct commit
     if repo_path.exists():
         git_dir = repo_path / ".git"
         if git_dir.exists():
@@ -108,29 +108,171 @@ def clone_repo(
             except subprocess.SubprocessError:
                 logger.warning("[clone_repo] ⚠️ Invalid .git repo. Re-cloning...")
                 subprocess.run(["rm", "-rf", str(repo_path)], check=True)  # nosec B603
+        else:
+            subprocess.run(["rm", "-rf", str(repo_path)], check=True)  # nosec B603
 
     os.makedirs(repo_path.parent, exist_ok=True)
 
     if not which("git"):
         raise EnvironmentError("Git is not installed or not found in PATH.")
 
-    repo_url = f"https://github.com/{repo}.git"
-    logger.info(f"[clone_repo] Cloning {repo_url} into {repo_path}")
+    repo_url = remote_url or f"https://github.com/{repo}.git"
+    with _mirror_lock(mirror_path):
+        ensure_mirror(repo_url, mirror_path, base_commit, logger)
+        add_worktree(mirror_path, repo_path, base_commit, logger)
+
+    logger.info(f"[clone_repo] ✅ Repo ready at commit {base_commit}")
+    return repo_path
+
+
+def user_cache_folder() -> Path:
+    """
+    Per-user root of what is worth keeping across runs (mirrors, LLM
+    responses, evaluation results): the default output root is temporary.
+    """
+    return Path.home() / ".cache" / "swe_autonomous"
 
+
+def default_mirror_folder() -> Path:
+    """$SWE_MIRROR_CACHE, else `mirrors` in the user cache folder."""
+    return Path(os.environ.get("SWE_MIRROR_CACHE", user_cache_folder() / "mirrors"))
+
+
+@contextmanager
+def _mirror_lock(mirror_path: Path):
+    """Serializes mirror fetches and worktree bookkeeping across worker processes."""
+    mirror_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(mirror_path.with_suffix(".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Branches and tags, force-updated; deliberately not refs/pull/* and the like.
+MIRROR_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+
+def _has_commit(git_dir: Path, commit: str) -> bool:
     result = subprocess.run(
-        ["git", "clone", repo_url, str(repo_path)], check=False
+        ["git", "-C", str(git_dir), "cat-file", "-e", f"{commit}^{{commit}}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False,
     )  # nosec B603
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to clone repository: {repo_url}")
+    return result.returncode == 0
 
+
+def ensure_mirror(
+    repo_url: str,
+    mirror_path: Path,
+    commit: str,
+    logger: Optional[logging.Logger] = None,
+) -> Path:
+    """
+    Creates the bare mirror on first use and fetches incrementally only when
+    `commit` is not already present. Callers should hold `_mirror_lock`.
+
+    Only branches and tags are copied, not GitHub's refs/pull/* (one per
+    pull request, often more data than the branches). A commit that no
+    branch or tag reaches is fetched by id.
+    """
+    logger = logger or logging.getLogger("rich")
+
+    if not mirror_path.exists():
+        logger.info(f"[clone_repo] Mirroring {repo_url} into {mirror_path}")
+        result = subprocess.run(
+            ["git", "clone", "--bare", repo_url, str(mirror_path)], check=False
+        )  # nosec B603
+        if result.returncode != 0:
+            subprocess.run(["rm", "-rf", str(mirror_path)], check=False)  # nosec B603
+            raise RuntimeError(f"Failed to clone repository: {repo_url}")
+
+    if _has_commit(mirror_path, commit):
+        return mirror_path
+
+    logger.info(f"[clone_repo] 🔄 Updating mirror {mirror_path.name} for {commit}")
+    subprocess.run(
+        ["git", "-C", str(mirror_path), "fetch", "--prune", "origin", *MIRROR_REFSPECS],
+        check=False,
+    )  # nosec B603
+    if not _has_commit(mirror_path, commit):
+        # Commits no longer reachable from any ref can still be fetched by id.
+        subprocess.run(
+            ["git", "-C", str(mirror_path), "fetch", "origin", commit], check=False
+        )  # nosec B603
+    if not _has_commit(mirror_path, commit):
+        raise RuntimeError(f"Failed to checkout commit {commit}")
+    return mirror_path
+
+
+def add_worktree(
+    git_dir: Path,
+    worktree_path: Path,
+    commit: str,
+    logger: Optional[logging.Logger] = None,
+) -> Path:
+    """Adds a detached worktree of `git_dir` at `commit`, replacing stale entries."""
+    logger = logger or logging.getLogger("rich")
+    subprocess.run(
+        ["git", "-C", str(git_dir), "worktree", "prune"], check=False
+    )  # nosec B603
     result = subprocess.run(
-        ["git", "-C", str(repo_path), "checkout", base_commit], check=False
+        [
+            "git",
+            "-C",
+            str(git_dir),
+            "worktree",
+            "add",
+            "--force",
+            "--detach",
+            str(worktree_path),
+            commit,
+        ],
+        check=False,
     )  # nosec B603
     if result.returncode != 0:
-        raise RuntimeError(f"Failed to checkout commit {base_commit}")
+        raise RuntimeError(f"Failed to checkout commit {commit}")
+    logger.info(f"[clone_repo] 🌿 Worktree {worktree_path} at {commit}")
+    return worktree_path
 
-    logger.info(f"[clone_repo] ✅ Repo ready at commit {base_commit}")
-    return repo_path
+
+def reset_worktree(worktree_path: Path, commit: str) -> Path:
+    """
+    Discards every change, tracked or not, in a worktree and moves it to
+    `commit`. Memoized tool results, index overlays and the undo journal
+    describe the discarded files, so they are dropped too.
+    """
+    subprocess.run(
+        ["git", "-C", str(worktree_path), "reset", "--hard", "-q", commit], check=True
+    )  # nosec B603
+    subprocess.run(
+        ["git", "-C", str(worktree_path), "clean", "-fdq"], check=True
+    )  # nosec B603
+    get_tool_memo(worktree_path).bump()
+    get_edit_journal(worktree_path).clear()
+    return worktree_path
+
+
+def remove_worktree(git_dir: Path, worktree_path: Path):
+    """Removes a worktree added with `add_worktree`, dirty or not."""
+    subprocess.run(
+        [
+            "git",
+            "-C",
+            str(git_dir),
+            "worktree",
+            "remove",
+            "--force",
+            str(worktree_path),
+        ],
+        check=False,
+        capture_output=True,
+    )  # nosec B603
+    subprocess.run(
+        ["git", "-C", str(git_dir), "worktree", "prune"], check=False
+    )  # nosec B603
 
 
 def load_gitignore_spec() -> pathspec.PathSpec:
@@ -0,0 +1,121 @@
+# llm_cache.py
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from smolagents import Tool
+from smolagents.models import ChatMessage, Model, get_tool_json_schema
+
+from src.utils.sqlite_cache import SqliteCache
+
+# Model kwargs that hold credentials; they never become part of a cache key.
+SECRET_PARAMS = {
+    "api_key",
+    "api_token",
+    "token",
+    "access_token",
+    "authorization",
+    "client_secret",
+    "secret",
+    "password",
+}
+
+
+class CachedModel(Model):
+    """
+    Wraps a smolagents model with a persistent response cache.
+
+    Keys cover the model class and id, its sampling parameters, the exact
+    message list, stop sequences, grammar and tool schemas, so only truly
+    identical requests replay. Secrets such as API keys are never part of a key.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        cache: SqliteCache,
+        load_cache: bool = True,
+        save_cache: bool = True,
+    ):
+        super().__init__()
+        self.model = model
+        self.model_id = getattr(model, "model_id", None)
+        self.cache = cache
+        self.load_cache = load_cache
+        self.save_cache = save_cache
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(
+        self,
+        messages: List[Dict[str, Any]],
+        stop_sequences: Optional[List[str]],
+        grammar: Optional[str],
+        tools_to_call_from: Optional[List[Tool]],
+        kwargs: dict,
+    ) -> str:
+        params = {
+            k: v
+            for k, v in getattr(self.model, "kwargs", {}).items()
+            if k.lower() not in SECRET_PARAMS
+        }
+        payload = {
+            "model": type(self.model).__name__,
+            "model_id": self.model_id,
+            "params": params,
+            "messages": messages,
+            "stop_sequences": stop_sequences,
+            "grammar": grammar,
+            "tools": [get_tool_json_schema(t) for t in tools_to_call_from or []],
+            "kwargs": kwargs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def __call__(
+        self,
+        messages: List[Dict[str, Any]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Tool]] = None,
+        **kwargs,
+    ) -> ChatMessage:
+        key = self.cache_key(
+            messages, stop_sequences, grammar, tools_to_call_from, kwargs
+        )
+
+        if self.load_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                self.last_input_token_count = cached["input_tokens"]
+                self.last_output_token_count = cached["output_tokens"]
+                return ChatMessage.from_dict(cached["message"])
+
+        self.misses += 1
+        message = self.model(
+            messages,
+            stop_sequences=stop_sequences,
+            grammar=grammar,
+            tools_to_call_from=tools_to_call_from,
+            **kwargs,
+        )
+        self.last_input_token_count = self.model.last_input_token_count
+        self.last_output_token_count = self.model.last_output_token_count
+
+        if self.save_cache:
+            self.cache.put(
+                key,
+                {
+                    "message": json.loads(message.model_dump_json()),
+                    "input_tokens": self.last_input_token_count,
+                    "output_tokens": self.last_output_token_count,
+                },
+            )
+        return message
+
+    def to_dict(self) -> Dict:
+        return self.model.to_dict()
+
+
+# EOF
@@ -1,34 +1,15 @@
 from typing import Set, Tuple, Dict, Union
 
+from src.utils.patch_model import parse_patch
+
 
 def extract_file_and_lines_from_patch(patch: str) -> Tuple[Set[str], Set[int]]:
     files = set()
     lines = set()
 
-    current_file = None
-    current_new_line = None
-
-    for line in patch.splitlines():
-        if line.startswith("diff --git"):
-            parts = line.split()
-            if len(parts) >= 4:
-                current_file = parts[2][2:]  # Strip 'a/'
-                files.add(current_file)
-        elif line.startswith("@@"):
-            try:
-                header_parts = line.split()
-                new_file_range = header_parts[2]  # e.g., '+160,7'
-                start = int(new_file_range.split(",")[0][1:])
-                current_new_line = start
-            except ValueError:
-                continue
-        elif line.startswith("+") and not line.startswith("+++"):
-            if current_new_line is not None:
-                lines.add(current_new_line)
-                current_new_line += 1
-        elif not line.startswith("-"):
-            if current_new_line is not None:
-                current_new_line += 1
+    for file_patch in parse_patch(patch).files:
+        files.add(file_patch.source_path or file_patch.target_path)
+        lines.update(file_patch.added_line_numbers)
 
     return files, lines
 
@@ -0,0 +1,506 @@
+# patch_model.py
+import hashlib
+import re
+import subprocess  # nosec B603
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+_GIT_HEADER = re.compile(r"^diff --git (\S+) (\S+)$")
+_MAX_CACHED = 256
+
+
+@dataclass(frozen=True)
+class Hunk:
+    """
+    One hunk. `lines` are (tag, text) pairs, tag being " ", "-" or "+";
+    text keeps its newline unless the patch marks it as the file's last.
+    """
+
+    source_start: int
+    source_length: int
+    target_start: int
+    target_length: int
+    lines: Tuple[Tuple[str, str], ...]
+    section: str = ""
+
+    @property
+    def source_lines(self) -> List[str]:
+        return [text for tag, text in self.lines if tag != "+"]
+
+    @property
+    def target_lines(self) -> List[str]:
+        return [text for tag, text in self.lines if tag != "-"]
+
+    @property
+    def added_line_numbers(self) -> List[int]:
+        """Target line numbers of the added lines."""
+        numbers, line = [], self.target_start
+        for tag, _ in self.lines:
+            if tag == "+":
+                numbers.append(line)
+            if tag != "-":
+                line += 1
+        return numbers
+
+    @property
+    def removed_line_numbers(self) -> List[int]:
+        """Source line numbers of the removed lines."""
+        numbers, line = [], self.source_start
+        for tag, _ in self.lines:
+            if tag == "-":
+                numbers.append(line)
+            if tag != "+":
+                line += 1
+        return numbers
+
+
+@dataclass(frozen=True)
+class FilePatch:
+    """The changes to one file; paths are repo-relative, None for /dev/null."""
+
+    source_path: Optional[str]
+    target_path: Optional[str]
+    hunks: Tuple[Hunk, ...]
+    text: str
+    is_binary: bool = False
+    is_rename: bool = False
+    # Hunk bodies shorter or longer than their headers claim.
+    is_malformed: bool = False
+    # Paths lacking the a/ and b/ prefixes `git apply` strips by default.
+    is_unprefixed: bool = False
+
+    @property
+    def path(self) -> str:
+        return self.target_path or self.source_path
+
+    @property
+    def is_new(self) -> bool:
+        return self.source_path is None
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.target_path is None
+
+    @property
+    def added_line_numbers(self) -> List[int]:
+        return [n for hunk in self.hunks for n in hunk.added_line_numbers]
+
+
+@dataclass(frozen=True)
+class Patch:
+    """A parsed unified diff, possibly spanning several files."""
+
+    files: Tuple[FilePatch, ...]
+    text: str
+
+    @property
+    def paths(self) -> List[str]:
+        return [f.path for f in self.files]
+
+    def file(self, path: str) -> Optional[FilePatch]:
+        for file_patch in self.files:
+            if path in (file_patch.source_path, file_patch.target_path):
+                return file_patch
+        return None
+
+
+def split_lines(text: str) -> List[str]:
+    """Lines with their endings, split on newlines only (unlike str.splitlines)."""
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
+
+def _strip_prefix(path: str) -> Tuple[Optional[str], bool]:
+    """The repo-relative path, and whether it carried an a/ or b/ prefix."""
+    path = path.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None, True
+    if path.startswith(("a/", "b/")):
+        return path[2:], True
+    return path, False
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.lines = split_lines(text)
+        self.files: List[FilePatch] = []
+        self.start = 0
+        self.source: Optional[str] = None
+        self.target: Optional[str] = None
+        self.hunks: List[Hunk] = []
+        self.binary = self.rename = self.malformed = self.unprefixed = False
+        self.in_file = False
+
+    def _flush(self, end: int):
+        if self.in_file:
+            self.files.append(
+                FilePatch(
+                    source_path=self.source,
+                    target_path=self.target,
+                    hunks=tuple(self.hunks),
+                    text="".join(self.lines[self.start : end]),
+                    is_binary=self.binary,
+                    is_rename=self.rename,
+                    is_malformed=self.malformed,
+                    is_unprefixed=self.unprefixed,
+                )
+            )
+        self.source = self.target = None
+        self.hunks = []
+        self.binary = self.rename = self.malformed = self.unprefixed = False
+        self.in_file = False
+
+    def _begin(self, index: int):
+        self._flush(index)
+        self.start = index
+        self.in_file = True
+
+    def parse(self) -> Tuple[FilePatch, ...]:
+        i, seen_minus = 0, False
+        while i < len(self.lines):
+            line = self.lines[i].rstrip("\r\n")
+            git = _GIT_HEADER.match(line)
+            if git:
+                self._begin(i)
+                self._set_paths(git.group(1), git.group(2))
+                seen_minus = False
+            elif line.startswith("--- ") and self._next_startswith(i, "+++ "):
+                if not self.in_file or seen_minus or self.hunks:
+                    self._begin(i)  # plain unified diff without a git header
+                self._set_paths(line[4:], self.lines[i + 1].rstrip("\r\n")[4:])
+                seen_minus = True
+                i += 1
+            elif line.startswith("new file mode"):
+                self.source = None
+            elif line.startswith("deleted file mode"):
+                self.target = None
+            elif line.startswith(("rename from", "copy from")):
+                self.rename = True
+            elif line.startswith(("Binary files", "GIT binary patch")):
+                self.binary = True
+            elif self.in_file and line.startswith("@@"):
+                i = self._hunk(i)
+                continue
+            i += 1
+        self._flush(len(self.lines))
+        return tuple(self.files)
+
+    def _set_paths(self, source: str, target: str):
+        self.source, source_prefixed = _strip_prefix(source)
+        self.target, target_prefixed = _strip_prefix(target)
+        self.unprefixed = not (source_prefixed and target_prefixed)
+
+    def _next_startswith(self, i: int, prefix: str) -> bool:
+        return i + 1 < len(self.lines) and self.lines[i + 1].startswith(prefix)
+
+    def _hunk(self, i: int) -> int:
+        header = _HUNK_HEADER.match(self.lines[i].rstrip("\r\n"))
+        if not header:
+            self.malformed = True
+            return i + 1
+        source_start, source_length, target_start, target_length = (
+            int(header.group(1)),
+            int(header.group(2) or 1),
+            int(header.group(3)),
+            int(header.group(4) or 1),
+        )
+        body: List[Tuple[str, str]] = []
+        source_left, target_left = source_length, target_length
+        i += 1
+        while i < len(self.lines) and (source_left > 0 or target_left > 0):
+            raw = self.lines[i]
+            tag = raw[:1]
+            if raw.startswith("\\"):
+                if body:
+                    body[-1] = (body[-1][0], body[-1][1].rstrip("\r\n"))
+                i += 1
+                continue
+            if raw in ("\n", "\r\n"):
+                tag, raw = " ", " " + raw  # context line stripped of its space
+            if tag == " " and source_left > 0 and target_left > 0:
+                source_left -= 1
+                target_left -= 1
+            elif tag == "-" and source_left > 0:
+                source_left -= 1
+            elif tag == "+" and target_left > 0:
+                target_left -= 1
+            else:
+                break
+            body.append((tag, raw[1:]))
+            i += 1
+        # A trailing "\ No newline at end of file" marker.
+        if i < len(self.lines) and self.lines[i].startswith("\\") and body:
+            body[-1] = (body[-1][0], body[-1][1].rstrip("\r\n"))
+            i += 1
+        if source_left or target_left:
+            self.malformed = True
+        self.hunks.append(
+            Hunk(
+                source_start=source_start,
+                source_length=source_length,
+                target_start=target_start,
+                target_length=target_length,
+                lines=tuple(body),
+                section=header.group(5).strip(),
+            )
+        )
+        return i
+
+
+_patches: "OrderedDict[str, Patch]" = OrderedDict()
+_patches_lock = threading.Lock()
+
+
+def parse_patch(text: str) -> Patch:
+    """
+    Parses a unified diff in one pass. Results are cached by content hash,
+    so the validator, the evaluators and the scores share one parse.
+    """
+    key = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    with _patches_lock:
+        if key in _patches:
+            _patches.move_to_end(key)
+            return _patches[key]
+    patch = Patch(files=_Parser(text).parse(), text=text)
+    with _patches_lock:
+        _patches[key] = patch
+        if len(_patches) > _MAX_CACHED:
+            _patches.popitem(last=False)
+    return patch
+
+
+@dataclass(frozen=True)
+class HunkPlacement:
+    """Where a hunk was applied, relative to the position its header gives."""
+
+    hunk: int  # 1-based
+    offset: int
+    fuzz: int  # context lines ignored at each end
+    whitespace: bool  # matched only when ignoring trailing whitespace
+
+    @property
+    def is_exact(self) -> bool:
+        return not (self.offset or self.fuzz or self.whitespace)
+
+
+class _LineIndex:
+    """Positions of each line of a file, keyed without trailing whitespace."""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.normalized = [line.rstrip() for line in lines]
+        self.positions: Dict[str, List[int]] = {}
+        for position, line in enumerate(self.normalized):
+            self.positions.setdefault(line, []).append(position)
+
+    def find(
+        self, needle: List[str], expected: int, low: int, high: int
+    ) -> Optional[Tuple[int, bool]]:
+        """
+        Start of `needle` in [low, high] nearest to `expected`, preferring
+        exact matches, and whether it only matched ignoring whitespace.
+        """
+        high = min(high, len(self.lines) - len(needle))
+        if high < low:
+            return None
+        if not needle:
+            return min(max(expected, low), high), False
+        normalized = [line.rstrip() for line in needle]
+        # Candidates come from the needle's rarest line.
+        anchor = min(
+            range(len(normalized)),
+            key=lambda i: len(self.positions.get(normalized[i], ())),
+        )
+        best = None
+        for occurrence in self.positions.get(normalized[anchor], ()):
+            start = occurrence - anchor
+            if not low <= start <= high:
+                continue
+            end = start + len(needle)
+            if self.normalized[start:end] != normalized:
+                continue
+            loose = self.lines[start:end] != needle
+            rank = (loose, abs(start - expected))
+            if best is None or rank < best[0]:
+                best = (rank, start, loose)
+        return None if best is None else (best[1], best[2])
+
+
+def _trim_context(hunk: Hunk, fuzz: int) -> Tuple[List[Tuple[str, str]], int]:
+    """Hunk lines without up to `fuzz` context lines at each end."""
+    lines = list(hunk.lines)
+    lead = 0
+    while lead < fuzz and lines and lines[0][0] == " ":
+        lines.pop(0)
+        lead += 1
+    trail = 0
+    while trail < fuzz and lines and lines[-1][0] == " ":
+        lines.pop()
+        trail += 1
+    return lines, lead
+
+
+def apply_file_patch(
+    original: str,
+    file_patch: FilePatch,
+    fuzz: int = 0,
+    max_offset: Optional[int] = None,
+) -> Tuple[str, List[HunkPlacement]]:
+    """
+    Applies the hunks of `file_patch` to `original` and reports where.
+
+    Each hunk's source lines are verified against `original` and searched
+    for around the line its header gives (shifted by the previous hunks'
+    offset, within `max_offset` lines), exact matches first, then ignoring
+    trailing whitespace. Like GNU `patch`, up to `fuzz` context lines may
+    then be dropped at either end of the hunk. Context lines are kept from
+    `original`. Raises ValueError naming the first hunk that fits nowhere.
+    """
+    lines = split_lines(original)
+    index = _LineIndex(lines)
+    output: List[str] = []
+    placements: List[HunkPlacement] = []
+    cursor = drift = 0
+    for number, hunk in enumerate(file_patch.hunks, start=1):
+        # A zero-length source range names the line *after* which to insert.
+        stated = hunk.source_start - 1 if hunk.source_length else hunk.source_start
+        for level in range(fuzz + 1):
+            body, lead = _trim_context(hunk, level)
+            needle = [text for tag, text in body if tag != "+"]
+            expected = stated + drift + lead
+            low, high = cursor, len(lines)
+            if max_offset is not None:
+                low = max(low, expected - max_offset)
+                high = min(high, expected + max_offset)
+            found = index.find(needle, expected, low, high)
+            if found is not None:
+                break
+        else:
+            first = hunk.source_lines[0].rstrip() if hunk.source_lines else ""
+            raise ValueError(
+                f"hunk #{number} (@@ -{hunk.source_start},{hunk.source_length} "
+                f"+{hunk.target_start},{hunk.target_length} @@) does not match "
+                f"{file_patch.path} near line {hunk.source_start} "
+                f"(fuzz {fuzz}, first source line {first!r})"
+            )
+
+        start, whitespace = found
+        output.extend(lines[cursor:start])
+        cursor = start
+        for tag, text in body:
+            if tag == " ":
+                output.append(lines[cursor])
+                cursor += 1
+            elif tag == "-":
+                cursor += 1
+            else:
+                output.append(text)
+        drift = start - lead - stated
+        placements.append(HunkPlacement(number, drift, level, whitespace))
+    output.extend(lines[cursor:])
+    return "".join(output), placements
+
+
+def _find(lines: List[str], needle: List[str], expected: int) -> Optional[int]:
+    """Position of `needle` in `lines` nearest to `expected`, like `git apply`."""
+    limit = len(lines) - len(needle)
+    if limit < 0:
+        return None
+    for distance in range(max(expected, limit - expected) + 1):
+        for position in (expected - distance, expected + distance):
+            if 0 <= position <= limit and lines[position : position + len(needle)] == (
+                needle
+            ):
+                return position
+    return None
+
+
+def _anchors(hunk: Hunk) -> Tuple[bool, bool]:
+    """
+    Whether `git apply` requires the hunk to match at the start, and at the
+    end, of the file: a hunk starting at line 0 or 1 cannot have moved, and
+    one without trailing context must end where the file does.
+    """
+    return hunk.source_start <= 1, not hunk.lines or hunk.lines[-1][0] != " "
+
+
+def applies_cleanly(patch: Patch, repo_path: Path) -> bool:
+    """
+    True when every hunk's source lines match the checkout exactly, at its
+    stated line or shifted, which is what `git apply --check` accepts;
+    hunks git anchors to the start or end of the file (see `_anchors`)
+    are not shifted.
+    False also for anything not modelled here (binary or renamed files,
+    malformed hunks, unprefixed paths, modifications without hunks), so
+    callers can fall back to git.
+    """
+    if not any(file_patch.hunks for file_patch in patch.files):
+        return False
+    for file_patch in patch.files:
+        if (
+            file_patch.is_binary
+            or file_patch.is_rename
+            or file_patch.is_malformed
+            or file_patch.is_unprefixed
+        ):
+            return False
+        if not file_patch.hunks and not (file_patch.is_new or file_patch.is_deleted):
+            return False  # a bare header, which git rejects
+        path = Path(repo_path) / file_patch.path
+        if file_patch.is_new:
+            if path.exists():
+                return False
+            continue
+        try:
+            lines = split_lines(path.read_bytes().decode("utf-8"))
+        except (OSError, UnicodeDecodeError):
+            return False
+        cursor = 0
+        for hunk in file_patch.hunks:
+            source = hunk.source_lines
+            at_start, at_end = _anchors(hunk)
+            if at_start or at_end:
+                position = 0 if at_start else len(lines) - len(source)
+                if (
+                    position < cursor
+                    or lines[position : position + len(source)] != source
+                    or (at_end and position + len(source) != len(lines))
+                ):
+                    return False
+                cursor = position + len(source)
+                continue
+            expected = max(hunk.source_start - 1, cursor)
+            position = _find(lines[cursor:], source, expected - cursor)
+            if position is None:
+                return False
+            cursor += position + len(source)
+        if file_patch.is_deleted and cursor != len(lines):
+            return False
+    return True
+
+
+def check_applies(patch: str, repo_path: Path, patch_path: Path) -> Optional[str]:
+    """
+    None when `patch` (saved at `patch_path`) applies to the checkout, else
+    the error of `git apply --check`. Git only runs when the in-process
+    check cannot vouch for the patch, so its verdict stays authoritative.
+    """
+    if applies_cleanly(parse_patch(patch), repo_path):
+        return None
+    apply_check = subprocess.run(
+        ["git", "apply", "--check", str(patch_path)],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if apply_check.returncode == 0:
+        return None
+    return apply_check.stderr.decode()
+
+
+# EOF
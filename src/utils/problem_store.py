@@ -0,0 +1,162 @@
+# problem_store.py
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.models.problem import Problem
+
+# Dataset column -> Problem field.
+PROBLEM_COLUMNS = {
+    "instance_id": "instance_id",
+    "problem_statement": "problem_statement",
+    "repo": "repo",
+    "base_commit": "base_commit",
+    "hints_text": "hints_text",
+    "created_at": "created_at",
+    "version": "version",
+    "environment_setup_commit": "environment_setup_commit",
+    "patch": "patch",
+    "test_patch": "test_patch",
+    "FAIL_TO_PASS": "fail_to_pass",
+    "PASS_TO_PASS": "pass_to_pass",
+}
+INDEX_COLUMNS = ["difficulty"]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS problems (
+    {", ".join(f"{c} TEXT" for c in [*PROBLEM_COLUMNS, *INDEX_COLUMNS])},
+    PRIMARY KEY (instance_id)
+);
+CREATE INDEX IF NOT EXISTS idx_problems_repo ON problems (repo);
+CREATE INDEX IF NOT EXISTS idx_problems_difficulty ON problems (difficulty);
+"""
+
+
+def default_store_path(dataset_path: str, split: str) -> Path:
+    cache_dir = Path(
+        os.environ.get(
+            "SWE_PROBLEM_STORE", Path.home() / ".cache" / "swe_autonomous" / "problems"
+        )
+    )
+    return cache_dir / f"{dataset_path.replace('/', '__')}.{split}.sqlite"
+
+
+def _to_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+class ProblemStore:
+    """
+    Local SQLite copy of a SWE-bench split, indexed by instance_id, repo and
+    difficulty. Built once from the HF dataset, then queried without network.
+    Rows keep the dataset order.
+    """
+
+    def __init__(self, path: Path):
+        if not path.exists():
+            raise FileNotFoundError(f"Problem store not found: {path}")
+        self.path = path
+
+    @classmethod
+    def build(cls, path: Path, records: Iterable[Dict[str, Any]]) -> "ProblemStore":
+        columns = [*PROBLEM_COLUMNS, *INDEX_COLUMNS]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Build next to the target and rename, so readers never see a partial store.
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        with closing(sqlite3.connect(tmp_path)) as conn, conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO problems ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                ([_to_text(r.get(c)) for c in columns] for r in records),
+            )
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @classmethod
+    def from_dataset(
+        cls, path: Path, dataset_path: str, split: str = "test"
+    ) -> "ProblemStore":
+        from datasets import load_dataset
+
+        dataset = load_dataset(path=dataset_path, split=split, streaming=False)
+        wanted = [
+            c for c in [*PROBLEM_COLUMNS, *INDEX_COLUMNS] if c in dataset.column_names
+        ]
+        return cls.build(path, dataset.select_columns(wanted))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row_to_problem(row: sqlite3.Row) -> Problem:
+        data = {
+            field: row[column]
+            for column, field in PROBLEM_COLUMNS.items()
+            if row[column] is not None
+        }
+        return Problem(**data)
+
+    def get(self, instance_id: str) -> Optional[Problem]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(PROBLEM_COLUMNS)} FROM problems "
+                "WHERE instance_id = ?",
+                (instance_id,),
+            ).fetchone()
+        return self._row_to_problem(row) if row else None
+
+    def _where(
+        self, repo: Optional[str], difficulty: Optional[str]
+    ) -> tuple[str, list]:
+        clauses, params = [], []
+        if repo is not None:
+            clauses.append("repo = ?")
+            params.append(repo)
+        if difficulty is not None:
+            clauses.append("difficulty = ?")
+            params.append(difficulty)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def instance_ids(
+        self, repo: Optional[str] = None, difficulty: Optional[str] = None
+    ) -> List[str]:
+        where, params = self._where(repo, difficulty)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT instance_id FROM problems{where} ORDER BY rowid",
+                params,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def filter(
+        self, repo: Optional[str] = None, difficulty: Optional[str] = None
+    ) -> List[Problem]:
+        where, params = self._where(repo, difficulty)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(PROBLEM_COLUMNS)} FROM problems{where} "
+                "ORDER BY rowid",
+                params,
+            ).fetchall()
+        return [self._row_to_problem(row) for row in rows]
+
+
+def open_problem_store(
+    dataset_path: str, split: str = "test", path: Optional[Path] = None
+) -> ProblemStore:
+    path = path or default_store_path(dataset_path, split)
+    if path.exists():
+        return ProblemStore(path)
+    return ProblemStore.from_dataset(path, dataset_path, split)
+
+
+# EOF
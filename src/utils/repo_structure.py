@@ -1,81 +1,240 @@
 # repo_structure.py
+import hashlib
+import heapq
+import os
+import subprocess  # nosec B603
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Optional, Tuple, Union
+
+from src.utils.dir_listing import ARTIFACT_DIRS, ROOT_ARTIFACT_DIRS
+from src.utils.sqlite_cache import SqliteCache
+
+CHARS_PER_TOKEN = 4
+# Directories with more subdirectories than this are scanned in parallel.
+PARALLEL_MIN_DIRS = 8
+MAX_WORKERS = 8
+
+# A scanned tree: a file is its name, a directory is [name, [entries...]].
+Entry = Union[str, list]
+
+_trees: "OrderedDict[tuple, List[Entry]]" = OrderedDict()
+_trees_lock = threading.Lock()
+_MAX_TREES = 32
+
+
+def _count_files(entries: List[Entry]) -> int:
+    return sum(1 if isinstance(e, str) else _count_files(e[1]) for e in entries)
 
 
 class RepoStructure:
     """
     Class to generate a tree-like text representation of a repository
     with optional max depth for traversal.
+
+    Scans are cached per (commit, extensions, depth) while the checkout is
+    clean, in memory and in `store` when given, so every instance on the
+    same commit reuses them. `generate_structure(max_tokens)` fits the
+    rendering to a token budget by collapsing large directories.
     """
 
     def __init__(
-        self, repo_path: Path, file_ext: List[str], max_depth: Optional[int] = 1
+        self,
+        repo_path: Path,
+        file_ext: List[str],
+        max_depth: Optional[int] = 1,
+        store: Optional[SqliteCache] = None,
     ):
         self.repo_path = repo_path
         self.file_ext = file_ext
         self.max_depth = max_depth
+        self.store = store
 
-    def generate_structure(self) -> Tuple[str, List[Path]]:
-        """
-        Generate the tree-like representation of the repository.
-
-        Returns:
-            Tuple[str, List[Path]]: Formatted repository structure and list of included file paths.
-        """
-        return self._generate_structure_recursive(self.repo_path, depth=0)
-
-    def _generate_structure_recursive(
-        self, current_path: Path, prefix: str = "", depth: int = 0
+    def generate_structure(
+        self, max_tokens: Optional[int] = None
     ) -> Tuple[str, List[Path]]:
         """
-        Recursively generates the tree-like structure of the repository.
+        Generate the tree-like representation of the repository.
 
         Args:
-            current_path (Path): Current directory path being traversed.
-            prefix (str): Prefix for indentation.
-            depth (int): Current depth of recursion.
+            max_tokens (Optional[int]): Budget of the rendering. Directories
+                that do not fit are shown collapsed, e.g. `tests/ (412 files)`.
 
         Returns:
-            Tuple[str, List[Path]]: Tree-like structure and list of included file paths.
+            Tuple[str, List[Path]]: Formatted repository structure and list of included file paths.
         """
-        structure = []
-        files = []
-
-        if self.max_depth is not None and depth > self.max_depth:
-            return "", []
-
+        tree = self._tree()
+        files: List[Path] = []
+        self._collect_files(tree, Path(), files)
+        if max_tokens is None:
+            expanded = None
+        else:
+            expanded = self._fit(tree, max_tokens * CHARS_PER_TOKEN)
+        lines: List[str] = []
+        self._render(tree, "", (), expanded, lines)
+        return "\n".join(lines), files
+
+    # ---- scanning ----
+
+    def _cache_key(self) -> Optional[tuple]:
+        """(commit, extensions, depth) of a clean git checkout, else None."""
         try:
-            entries = sorted(current_path.iterdir(), key=lambda p: p.name)
-
-            for idx, entry in enumerate(entries):
-                if entry.name.startswith("."):
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+            status = subprocess.run(
+                ["git", "status", "--porcelain"],
+                cwd=self.repo_path,
+                capture_output=True,
+                check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        if status.strip():
+            return None  # uncommitted changes: the commit does not describe the tree
+        return commit, tuple(sorted(self.file_ext)), self.max_depth
+
+    def _tree(self) -> List[Entry]:
+        key = self._cache_key()
+        if key is None:
+            return self._scan_root()
+        with _trees_lock:
+            if key in _trees:
+                _trees.move_to_end(key)
+                return _trees[key]
+
+        store_key = "tree:" + hashlib.sha256(repr(key).encode()).hexdigest()
+        tree = self.store.get(store_key) if self.store is not None else None
+        if tree is None:
+            tree = self._scan_root()
+            if self.store is not None:
+                self.store.put(store_key, tree)
+
+        with _trees_lock:
+            _trees[key] = tree
+            if len(_trees) > _MAX_TREES:
+                _trees.popitem(last=False)
+        return tree
+
+    def _scan_root(self) -> List[Entry]:
+        entries, subdirs = self._scan_dir(Path(self.repo_path), 0)
+        if len(subdirs) > PARALLEL_MIN_DIRS:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                scanned = pool.map(lambda d: self._scan(d[1], 1), subdirs)
+                for (entry, _), children in zip(subdirs, scanned):
+                    entry[1] = children
+        else:
+            for entry, path in subdirs:
+                entry[1] = self._scan(path, 1)
+        return entries
+
+    def _scan(self, path: str, depth: int) -> List[Entry]:
+        entries, subdirs = self._scan_dir(path, depth)
+        for entry, subdir in subdirs:
+            entry[1] = self._scan(subdir, depth + 1)
+        return entries
+
+    def _scan_dir(self, path, depth: int) -> Tuple[List[Entry], List[tuple]]:
+        """Sorted entries of one directory, and its subdirectories to descend."""
+        if self.max_depth is not None and depth > self.max_depth:
+            return [], []
+        entries: List[Entry] = []
+        subdirs = []
+        with os.scandir(path) as scan:
+            for item in sorted(scan, key=lambda e: e.name):
+                name = item.name
+                if name.startswith("."):
                     continue
-
-                relative_path = entry.relative_to(self.repo_path)
-
-                if entry.is_dir() or entry.suffix in self.file_ext:
-                    connector = "├── " if idx < len(entries) - 1 else "└── "
-                    structure.append(f"{prefix}{connector}{entry.name}")
-
-                    if entry.is_file() and entry.suffix in self.file_ext:
-                        files.append(relative_path)
-
-                    if entry.is_dir():
-                        subtree_str, subtree_files = self._generate_structure_recursive(
-                            entry,
-                            prefix + ("│   " if idx < len(entries) - 1 else "    "),
-                            depth=depth + 1,
-                        )
-                        if subtree_str:
-                            structure.append(subtree_str)
-                        files.extend(subtree_files)
-
-        except Exception as e:
-            structure.append(f"{prefix}Error reading directory: {e}")
-            raise
-
-        return "\n".join(structure), files
+                if item.is_dir():
+                    if name in ARTIFACT_DIRS or (
+                        depth == 0 and name in ROOT_ARTIFACT_DIRS
+                    ):
+                        continue
+                    entry = [name, []]
+                    entries.append(entry)
+                    if not item.is_symlink():
+                        subdirs.append((entry, item.path))
+                elif os.path.splitext(name)[1] in self.file_ext:
+                    entries.append(name)
+        return entries, subdirs
+
+    # ---- rendering ----
+
+    def _collect_files(self, entries: List[Entry], prefix: Path, files: List[Path]):
+        for entry in entries:
+            if isinstance(entry, str):
+                files.append(prefix / entry)
+            else:
+                self._collect_files(entry[1], prefix / entry[0], files)
+
+    @staticmethod
+    def _line_cost(depth: int, entry: Entry) -> int:
+        # Connector (4 chars per level), name and newline; a collapsed
+        # directory also pays for its " (N files)" suffix.
+        if isinstance(entry, str):
+            return 4 * (depth + 1) + len(entry) + 1
+        return 4 * (depth + 1) + len(entry[0]) + 16
+
+    def _fit(self, tree: List[Entry], budget: int) -> set:
+        """
+        Paths (as name tuples) of the directories to expand. Directories are
+        expanded shallowest and cheapest first while the budget allows.
+        """
+        budget -= sum(self._line_cost(0, e) for e in tree)
+        expanded = set()
+        heap = []
+
+        def push(entries: List[Entry], parent: tuple):
+            for entry in entries:
+                if isinstance(entry, list) and entry[1]:
+                    depth = len(parent) + 1
+                    cost = sum(self._line_cost(depth, e) for e in entry[1])
+                    heapq.heappush(heap, (depth, cost, parent + (entry[0],), entry))
+
+        push(tree, ())
+        while heap:
+            _, cost, path, entry = heapq.heappop(heap)
+            if cost <= budget:
+                budget -= cost
+                expanded.add(path)
+                push(entry[1], path)
+        return expanded
+
+    def _render(
+        self,
+        entries: List[Entry],
+        prefix: str,
+        parent: tuple,
+        expanded: Optional[set],
+        lines: List[str],
+    ):
+        for idx, entry in enumerate(entries):
+            last = idx == len(entries) - 1
+            connector = "└── " if last else "├── "
+            if isinstance(entry, str):
+                lines.append(f"{prefix}{connector}{entry}")
+                continue
+            name, children = entry
+            path = parent + (name,)
+            if expanded is None or path in expanded or not children:
+                lines.append(f"{prefix}{connector}{name}")
+                self._render(
+                    children,
+                    prefix + ("    " if last else "│   "),
+                    path,
+                    expanded,
+                    lines,
+                )
+            else:
+                count = _count_files(children)
+                suffix = f"/ ({count} files)" if count else "/"
+                lines.append(f"{prefix}{connector}{name}{suffix}")
 
 
 # EOF
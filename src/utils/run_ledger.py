@@ -0,0 +1,134 @@
+# run_ledger.py
+import hashlib
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional, Set
+
+from src.models.enums import INSTANCE_STATUS
+from src.models.instance_result import InstanceResult
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    patch_hash TEXT,
+    resolved INTEGER NOT NULL DEFAULT 0,
+    localization_score_file REAL,
+    localization_score_line REAL,
+    error TEXT,
+    started_at REAL,
+    finished_at REAL,
+    duration_seconds REAL,
+    result_json TEXT
+)
+"""
+
+
+def hash_patch(patch: str) -> str:
+    return hashlib.sha256(patch.encode("utf-8")).hexdigest()
+
+
+class RunLedger:
+    """
+    Durable per-instance record of a batch run, stored as SQLite in WAL mode.
+
+    Lets a restarted sweep skip instances that already finished and rebuild
+    the accuracy report without recomputing anything.
+    """
+
+    COMPLETED = (INSTANCE_STATUS.RESOLVED, INSTANCE_STATUS.UNRESOLVED)
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the ledger safe to use from pool threads.
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def mark_running(self, instance_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO instances (instance_id, status, started_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(instance_id) DO UPDATE SET
+                    status = excluded.status,
+                    started_at = excluded.started_at,
+                    finished_at = NULL,
+                    error = NULL
+                """,
+                (instance_id, INSTANCE_STATUS.RUNNING.value, time.time()),
+            )
+
+    def record(self, result: InstanceResult):
+        report = result.evaluation_report or {}
+        finished_at = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO instances (
+                    instance_id, status, patch_hash, resolved,
+                    localization_score_file, localization_score_line, error,
+                    started_at, finished_at, duration_seconds, result_json
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(instance_id) DO UPDATE SET
+                    status = excluded.status,
+                    patch_hash = excluded.patch_hash,
+                    resolved = excluded.resolved,
+                    localization_score_file = excluded.localization_score_file,
+                    localization_score_line = excluded.localization_score_line,
+                    error = excluded.error,
+                    started_at = COALESCE(instances.started_at, excluded.started_at),
+                    finished_at = excluded.finished_at,
+                    duration_seconds = excluded.duration_seconds,
+                    result_json = excluded.result_json
+                """,
+                (
+                    result.instance_id,
+                    result.status.value,
+                    hash_patch(result.patch) if result.patch else None,
+                    int(result.resolved),
+                    report.get("localization_score_file"),
+                    report.get("localization_score_line"),
+                    result.error,
+                    finished_at - result.duration_seconds,
+                    finished_at,
+                    result.duration_seconds,
+                    result.model_dump_json(),
+                ),
+            )
+
+    def status(self, instance_id: str) -> Optional[INSTANCE_STATUS]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT status FROM instances WHERE instance_id = ?", (instance_id,)
+            ).fetchone()
+        return INSTANCE_STATUS(row[0]) if row else None
+
+    def completed_ids(self) -> Set[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT instance_id FROM instances WHERE status IN (?, ?)",
+                tuple(s.value for s in self.COMPLETED),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def completed_results(self) -> List[InstanceResult]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT result_json FROM instances WHERE status IN (?, ?) "
+                "ORDER BY finished_at",
+                tuple(s.value for s in self.COMPLETED),
+            ).fetchall()
+        return [InstanceResult.model_validate_json(row[0]) for row in rows]
+
+
+# EOF
@@ -0,0 +1,259 @@
+# shell_session.py
+import atexit
+import os
+import selectors
+import shlex
+import signal
+import subprocess  # nosec B603
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from time import monotonic
+from typing import Dict, Optional
+
+
+class BoundedBuffer:
+    """
+    Keeps the first and last `limit // 2` bytes of a stream and drops the
+    middle as it arrives, while counting total bytes and lines.
+    """
+
+    def __init__(self, limit: int):
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total_bytes = 0
+        self.total_lines = 0
+
+    def write(self, data: bytes):
+        self.total_bytes += len(data)
+        self.total_lines += data.count(b"\n")
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail += data
+        # Trim lazily so each byte is copied O(1) times on average.
+        if len(self.tail) > 2 * self.tail_limit:
+            del self.tail[: len(self.tail) - self.tail_limit]
+
+    @property
+    def elided_bytes(self) -> int:
+        return max(0, self.total_bytes - self.head_limit - self.tail_limit)
+
+    def getvalue(self) -> bytes:
+        tail = self.tail[-self.tail_limit :] if self.tail_limit else b""
+        if not self.elided_bytes:
+            return bytes(self.head + tail)
+        return (
+            bytes(self.head)
+            + f"\n... [{self.elided_bytes} bytes elided] ...\n".encode()
+            + bytes(tail)
+        )
+
+
+class _StreamCapture:
+    """Feeds a pipe into a BoundedBuffer until the sentinel `end` shows up."""
+
+    def __init__(self, end: bytes, limit: int):
+        self.end = end
+        self.buffer = BoundedBuffer(limit)
+        self.pending = b""
+        self.trailer: Optional[bytes] = None
+
+    @property
+    def found(self) -> bool:
+        return self.trailer is not None
+
+    def feed(self, chunk: bytes):
+        if self.found:
+            self.trailer += chunk
+            return
+        data = self.pending + chunk
+        position = data.find(self.end)
+        if position >= 0:
+            self.buffer.write(data[:position])
+            self.trailer, self.pending = data[position + len(self.end) :], b""
+            return
+        # Hold back a possible partial sentinel until the next chunk.
+        keep = len(self.end) - 1
+        self.buffer.write(data[:-keep])
+        self.pending = data[-keep:]
+
+    def flush(self):
+        if not self.found:
+            self.buffer.write(self.pending)
+            self.pending = b""
+
+
+@dataclass
+class ShellResult:
+    stdout: str
+    stderr: str
+    exit_code: int
+    cwd: str
+    timed_out: bool = False
+    restarted: bool = False
+    stdout_bytes: int = 0
+    stdout_lines: int = 0
+    stderr_bytes: int = 0
+    stderr_lines: int = 0
+    elided_bytes: int = 0
+
+
+class ShellSession:
+    """
+    Long-lived bash process driven over pipes.
+
+    Each command is `eval`-ed in the same shell, so `cd`, `export` and
+    `source venv/bin/activate` persist between calls. Completion is detected
+    by a per-command sentinel echoed on both streams together with the exit
+    code and working directory. Bash runs in its own process group, which is
+    killed as a whole on timeout or close, taking background jobs with it.
+
+    Output is read incrementally into bounded head+tail buffers, so a runaway
+    command costs at most `output_limit` bytes per stream.
+    """
+
+    def __init__(self, cwd: Path):
+        self.cwd = str(cwd)
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        env = {**os.environ, "PAGER": "cat", "GIT_PAGER": "cat", "TERM": "dumb"}
+        self._process = subprocess.Popen(
+            ["bash", "--noprofile", "--norc"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd,
+            env=env,
+            start_new_session=True,
+        )
+
+    def _kill(self):
+        if self._process is None:
+            return
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stdout, self._process.stderr):
+            stream.close()
+        self._process = None
+
+    def run(
+        self, command: str, timeout: float = 30, output_limit: int = 1024 * 1024
+    ) -> ShellResult:
+        with self._lock:
+            restarted = self._process is not None and not self.alive
+            if not self.alive:
+                self._kill()
+                self._start()
+
+            marker = f"__SWE_SHELL_DONE_{uuid.uuid4().hex}__"
+            script = (
+                f"eval {shlex.quote(command)} < /dev/null\n"
+                f'printf \'\\n{marker} %s %s\\n\' "$?" "$PWD"\n'
+                f"printf '\\n{marker}\\n' >&2\n"
+            )
+            self._process.stdin.write(script.encode("utf-8"))
+            self._process.stdin.flush()
+
+            out = _StreamCapture(f"\n{marker} ".encode(), output_limit)
+            err = _StreamCapture(f"\n{marker}\n".encode(), output_limit)
+            status = self._read_until(out, err, timeout)
+
+            exit_code = -1
+            if status == "done":
+                code, _, cwd = out.trailer.decode("utf-8").rstrip("\n").partition(" ")
+                exit_code, self.cwd = int(code), cwd
+            else:
+                out.flush()
+                err.flush()
+                self._kill()
+
+            return ShellResult(
+                stdout=out.buffer.getvalue().decode("utf-8", errors="ignore"),
+                stderr=err.buffer.getvalue().decode("utf-8", errors="ignore"),
+                exit_code=exit_code,
+                cwd=self.cwd,
+                timed_out=status == "timeout",
+                restarted=restarted,
+                stdout_bytes=out.buffer.total_bytes,
+                stdout_lines=out.buffer.total_lines,
+                stderr_bytes=err.buffer.total_bytes,
+                stderr_lines=err.buffer.total_lines,
+                elided_bytes=out.buffer.elided_bytes + err.buffer.elided_bytes,
+            )
+
+    def _read_until(
+        self, out: _StreamCapture, err: _StreamCapture, timeout: float
+    ) -> str:
+        """
+        Pumps both pipes until each carried its sentinel. Returns "done",
+        "timeout", or "exited" when bash went away first.
+        """
+        deadline = monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._process.stdout, selectors.EVENT_READ, out)
+            selector.register(self._process.stderr, selectors.EVENT_READ, err)
+            # The stdout sentinel is followed by "<exit code> <cwd>\n".
+            while not (out.found and b"\n" in out.trailer and err.found):
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return "timeout"
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        return "exited"
+                    key.data.feed(chunk)
+                    if key.data is err and err.found:
+                        selector.unregister(key.fileobj)
+        return "done"
+
+    def close(self):
+        with self._lock:
+            self._kill()
+
+
+_sessions: Dict[str, ShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_shell_session(repo_path: Path) -> ShellSession:
+    """Returns the shell session of a repository, starting it at the repo root."""
+    key = str(Path(repo_path).resolve())
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = ShellSession(Path(key))
+        return _sessions[key]
+
+
+def close_shell_sessions(repo_path: Optional[Path] = None):
+    """Kills the session of `repo_path`, or every session when omitted."""
+    with _sessions_lock:
+        if repo_path is None:
+            sessions = list(_sessions.values())
+            _sessions.clear()
+        else:
+            session = _sessions.pop(str(Path(repo_path).resolve()), None)
+            sessions = [session] if session else []
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_shell_sessions)
+
+
+# EOF
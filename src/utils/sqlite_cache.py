@@ -0,0 +1,119 @@
+# sqlite_cache.py
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+"""
+# Keys per statement, below SQLite's bound-parameter limit.
+_BATCH = 500
+
+
+class SqliteCache:
+    """
+    Persistent key/value cache of JSON values, zlib-compressed in SQLite.
+
+    Runs in WAL mode with a connection per call, so worker processes can read
+    and write concurrently. Once the stored bytes exceed `max_bytes`, least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: Any):
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._evict(conn)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values of the stored `keys`, read in one transaction."""
+        keys = list(keys)
+        found = {}
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(keys), _BATCH):
+                chunk = keys[i : i + _BATCH]
+                marks = ",".join("?" * len(chunk))
+                select = f"SELECT key, value FROM entries WHERE key IN ({marks})"
+                touch = f"UPDATE entries SET last_access = ? WHERE key IN ({marks})"
+                rows = conn.execute(select, chunk).fetchall()
+                conn.execute(touch, (time.time(), *chunk))
+                found.update((key, json.loads(zlib.decompress(v))) for key, v in rows)
+        return found
+
+    def put_many(self, items: Dict[str, Any]):
+        """Stores every item in one transaction."""
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = zlib.compress(json.dumps(value).encode("utf-8"))
+            rows.append((key, blob, len(blob), now))
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+# EOF
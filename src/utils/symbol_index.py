@@ -0,0 +1,378 @@
+# symbol_index.py
+import ast
+import os
+import subprocess  # nosec B603
+import threading
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.utils.blob_cache import BlobCache
+from src.utils.dir_listing import ARTIFACT_DIRS
+from src.utils.tool_memo import get_tool_memo
+
+SCHEMA_VERSION = 1
+MAX_FILE_BYTES = 2 * 1024 * 1024
+# Stronger reference kinds win when a name appears twice on one line.
+_REFERENCE_RANK = {"call": 0, "import": 1, "attribute": 2, "name": 3}
+
+
+@dataclass
+class Definition:
+    path: str
+    name: str
+    qualname: str
+    kind: str
+    start: int
+    end: int
+    signature: str
+
+
+@dataclass
+class Reference:
+    path: str
+    line: int
+    kind: str
+
+
+class _Summarizer(ast.NodeVisitor):
+    def __init__(self):
+        self.scope: List[tuple] = []
+        self.definitions: List[list] = []
+        self.imports: List[list] = []
+        self.references: Dict[tuple, str] = {}
+
+    def _reference(self, name: str, line: int, kind: str):
+        known = self.references.get((name, line))
+        if known is None or _REFERENCE_RANK[kind] < _REFERENCE_RANK[known]:
+            self.references[(name, line)] = kind
+
+    def _define(self, node, kind: str, signature: str):
+        start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+        qualname = ".".join([name for name, _ in self.scope] + [node.name])
+        self.definitions.append(
+            [node.name, qualname, kind, start, node.end_lineno, signature]
+        )
+        self.scope.append((node.name, kind))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases + node.keywords]
+        self._define(node, "class", f"({', '.join(bases)})" if bases else "")
+
+    def visit_FunctionDef(self, node):
+        in_class = bool(self.scope) and self.scope[-1][1] == "class"
+        signature = f"({ast.unparse(node.args)})"
+        if node.returns is not None:
+            signature += f" -> {ast.unparse(node.returns)}"
+        self._define(node, "method" if in_class else "function", signature)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _assign_targets(self, targets: Iterable[ast.expr], node: ast.stmt):
+        if self.scope and self.scope[-1][1] != "class":
+            return  # locals are not symbols
+        for target in targets:
+            if isinstance(target, ast.Name):
+                qualname = ".".join([name for name, _ in self.scope] + [target.id])
+                self.definitions.append(
+                    [target.id, qualname, "variable", node.lineno, node.end_lineno, ""]
+                )
+
+    def visit_Assign(self, node: ast.Assign):
+        self._assign_targets(node.targets, node)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        self._assign_targets([node.target], node)
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self.imports.append([alias.name, None, alias.asname, node.lineno])
+            self._reference(alias.name.split(".")[-1], node.lineno, "import")
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self.imports.append([module, alias.name, alias.asname, node.lineno])
+            self._reference(alias.name, node.lineno, "import")
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if isinstance(func, ast.Name):
+            self._reference(func.id, func.lineno, "call")
+        elif isinstance(func, ast.Attribute):
+            self._reference(func.attr, func.end_lineno, "call")
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self._reference(node.attr, node.end_lineno, "attribute")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        self._reference(node.id, node.lineno, "name")
+
+
+def summarize(source: bytes) -> dict:
+    """
+    Symbol summary of one Python file: definitions with line spans and
+    signatures, imports, and the names it references (calls, attributes,
+    plain names), one entry per name and line. JSON-serializable.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return {"error": str(e), "definitions": [], "imports": [], "references": []}
+    summarizer = _Summarizer()
+    summarizer.visit(tree)
+    return {
+        "definitions": summarizer.definitions,
+        "imports": summarizer.imports,
+        "references": [
+            [name, line, kind]
+            for (name, line), kind in sorted(
+                summarizer.references.items(), key=lambda r: r[0][1]
+            )
+        ],
+    }
+
+
+def _summarize_blob(source: bytes) -> dict:
+    return summarize(source if len(source) <= MAX_FILE_BYTES else b"")
+
+
+def module_name(rel: str) -> str:
+    """`pkg/sub/mod.py` -> `pkg.sub.mod`, `pkg/__init__.py` -> `pkg`."""
+    parts = rel[: -len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+class SymbolIndex:
+    """
+    Definitions, imports and references of every Python file in a checkout.
+
+    The base commit is summarized blob by blob through `blobs`, so only the
+    files no earlier instance has seen, on any commit, are parsed. Files that
+    differ from the base commit (edits, new or deleted files) are parsed into
+    an overlay that is refreshed on the next query after the tools report a
+    change.
+    """
+
+    def __init__(
+        self,
+        repo_path: Path,
+        base_commit: str,
+        blobs: Optional[BlobCache] = None,
+    ):
+        self.repo_path = Path(repo_path).resolve()
+        self.base_commit = base_commit
+        self.blobs = blobs or BlobCache()
+        self._base: Optional[Dict[str, dict]] = None
+        self._overlay: Dict[str, Optional[dict]] = {}
+        self._definers: Dict[str, Set[str]] = {}
+        self._referrers: Dict[str, Set[str]] = {}
+        self._dirty: Set[str] = set()
+        self._stale = True
+        self._lock = threading.RLock()
+
+    # ---- maintenance ----
+
+    def invalidate(self, paths: Optional[Iterable[Path]] = None):
+        """Marks `paths` for re-parsing, or the whole overlay when None."""
+        with self._lock:
+            if paths is None:
+                self._stale = True
+                return
+            for path in paths:
+                try:
+                    rel = Path(path).resolve().relative_to(self.repo_path).as_posix()
+                except ValueError:
+                    continue
+                if rel.endswith(".py"):
+                    self._dirty.add(rel)
+
+    def _git_paths(self, *args: str) -> Optional[List[str]]:
+        try:
+            out = subprocess.run(
+                ["git", *args, "-z"],
+                cwd=self.repo_path,
+                capture_output=True,
+                check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return [p for p in out.decode().split("\0") if p.endswith(".py")]
+
+    def _changed_files(self) -> Set[str]:
+        """Python files whose working copy differs from the base commit."""
+        changed = self._git_paths("diff", "--name-only", self.base_commit) or []
+        untracked = self._git_paths("ls-files", "-o", "--exclude-standard") or []
+        return set(changed) | set(untracked)
+
+    def _parse_file(self, rel: str) -> Optional[dict]:
+        path = self.repo_path / rel
+        try:
+            if path.stat().st_size > MAX_FILE_BYTES:
+                return summarize(b"")
+            return summarize(path.read_bytes())
+        except OSError:
+            return None  # deleted
+
+    def _build_base(self) -> Dict[str, dict]:
+        base = self.blobs.analyze_tree(
+            self.repo_path,
+            self.base_commit,
+            f"symbols.v{SCHEMA_VERSION}",
+            _summarize_blob,
+        )
+        return base if base is not None else self._build_untracked()
+
+    def _build_untracked(self) -> Dict[str, dict]:
+        """Fallback outside git: index the working tree as the base."""
+        base = {}
+        for root, dirs, names in os.walk(self.repo_path):
+            dirs[:] = [
+                d for d in dirs if d not in ARTIFACT_DIRS and not d.startswith(".")
+            ]
+            rel_root = Path(root).relative_to(self.repo_path)
+            for name in names:
+                if name.endswith(".py"):
+                    rel = (rel_root / name).as_posix()
+                    base[rel] = self._parse_file(rel) or summarize(b"")
+        return base
+
+    def _load_base(self):
+        self._base = self._build_base()
+        for rel, summary in self._base.items():
+            self._link(rel, summary)
+
+    def _refresh(self):
+        if self._base is None:
+            self._load_base()
+        stale, dirty = self._stale, self._dirty
+        self._stale, self._dirty = False, set()
+        if stale:
+            for rel, summary in self._overlay.items():
+                self._unlink(rel, summary)
+                self._link(rel, self._base.get(rel))
+            self._overlay.clear()
+            dirty |= self._changed_files()
+        for rel in dirty:
+            self._set_overlay(rel, self._parse_file(rel))
+
+    def _set_overlay(self, rel: str, summary: Optional[dict]):
+        self._unlink(rel, self._current(rel))
+        self._overlay[rel] = summary
+        self._link(rel, summary)
+
+    def _current(self, rel: str) -> Optional[dict]:
+        if rel in self._overlay:
+            return self._overlay[rel]
+        return self._base.get(rel)
+
+    def _link(self, rel: str, summary: Optional[dict]):
+        if not summary:
+            return
+        for definition in summary["definitions"]:
+            self._definers.setdefault(definition[0], set()).add(rel)
+        for name, _, _ in summary["references"]:
+            self._referrers.setdefault(name, set()).add(rel)
+
+    def _unlink(self, rel: str, summary: Optional[dict]):
+        if not summary:
+            return
+        for definition in summary["definitions"]:
+            self._definers.get(definition[0], set()).discard(rel)
+        for name, _, _ in summary["references"]:
+            self._referrers.get(name, set()).discard(rel)
+
+    # ---- queries ----
+
+    def find_definition(self, symbol: str) -> List[Definition]:
+        """
+        Definitions of `symbol`: a plain name, a qualified name such as
+        `Class.method`, or a dotted module path such as `pkg.mod.Class`.
+        """
+        name = symbol.split(".")[-1]
+        found = []
+        with self._lock:
+            self._refresh()
+            for rel in sorted(self._definers.get(name, ())):
+                summary = self._current(rel)
+                if not summary:
+                    continue
+                module = module_name(rel)
+                for d_name, qualname, kind, start, end, signature in summary[
+                    "definitions"
+                ]:
+                    if d_name != name:
+                        continue
+                    full = f"{module}.{qualname}"
+                    if "." in symbol and not (
+                        full == symbol or full.endswith(f".{symbol}")
+                    ):
+                        continue
+                    found.append(
+                        Definition(rel, d_name, qualname, kind, start, end, signature)
+                    )
+        # Classes and functions before the variables that share their name.
+        found.sort(key=lambda d: (d.kind == "variable", d.path, d.start))
+        return found
+
+    def find_references(self, symbol: str) -> List[Reference]:
+        """Every line that imports, calls or otherwise names `symbol`'s last part."""
+        name = symbol.split(".")[-1]
+        found = []
+        with self._lock:
+            self._refresh()
+            for rel in sorted(self._referrers.get(name, ())):
+                summary = self._current(rel)
+                for r_name, line, kind in summary["references"] if summary else ():
+                    if r_name == name:
+                        found.append(Reference(rel, line, kind))
+        return found
+
+    def outline(self, rel: str) -> Optional[dict]:
+        """Summary of one repo-relative file, or None if it is not indexed."""
+        with self._lock:
+            self._refresh()
+            if rel not in self._overlay and rel not in self._base:
+                # A file never reported by the tools, e.g. created by a script.
+                self._set_overlay(rel, self._parse_file(rel))
+            return self._current(rel)
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(
+    repo_path: Path,
+    base_commit: str,
+    blobs: Optional[BlobCache] = None,
+) -> SymbolIndex:
+    """
+    Returns the symbol index of `repo_path`, loaded on first query and kept
+    current through the repository's tool memo.
+    """
+    key = str(Path(repo_path).resolve())
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SymbolIndex(Path(key), base_commit, blobs)
+            get_tool_memo(Path(key)).subscribe(_indexes[key].invalidate)
+        return _indexes[key]
+
+
+def drop_symbol_index(repo_path: Path):
+    with _indexes_lock:
+        _indexes.pop(str(Path(repo_path).resolve()), None)
+
+
+# EOF
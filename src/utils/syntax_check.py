@@ -0,0 +1,59 @@
+# syntax_check.py
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+PYTHON_SUFFIXES = (".py", ".pyi")
+MAX_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class SyntaxProblem:
+    path: str
+    line: int
+    column: int
+    message: str
+    snippet: str
+
+    def __str__(self) -> str:
+        text = f"{self.path}:{self.line}:{self.column}: {self.message}"
+        if self.snippet:
+            text += f"\n    {self.snippet}\n    {' ' * max(self.column - 1, 0)}^"
+        return text
+
+
+def check_source(path: str, text: str) -> Optional[SyntaxProblem]:
+    """
+    Compiles `text` as the module at `path`. This catches what `ast.parse`
+    does plus the errors only raised during compilation, such as `return`
+    outside a function or a misplaced `nonlocal`.
+    """
+    try:
+        compile(text, path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        line = e.lineno or 0
+        snippet = ""
+        if 0 < line <= len(text.splitlines()):
+            snippet = text.splitlines()[line - 1].rstrip()
+        elif e.text:
+            snippet = e.text.rstrip()
+        return SyntaxProblem(
+            path, line, e.offset or 0, f"{type(e).__name__}: {e.msg}", snippet
+        )
+    except ValueError as e:  # e.g. null bytes in the source
+        return SyntaxProblem(path, 0, 0, f"ValueError: {e}", "")
+    return None
+
+
+def check_syntax(texts: Dict[str, str]) -> List[SyntaxProblem]:
+    """Syntax errors of the Python files among `texts`, by path."""
+    paths = sorted(p for p in texts if p.endswith(PYTHON_SUFFIXES))
+    if len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(paths))) as pool:
+            results = list(pool.map(lambda p: check_source(p, texts[p]), paths))
+    else:
+        results = [check_source(p, texts[p]) for p in paths]
+    return [problem for problem in results if problem is not None]
+
+
+# EOF
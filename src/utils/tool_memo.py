@@ -0,0 +1,219 @@
+# tool_memo.py
+import re
+import shlex
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+READ_ONLY_COMMANDS = {
+    "basename",
+    "cat",
+    "cut",
+    "diff",
+    "dirname",
+    "du",
+    "echo",
+    "egrep",
+    "fgrep",
+    "file",
+    "find",
+    "grep",
+    "head",
+    "ls",
+    "nl",
+    "pwd",
+    "realpath",
+    "rg",
+    "sed",
+    "stat",
+    "tail",
+    "tree",
+    "uniq",
+    "wc",
+    "which",
+}
+READ_ONLY_GIT = {
+    "blame",
+    "cat-file",
+    "describe",
+    "diff",
+    "grep",
+    "log",
+    "ls-files",
+    "rev-parse",
+    "shortlog",
+    "show",
+    "status",
+}
+# Change shell state but not the repository: never memoized, never invalidate.
+SESSION_COMMANDS = {"cd", "pushd", "popd", "export", "unset", "source", "."}
+FIND_ACTIONS = {
+    "-exec",
+    "-execdir",
+    "-ok",
+    "-okdir",
+    "-delete",
+    "-fprint",
+    "-fprint0",
+    "-fprintf",
+    "-fls",
+}
+# uniq options that take a value, e.g. `uniq -f 1 in out`.
+UNIQ_VALUE_OPTIONS = {"-f", "-s", "-w"}
+SED_PRINT = re.compile(r"^(\d+|\$)(,(\d+|\$))?p$")
+
+READ, SESSION, WRITE = "read", "session", "write"
+
+
+def _classify_segment(words: list[str]) -> str:
+    if not words:
+        return READ
+    name, args = words[0], words[1:]
+    if "=" in name:
+        return SESSION if not args else WRITE
+    if name in SESSION_COMMANDS:
+        return SESSION
+    if name not in READ_ONLY_COMMANDS and name != "git":
+        return WRITE
+    if name == "git":
+        # `git diff --output=<file>` (log and show too) writes the diff out.
+        if any(a == "--output" or a.startswith("--output=") for a in args):
+            return WRITE
+        return READ if args and args[0] in READ_ONLY_GIT else WRITE
+    if name == "find" and FIND_ACTIONS & set(args):
+        return WRITE
+    if name == "tree" and any(a.startswith("-o") for a in args):
+        return WRITE
+    if name == "uniq":
+        # `uniq INPUT OUTPUT` writes OUTPUT.
+        operands, skip = [], False
+        for a in args:
+            if skip:
+                skip = False
+            elif a in UNIQ_VALUE_OPTIONS:
+                skip = True
+            elif not a.startswith("-") or a == "-":
+                operands.append(a)
+        if len(operands) > 1 and operands[1] != "-":
+            return WRITE
+    if name == "sed":
+        flags = [a for a in args if a.startswith("-")]
+        scripts = [a for a in args if not a.startswith("-")][:1]
+        if flags != ["-n"] or not all(SED_PRINT.match(s) for s in scripts):
+            return WRITE
+    return READ
+
+
+def classify_command(command: str) -> str:
+    """
+    Classifies a shell command as READ (safe to memoize), SESSION (changes
+    only the shell's cwd/env) or WRITE (may change the repository). Anything
+    not recognized is conservatively a WRITE.
+    """
+    if any(s in command for s in ("$(", "`", "<(", ">(")):
+        return WRITE
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        return WRITE
+
+    kinds, words = [], []
+    tokens = iter([*tokens, ";"])
+    for token in tokens:
+        if token in ("|", "||", "&&", ";"):
+            kinds.append(_classify_segment(words))
+            words = []
+        elif token in ("<", ">", ">&"):
+            target = next(tokens, "")
+            if words and words[-1].isdigit():
+                words.pop()  # file descriptor of e.g. `2>&1`
+            if token != "<" and target not in ("/dev/null", "1", "2"):
+                return WRITE
+        elif set(token) & set("<>&"):
+            return WRITE
+        else:
+            words.append(token)
+
+    if WRITE in kinds:
+        return WRITE
+    if SESSION in kinds or "$" in command:
+        return SESSION
+    return READ
+
+
+class ToolMemo:
+    """
+    Memo of read-only tool results for one repository.
+
+    Entries are valid for the current repository generation only; any write
+    through a tool, or any shell command that may mutate the tree, bumps the
+    generation and drops them. Bounded to `max_entries` (least recently used
+    first). Subscribers (e.g. the code index) hear about every bump, with the
+    changed paths when the writer knows them.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._subscribers: List[Callable[[Optional[List[Path]]], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, result: str, generation: int):
+        """Stores `result` unless the tree changed since `generation` was read."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump(self, paths: Optional[Iterable[Path]] = None):
+        """Starts a new generation; `paths` are the files changed, if known."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            subscribers = list(self._subscribers)
+        changed = None if paths is None else list(paths)
+        for subscriber in subscribers:
+            subscriber(changed)
+
+    def subscribe(self, callback: Callable[[Optional[List[Path]]], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+
+_memos: Dict[str, ToolMemo] = {}
+_memos_lock = threading.Lock()
+
+
+def get_tool_memo(repo_path: Path) -> ToolMemo:
+    """Returns the memo shared by every tool working on `repo_path`."""
+    key = str(Path(repo_path).resolve())
+    with _memos_lock:
+        if key not in _memos:
+            _memos[key] = ToolMemo()
+        return _memos[key]
+
+
+def drop_tool_memo(repo_path: Path):
+    with _memos_lock:
+        _memos.pop(str(Path(repo_path).resolve()), None)
+
+
+# EOF
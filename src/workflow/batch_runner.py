@@ -0,0 +1,240 @@
+# batch_runner.py
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from src.config.config_agent import ConfigAgent
+from src.models.enums import INSTANCE_STATUS
+from src.models.instance_result import InstanceResult
+from src.models.problem import Problem
+from src.utils.run_ledger import RunLedger
+from src.workflow.evaluation_queue import (
+    EvaluationClient,
+    EvaluationQueue,
+    set_evaluation_client,
+)
+
+
+def run_instance(
+    problem: Problem, root_path: Path, root_output: Path, config_agent: ConfigAgent
+) -> InstanceResult:
+    """
+    Runs the patch graph for one instance and never raises, so a crashing
+    instance is reported as an ERROR result instead of aborting the batch.
+    """
+    # Imported here so worker processes only pay for the graph stack when they use it.
+    from src.lang_graph.graph_runner import run_patch_graph
+    from src.models.environment import Environment
+
+    start = perf_counter()
+    environment = None
+    try:
+        environment = Environment(
+            problem=problem, root_output=root_output, root_path=root_path
+        )
+        result = run_patch_graph(
+            problem=problem, environment=environment, config_agent=config_agent
+        )
+        report = result.get("evaluation_report", {}) or {}
+        resolved = bool(report.get("resolved", False))
+        return InstanceResult(
+            instance_id=problem.instance_id,
+            status=(
+                INSTANCE_STATUS.RESOLVED if resolved else INSTANCE_STATUS.UNRESOLVED
+            ),
+            resolved=resolved,
+            patch=result.get("patch", "") or "",
+            duration_seconds=perf_counter() - start,
+            evaluation_report=report,
+        )
+    except Exception as e:
+        logging.getLogger("rich").exception(
+            f"[Batch] ❌ {problem.instance_id} crashed: {e}"
+        )
+        return InstanceResult(
+            instance_id=problem.instance_id,
+            status=INSTANCE_STATUS.ERROR,
+            error=f"{type(e).__name__}: {e}",
+            duration_seconds=perf_counter() - start,
+        )
+    finally:
+        if environment is not None:
+            environment.close()
+
+
+class AccuracyReport:
+    """Running tally of instance results, updated as instances finish."""
+
+    def __init__(self):
+        self.results: List[InstanceResult] = []
+
+    def add(self, result: InstanceResult):
+        self.results.append(result)
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    @property
+    def resolved(self) -> int:
+        return sum(int(r.resolved) for r in self.results)
+
+    @property
+    def errors(self) -> int:
+        return sum(int(r.status == INSTANCE_STATUS.ERROR) for r in self.results)
+
+    @property
+    def accuracy(self) -> float:
+        return self.resolved / self.total if self.total else 0.0
+
+    def format_line(self, result: InstanceResult) -> str:
+        status_icon = "✅" if result.resolved else "❌"
+        suffix = f" ({result.error})" if result.error else ""
+        return (
+            f"{status_icon} {result.instance_id} - Resolved: {result.resolved}{suffix}"
+            f" [{self.resolved}/{self.total} = {self.accuracy:.2%}]"
+        )
+
+    def print_summary(self):
+        print("\n🔢 Accuracy Report")
+        print(f"Resolved: {self.resolved}/{self.total}")
+        print(f"Errors: {self.errors}")
+        print(f"Accuracy: {self.accuracy:.2%}")
+
+
+class BatchRunner:
+    """
+    Runs many SWE-bench instances across a pool of worker processes.
+
+    Every instance runs in a fresh process (own Environment, log file and
+    output directory), so one crashing instance never takes the batch down.
+    Results are streamed into an AccuracyReport, appended to `results.jsonl`
+    under `root_output` and, when given, recorded in a RunLedger as they
+    complete. With `batch_evaluation`, workers share one EvaluationQueue so
+    SWE-bench evaluations of concurrent instances run in a single harness call.
+    """
+
+    def __init__(
+        self,
+        root_path: Path,
+        root_output: Path,
+        config_agent: ConfigAgent,
+        max_workers: int = 1,
+        worker: Callable[..., InstanceResult] = run_instance,
+        ledger: Optional[RunLedger] = None,
+        batch_evaluation: bool = False,
+    ):
+        self.root_path = root_path
+        self.root_output = root_output
+        self.config_agent = config_agent
+        self.max_workers = max(1, max_workers)
+        self.worker = worker
+        self.ledger = ledger
+        self.batch_evaluation = batch_evaluation
+        self._active = 0
+        self._active_lock = threading.Lock()
+        self.results_path = root_output / "results.jsonl"
+        self.logger = logging.getLogger("rich")
+
+    def run(
+        self,
+        problems: List[Problem],
+        report: Optional[AccuracyReport] = None,
+        on_result: Optional[Callable[[InstanceResult], None]] = None,
+    ) -> AccuracyReport:
+        report = report or AccuracyReport()
+
+        def _collect(result: InstanceResult):
+            report.add(result)
+            if self.ledger:
+                self.ledger.record(result)
+            with self.results_path.open("a", encoding="utf-8") as f:
+                f.write(result.model_dump_json() + "\n")
+            print(report.format_line(result))
+            if on_result:
+                on_result(result)
+
+        if self.max_workers == 1:
+            for problem in problems:
+                _collect(self._call_worker(problem))
+            return report
+
+        eval_queue = None
+        if self.batch_evaluation:
+            eval_queue = EvaluationQueue(
+                work_dir=self.root_output / "evaluation",
+                max_workers=self.config_agent.evaluation_max_workers,
+                batch_size=self.config_agent.evaluation_batch_size,
+                max_wait_seconds=self.config_agent.evaluation_batch_wait_seconds,
+                active_count=lambda: self._active,
+            )
+            eval_queue.start()
+
+        # Each instance gets a dedicated single-process pool, driven from a thread,
+        # so a hard worker crash is attributed to exactly that instance.
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as threads:
+                futures = [
+                    threads.submit(
+                        self._run_isolated,
+                        problem,
+                        eval_queue.client() if eval_queue else None,
+                    )
+                    for problem in problems
+                ]
+                for future in as_completed(futures):
+                    _collect(future.result())
+        finally:
+            if eval_queue:
+                eval_queue.close()
+
+        return report
+
+    def _call_worker(self, problem: Problem) -> InstanceResult:
+        if self.ledger:
+            self.ledger.mark_running(problem.instance_id)
+        return self.worker(problem, self.root_path, self.root_output, self.config_agent)
+
+    def _run_isolated(
+        self, problem: Problem, eval_client: Optional[EvaluationClient]
+    ) -> InstanceResult:
+        if self.ledger:
+            self.ledger.mark_running(problem.instance_id)
+        with self._active_lock:
+            self._active += 1
+        try:
+            # Spawn, not fork: the parent is multi-threaded (pool and HTTP threads).
+            with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=set_evaluation_client,
+                initargs=(eval_client,),
+            ) as pool:
+                return pool.submit(
+                    self.worker,
+                    problem,
+                    self.root_path,
+                    self.root_output,
+                    self.config_agent,
+                ).result()
+        except BrokenProcessPool:
+            error = "Worker process died unexpectedly."
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            with self._active_lock:
+                self._active -= 1
+        self.logger.error(f"[Batch] ❌ {problem.instance_id} failed: {error}")
+        return InstanceResult(
+            instance_id=problem.instance_id,
+            status=INSTANCE_STATUS.ERROR,
+            error=error,
+        )
+
+
+# EOF
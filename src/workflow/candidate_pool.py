@@ -0,0 +1,163 @@
+# candidate_pool.py
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from src.config.config_agent import ConfigAgent
+from src.lang_graph.patch_state import PatchState
+from src.models.enums import RESULT
+from src.models.environment import Environment
+from src.models.problem import Problem
+from src.tools.patch_validator_tool import PatchValidatorTool
+from src.utils.io_utils import reset_worktree
+from src.workflow.local_test_runner import LocalTestRunner
+from src.workflow.patch_generator_lg import PatchGeneratorLG
+
+
+class CandidateSlot:
+    """One candidate's environment, sampling config, generator and validator."""
+
+    def __init__(
+        self,
+        index: int,
+        problem: Problem,
+        environment: Environment,
+        config_agent: ConfigAgent,
+    ):
+        self.index = index
+        self.environment = environment
+        self.config_agent = config_agent
+        self.generator = PatchGeneratorLG(problem, environment, config_agent)
+        self.validator = PatchValidatorTool(problem, environment, config_agent)
+
+    @property
+    def temperature(self) -> float:
+        return self.config_agent.config_model.temperature
+
+
+class CandidatePool:
+    """
+    Generates `num_patches` candidate patches concurrently, each by its own
+    agent in its own worktree at base_commit, and validates them in parallel.
+
+    Candidate i samples at the configured temperature plus
+    i * `candidate_temperature_step`, so the runs explore different fixes
+    instead of repeating one another.
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        environment: Environment,
+        config_agent: ConfigAgent,
+    ):
+        self.problem = problem
+        self.environment = environment
+        self.config_agent = config_agent
+        self.logger = environment.logger
+        self.size = config_agent.num_patches
+        self._slots: Dict[int, CandidateSlot] = {}
+
+    def slot(self, index: int) -> CandidateSlot:
+        """The candidate's slot, its worktree reset to base_commit."""
+        environment = self.environment.candidate(index)
+        if index not in self._slots:
+            config_model = self.config_agent.config_model
+            temperature = min(
+                config_model.temperature
+                + index * self.config_agent.candidate_temperature_step,
+                2.0,
+            )
+            config_agent = self.config_agent.model_copy(
+                update={
+                    "config_model": config_model.model_copy(
+                        update={"temperature": temperature}
+                    )
+                }
+            )
+            self._slots[index] = CandidateSlot(
+                index, self.problem, environment, config_agent
+            )
+        return self._slots[index]
+
+    def generate(self, state: PatchState) -> List[Dict]:
+        """One candidate dict per slot: index, temperature, patch and error."""
+        # Worktrees are set up serially: they share the repo's git metadata.
+        slots = [self.slot(index) for index in range(self.size)]
+        with ThreadPoolExecutor(max_workers=self.size) as pool:
+            return list(pool.map(lambda s: self._generate(s, state), slots))
+
+    def _generate(self, slot: CandidateSlot, state: PatchState) -> Dict:
+        candidate = {
+            "index": slot.index,
+            "temperature": slot.temperature,
+            "patch": "",
+            "generation_err_msg": "",
+        }
+        try:
+            candidate["patch"] = slot.generator.generate_patch(state)
+        except Exception as e:
+            self.logger.error(f"[Candidates] ❌ Candidate {slot.index} failed: {e}")
+            candidate["generation_err_msg"] = f"{type(e).__name__}: {e}"
+        return candidate
+
+    def validate(self, candidates: List[Dict]) -> List[Dict]:
+        """The candidates with their validation result and cleaned patch."""
+        with ThreadPoolExecutor(max_workers=max(len(candidates), 1)) as pool:
+            return list(pool.map(self._validate, candidates))
+
+    def _validate(self, candidate: Dict) -> Dict:
+        if not candidate["patch"].strip():
+            return {
+                **candidate,
+                "validation_result": RESULT.ERROR,
+                "validation_err_msg": candidate["generation_err_msg"] or "Empty patch.",
+            }
+        slot = self._slots[candidate["index"]]
+        # The agent's edits are in the patch; validate it against base_commit.
+        reset_worktree(slot.environment.repo_path, self.problem.base_commit)
+        try:
+            result = json.loads(slot.validator.forward(candidate["patch"]))
+        except json.JSONDecodeError as e:
+            result = {"status": "ERROR", "error_message": f"Invalid JSON: {e}"}
+        if result.get("status") == "PASSED":
+            cleaned_patch = result.get("cleaned_patch", candidate["patch"])
+            return {
+                **candidate,
+                "patch": cleaned_patch,
+                "lint_clean": cleaned_patch == candidate["patch"],
+                "validation_result": RESULT.PASSED,
+                "validation_err_msg": "",
+            }
+        return {
+            **candidate,
+            "validation_result": RESULT.ERROR,
+            "validation_err_msg": result.get("error_message", "Unknown error"),
+        }
+
+    def test(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        The candidates, those that passed validation with a `local_test`
+        report (see LocalTestRunner.run), tested in parallel in their worktrees.
+        """
+        with ThreadPoolExecutor(max_workers=max(len(candidates), 1)) as pool:
+            return list(pool.map(self._test, candidates))
+
+    def _test(self, candidate: Dict) -> Dict:
+        if candidate.get("validation_result") != RESULT.PASSED:
+            return candidate
+        slot = self._slots[candidate["index"]]
+        runner = LocalTestRunner(self.problem, slot.environment, slot.config_agent)
+        try:
+            report = runner.run(candidate["patch"])
+        except Exception as e:
+            self.logger.warning(
+                f"[Candidates] ⚠️ Local tests of candidate {slot.index} crashed: {e}"
+            )
+            report = {"status": "SKIPPED", "feedback": f"Local tests crashed: {e}"}
+        # The full pytest log stays out of the graph state.
+        report.pop("log", None)
+        return {**candidate, "local_test": report}
+
+
+# EOF
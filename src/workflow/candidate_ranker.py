@@ -0,0 +1,128 @@
+# candidate_ranker.py
+import re
+from typing import Dict, List, Set, Tuple
+
+from src.models.enums import RESULT
+from src.utils.patch_model import parse_patch
+
+# Relative weight of each signal; every signal is scored in [0, 1].
+WEIGHTS = {
+    "tests": 4.0,
+    "agreement": 2.0,
+    "files": 1.0,
+    "lint": 0.5,
+    "size": 0.5,
+}
+# Unknown local test outcome (tests skipped or not run): neither good nor bad.
+UNKNOWN_TESTS_SCORE = 0.5
+
+_PATH_MENTION = re.compile(r"[\w./-]+\.pyi?\b")
+_MODULE_MENTION = re.compile(r"\b[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+\b")
+
+
+def mentioned_paths(problem_statement: str) -> Set[str]:
+    """
+    Path fragments named in the problem statement: file paths as written
+    (`django/db/models/query.py`) and dotted names as paths
+    (`sklearn.linear_model` → `sklearn/linear_model`).
+    """
+    paths = {m.strip("./") for m in _PATH_MENTION.findall(problem_statement)}
+    for name in _MODULE_MENTION.findall(problem_statement):
+        if not name.endswith((".py", ".pyi")):
+            paths.add(name.replace(".", "/"))
+    return {p for p in paths if p}
+
+
+def _names_file(path: str, mentioned: Set[str]) -> bool:
+    stem = path.rsplit(".", 1)[0]
+    for fragment in mentioned:
+        if fragment.endswith((".py", ".pyi")):
+            if path == fragment or path.endswith("/" + fragment):
+                return True
+            continue
+        # A dotted name names its module, possibly followed by attributes:
+        # `query.QuerySet.filter` names `.../query.py`.
+        parts = fragment.split("/")
+        for end in range(len(parts), 0, -1):
+            module = "/".join(parts[:end])
+            if stem == module or stem.endswith("/" + module):
+                return True
+    return False
+
+
+def _changes(patch: str) -> Tuple[Set[str], Set[Tuple[str, str, str]]]:
+    """Touched files and the (path, tag, stripped text) of every changed line."""
+    files, lines = set(), set()
+    for file_patch in parse_patch(patch).files:
+        files.add(file_patch.path)
+        for hunk in file_patch.hunks:
+            for tag, text in hunk.lines:
+                if tag in "+-" and text.strip():
+                    lines.add((file_patch.path, tag, text.strip()))
+    return files, lines
+
+
+def _tests_score(candidate: Dict) -> float:
+    report = candidate.get("local_test") or {}
+    status = report.get("status")
+    if status == "PASSED":
+        return 1.0
+    if status == "ERROR":
+        ran = len(report.get("passed", [])) + len(report.get("failed", []))
+        return len(report.get("passed", [])) / ran if ran else 0.0
+    return UNKNOWN_TESTS_SCORE
+
+
+def score_candidates(candidates: List[Dict], problem_statement: str) -> List[Dict]:
+    """
+    Score breakdowns of the candidates that passed validation, best first:
+    {"index", "total", "tests", "agreement", "files", "lint", "size"}.
+
+    - tests: share of the local targeted tests that pass.
+    - agreement: mean overlap (Jaccard) of changed lines with the other
+      candidates; independent runs converging on a fix is evidence for it.
+    - files: share of touched files named in the problem statement.
+    - lint: 1 when ruff had nothing to fix.
+    - size: smallest patch's changed lines over this patch's.
+    """
+    valid = [c for c in candidates if c.get("validation_result") == RESULT.PASSED]
+    changes = {c["index"]: _changes(c["patch"]) for c in valid}
+    mentioned = mentioned_paths(problem_statement)
+    sizes = {index: max(len(lines), 1) for index, (_, lines) in changes.items()}
+    smallest = min(sizes.values(), default=1)
+
+    scores = []
+    for candidate in valid:
+        index = candidate["index"]
+        files, lines = changes[index]
+        others = [changes[c["index"]][1] for c in valid if c["index"] != index]
+        agreement = (
+            sum(len(lines & o) / max(len(lines | o), 1) for o in others) / len(others)
+            if others
+            else 0.0
+        )
+        breakdown = {
+            "tests": _tests_score(candidate),
+            "agreement": agreement,
+            "files": (
+                sum(_names_file(f, mentioned) for f in files) / len(files)
+                if files and mentioned
+                else 0.0
+            ),
+            "lint": 1.0 if candidate.get("lint_clean") else 0.0,
+            "size": smallest / sizes[index],
+        }
+        total = sum(WEIGHTS[name] * value for name, value in breakdown.items())
+        scores.append(
+            {
+                "index": index,
+                "total": round(total, 4),
+                **{k: round(v, 4) for k, v in breakdown.items()},
+            }
+        )
+    # Ties go to the lower index, i.e. the lower sampling temperature.
+    scores.sort(key=lambda s: (-s["total"], s["index"]))
+    return scores
+
+
+# EOF
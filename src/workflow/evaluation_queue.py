@@ -0,0 +1,399 @@
+# evaluation_queue.py
+import json
+import logging
+import multiprocessing
+import queue
+import subprocess  # nosec B603
+import threading
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from time import monotonic
+from typing import Callable, List, Optional
+
+from swebench.harness.grading import get_eval_report, get_logs_eval
+from swebench.harness.test_spec.test_spec import TestSpec
+
+from src.models.problem import Problem
+from src.utils.evaluation_cache import EvaluationCache
+
+SWE_BENCH_DATASET = "princeton-nlp/SWE-bench_Verified"
+SWE_BENCH_SPLIT = "test"
+MAX_HARNESS_OUTPUT_CHARS = 5_000
+
+
+def make_evaluation_request(
+    problem: Problem, patch: str, model_name: str, swebench_path: Path
+) -> dict:
+    return {
+        "problem": problem,
+        "swebench_path": swebench_path,
+        "prediction": {
+            "instance_id": problem.instance_id,
+            "model_patch": patch,
+            "model_name_or_path": model_name,
+        },
+    }
+
+
+def run_harness(
+    predictions: List[dict],
+    run_id: str,
+    swebench_path: Path,
+    work_dir: Path,
+    max_workers: int,
+    logger: logging.Logger,
+) -> tuple[dict, str, str]:
+    """Runs the SWE-bench harness once over all predictions and returns its summary."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    predictions_path = work_dir / f"{run_id}.predictions.json"
+    predictions_path.write_text(json.dumps(predictions, indent=2))
+    instance_ids = [p["instance_id"] for p in predictions]
+
+    logger.info(
+        f"[Evaluator] 📊 Running SWE-bench on {len(instance_ids)} instance(s) "
+        f"(run_id={run_id}, workers={max_workers})"
+    )
+    try:
+        completed = subprocess.run(
+            [
+                "python",
+                "-m",
+                "swebench.harness.run_evaluation",
+                "--predictions_path",
+                str(predictions_path),
+                "--run_id",
+                run_id,
+                "--instance_ids",
+                *instance_ids,
+                "--max_workers",
+                str(max_workers),
+                "--namespace",
+                "",
+                "--dataset_name",
+                SWE_BENCH_DATASET,
+                "--split",
+                SWE_BENCH_SPLIT,
+            ],
+            cwd=swebench_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        logger.info("[Evaluator] ✅ Evaluation subprocess completed.")
+        logger.debug(f"🔧 STDOUT:\n{completed.stdout.strip()}")
+        logger.debug(f"🛑 STDERR:\n{completed.stderr.strip()}")
+    except subprocess.CalledProcessError as e:
+        logger.error(f"[Evaluator] ❌ SWE-bench failed with error code {e.returncode}")
+        logger.error(f"🔧 STDOUT:\n{e.stdout.strip()}")
+        logger.error(f"🛑 STDERR:\n{e.stderr.strip()}")
+        raise RuntimeError(f"SWE-bench subprocess failed:\n{e.stderr.strip()}") from e
+
+    model_name = predictions[0]["model_name_or_path"]
+    report_path = swebench_path / f"{model_name}.{run_id}.json"
+    if not report_path.exists():
+        raise FileNotFoundError(f"No SWE-bench summary report found: {report_path}")
+    logger.info(f"[Evaluator] 📁 Summary report saved to {report_path}")
+    return json.loads(report_path.read_text()), completed.stdout, completed.stderr
+
+
+def build_detailed_report(
+    problem: Problem,
+    prediction: dict,
+    run_id: str,
+    swebench_path: Path,
+    resolved: bool,
+) -> tuple[dict, str]:
+    """Extracts the per-test report and the evaluation log of one instance."""
+    instance_id = problem.instance_id
+    model_name = prediction["model_name_or_path"]
+    test_spec = TestSpec(
+        instance_id=instance_id,
+        repo=problem.repo,
+        version=problem.version,
+        FAIL_TO_PASS=problem.fail_to_pass,
+        PASS_TO_PASS=problem.pass_to_pass,
+        repo_script_list=[],
+        eval_script_list=[],
+        env_script_list=[],
+        arch="amd64",
+        language="python",
+        docker_specs={},
+        namespace="",
+    )
+    log_path = (
+        swebench_path
+        / "logs"
+        / "run_evaluation"
+        / run_id
+        / model_name
+        / instance_id
+        / "run_instance.log"
+    )
+    logs, _ = get_logs_eval(test_spec, str(log_path))
+    log_output = logs.get(instance_id, "")
+
+    report_map = get_eval_report(
+        test_spec=test_spec,
+        prediction=prediction,
+        test_log_path=str(log_path),
+        include_tests_status=True,
+    )
+    instance_report = report_map.get(instance_id, {})
+    instance_report["resolved"] = resolved
+    return instance_report, log_output
+
+
+def _instance_summary(summary: dict, instance_id: str) -> dict:
+    """Restricts the id lists of a batch summary to a single instance."""
+    return {
+        key: (
+            [i for i in value if i == instance_id] if isinstance(value, list) else value
+        )
+        for key, value in summary.items()
+    }
+
+
+def evaluate_predictions(
+    requests: List[dict],
+    work_dir: Path,
+    max_workers: int,
+    logger: Optional[logging.Logger] = None,
+) -> List[dict]:
+    """
+    Evaluates many predictions with one harness run per (swebench_path, model).
+    Repeated instance ids (e.g. several candidates) go to separate runs.
+
+    Returns results aligned with `requests`, each with `run_id`, `status`,
+    `summary` (the run summary restricted to that instance), `report`
+    (detailed test report), `log`, `stdout` and `stderr`; requests whose run
+    failed map to `{"error": ...}`.
+    """
+    logger = logger or logging.getLogger("rich")
+    groups = defaultdict(list)
+    seen = defaultdict(int)
+    for index, request in enumerate(requests):
+        instance_id = request["problem"].instance_id
+        model_name = request["prediction"]["model_name_or_path"]
+        key = (str(request["swebench_path"]), model_name, seen[instance_id])
+        seen[instance_id] += 1
+        groups[key].append(index)
+
+    results: List[dict] = [{} for _ in requests]
+    for (swebench_path, _, _), indices in groups.items():
+        group = [requests[i] for i in indices]
+        run_id = f"agent-eval-{uuid.uuid4().hex[:8]}"
+        try:
+            summary, stdout, stderr = run_harness(
+                predictions=[r["prediction"] for r in group],
+                run_id=run_id,
+                swebench_path=Path(swebench_path),
+                work_dir=work_dir,
+                max_workers=min(max_workers, len(group)),
+                logger=logger,
+            )
+        except Exception as e:
+            for index in indices:
+                results[index] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+
+        for index, request in zip(indices, group):
+            problem = request["problem"]
+            instance_id = problem.instance_id
+            resolved = instance_id in summary.get("resolved_ids", [])
+            try:
+                report, log_output = build_detailed_report(
+                    problem=problem,
+                    prediction=request["prediction"],
+                    run_id=run_id,
+                    swebench_path=Path(swebench_path),
+                    resolved=resolved,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"[Evaluator] ⚠️ No detailed report for {instance_id}: {e}"
+                )
+                report, log_output = {"resolved": resolved}, ""
+            results[index] = {
+                "run_id": run_id,
+                "status": "RESOLVED" if resolved else "UNRESOLVED",
+                "summary": _instance_summary(summary, instance_id),
+                "report": report,
+                "log": log_output,
+                "stdout": stdout[-MAX_HARNESS_OUTPUT_CHARS:],
+                "stderr": stderr[-MAX_HARNESS_OUTPUT_CHARS:],
+            }
+    return results
+
+
+class EvaluationClient:
+    """Worker-side handle: submits one request and blocks until its batch is done."""
+
+    def __init__(self, client_id: str, requests, replies, timeout: Optional[float]):
+        self.client_id = client_id
+        self.requests = requests
+        self.replies = replies
+        self.timeout = timeout
+
+    def evaluate(self, request: dict) -> dict:
+        self.requests.put((self.client_id, request))
+        try:
+            result = self.replies.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("Timed out waiting for batched SWE-bench evaluation.")
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
+
+
+class EvaluationQueue:
+    """
+    Collects evaluation requests from many graph runs (possibly in other
+    processes) and evaluates them together with a single harness invocation.
+
+    A batch is flushed when `batch_size` requests are waiting, when every
+    active graph run is waiting on evaluation, or after `max_wait_seconds`.
+    """
+
+    def __init__(
+        self,
+        work_dir: Path,
+        max_workers: int = 4,
+        batch_size: int = 8,
+        max_wait_seconds: float = 120.0,
+        active_count: Optional[Callable[[], int]] = None,
+        run_batch: Callable[..., List[dict]] = evaluate_predictions,
+        client_timeout: Optional[float] = None,
+    ):
+        self.work_dir = work_dir
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.active_count = active_count
+        self.run_batch = run_batch
+        self.client_timeout = client_timeout
+        self.logger = logging.getLogger("rich")
+        self._manager = None
+        self._requests = None
+        self._replies = {}
+        self._thread = None
+
+    def __enter__(self) -> "EvaluationQueue":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        # A manager lets queue proxies travel to spawned worker processes.
+        self._manager = multiprocessing.get_context("spawn").Manager()
+        self._requests = self._manager.Queue()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._requests.put(None)
+        self._thread.join()
+        self._manager.shutdown()
+        self._thread = None
+
+    def client(self) -> EvaluationClient:
+        client_id = uuid.uuid4().hex
+        self._replies[client_id] = self._manager.Queue()
+        return EvaluationClient(
+            client_id, self._requests, self._replies[client_id], self.client_timeout
+        )
+
+    def _should_flush(self, pending: list, first_at: float) -> bool:
+        if len(pending) >= self.batch_size:
+            return True
+        if self.active_count and len(pending) >= self.active_count():
+            return True
+        return monotonic() - first_at >= self.max_wait_seconds
+
+    def _serve(self):
+        pending = []
+        first_at = 0.0
+        while True:
+            try:
+                item = self._requests.get(timeout=1.0)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                if pending:
+                    self._flush(pending)
+                return
+            if item:
+                if not pending:
+                    first_at = monotonic()
+                pending.append(item)
+            if pending and self._should_flush(pending, first_at):
+                self._flush(pending)
+                pending = []
+
+    def _flush(self, pending: list):
+        requests = [request for _, request in pending]
+        self.logger.info(f"[EvaluationQueue] 📦 Evaluating batch of {len(requests)}")
+        try:
+            results = self.run_batch(
+                requests, self.work_dir, self.max_workers, self.logger
+            )
+        except Exception as e:
+            results = [{"error": f"{type(e).__name__}: {e}"} for _ in requests]
+        for (client_id, _), result in zip(pending, results):
+            self._replies[client_id].put(result)
+
+
+_client: Optional[EvaluationClient] = None
+
+
+def set_evaluation_client(client: Optional[EvaluationClient]):
+    """Installs the batching client for this process (used as a pool initializer)."""
+    global _client
+    _client = client
+
+
+def get_evaluation_client() -> Optional[EvaluationClient]:
+    return _client
+
+
+def request_evaluation(
+    request: dict,
+    work_dir: Path,
+    logger: Optional[logging.Logger] = None,
+    cache: Optional[EvaluationCache] = None,
+    load_cache: bool = True,
+    save_cache: bool = True,
+) -> dict:
+    """
+    Evaluates one request, through the shared batch queue when one is
+    installed. Results for an already evaluated patch come from `cache`.
+    """
+    logger = logger or logging.getLogger("rich")
+    instance_id = request["problem"].instance_id
+    patch = request["prediction"]["model_patch"]
+
+    if cache and load_cache:
+        cached = cache.get(instance_id, patch)
+        if cached is not None:
+            logger.info(f"[Evaluator] ♻️ Cached evaluation reused for {instance_id}")
+            return {**cached, "cached": True}
+
+    if _client is not None:
+        result = _client.evaluate(request)
+    else:
+        result = evaluate_predictions(
+            [request], work_dir=work_dir, max_workers=1, logger=logger
+        )[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+
+    if cache and save_cache:
+        cache.put(instance_id, patch, result)
+    return result
+
+
+# EOF
@@ -0,0 +1,274 @@
+# local_test_runner.py
+import os
+import random
+import re
+import shlex
+import subprocess  # nosec B404
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.config.config_agent import ConfigAgent
+from src.models.environment import Environment
+from src.models.problem import Problem
+from src.utils.edit_journal import get_edit_journal
+from src.utils.patch_model import parse_patch
+from src.utils.tool_memo import get_tool_memo
+
+# "PASSED tests/test_x.py::test_a" and "FAILED tests/test_x.py::test_b - msg"
+# lines of pytest's `-rA` short test summary.
+SUMMARY_LINE = re.compile(
+    r"^(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS) (.+?)(?: - .*)?$"
+)
+PASSING = {"PASSED", "XPASS"}
+# Outcomes of tests that were collected and executed.
+RAN = {"PASSED", "FAILED", "XFAIL", "XPASS"}
+MAX_FEEDBACK_CHARS = 4000
+
+
+# Baseline runnable tests by (instance, base_commit, selected tests).
+_baselines: Dict[tuple, List[str]] = {}
+_baselines_lock = threading.Lock()
+
+
+def _outcomes(output: str) -> Dict[str, str]:
+    """Outcome per node id (or file, for collection errors) of a -rA summary."""
+    outcomes = {}
+    for line in output.splitlines():
+        match = SUMMARY_LINE.match(line)
+        if match:
+            outcomes[match.group(2)] = match.group(1)
+    return outcomes
+
+
+def is_pytest_node_id(test: str) -> bool:
+    """SWE-bench ids of pytest repos are node ids; others (Django, SymPy) are not."""
+    return ".py" in test.split("::")[0] and " (" not in test
+
+
+class LocalTestRunner:
+    """
+    Runs the instance's FAIL_TO_PASS tests, plus a sample of PASS_TO_PASS,
+    on the local checkout with the test patch and a candidate applied.
+
+    Minutes cheaper than a SWE-bench Docker run, it only proves a patch
+    wrong, never right: the local interpreter may differ from the harness
+    image, so only tests that run here without the candidate count (see
+    `runnable_tests`); the rest are skipped, not failed.
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        environment: Environment,
+        config_agent: ConfigAgent,
+    ):
+        self.problem = problem
+        self.environment = environment
+        self.config_agent = config_agent
+        self.logger = environment.logger
+        self.repo_path = environment.repo_path
+
+    def select_tests(self) -> List[str]:
+        fail_to_pass = [t for t in self.problem.fail_to_pass if is_pytest_node_id(t)]
+        if not fail_to_pass:
+            return []
+        pass_to_pass = [t for t in self.problem.pass_to_pass if is_pytest_node_id(t)]
+        sample_size = self.config_agent.local_test_pass_to_pass_sample
+        if len(pass_to_pass) > sample_size:
+            # Seeded by the instance, so every attempt runs the same sample.
+            pass_to_pass = random.Random(self.problem.instance_id).sample(
+                pass_to_pass, sample_size
+            )
+        return fail_to_pass + sorted(pass_to_pass)
+
+    def runnable_tests(self) -> List[str]:
+        """
+        The selected tests that run on this host: at base_commit with only
+        the test patch applied, FAIL_TO_PASS tests must be collected and
+        PASS_TO_PASS tests must pass. Whatever fails there (missing
+        dependencies, collection errors, unknown node ids) says nothing
+        about a candidate. Computed once per instance and test selection.
+        """
+        tests = self.select_tests()
+        if not tests:
+            return []
+        key = (self.problem.instance_id, self.problem.base_commit, tuple(tests))
+        with _baselines_lock:
+            if key in _baselines:
+                return _baselines[key]
+
+        runnable = []
+        try:
+            error, result = self._apply_and_run(
+                [("test patch", self.problem.test_patch)], tests
+            )
+        except subprocess.TimeoutExpired:
+            error, result = "baseline run timed out", None
+        if error is not None:
+            self.logger.warning(f"[LocalTests] ⚠️ Baseline unavailable: {error}")
+        else:
+            outcomes = _outcomes(result.stdout)
+            fail_to_pass = set(self.problem.fail_to_pass)
+            runnable = [
+                t
+                for t in tests
+                if outcomes.get(t) in (RAN if t in fail_to_pass else PASSING)
+            ]
+            self.logger.info(
+                f"[LocalTests] {len(runnable)} of {len(tests)} tests run locally"
+            )
+        with _baselines_lock:
+            _baselines[key] = runnable
+        return runnable
+
+    def run(self, patch: str) -> Dict:
+        """
+        Returns {"status": PASSED|ERROR|SKIPPED, "failed": [...],
+        "passed": [...], "feedback": str, "log": str}.
+        """
+        tests = self.runnable_tests()
+        if not set(tests) & set(self.problem.fail_to_pass):
+            return self._result(
+                "SKIPPED", feedback="No FAIL_TO_PASS test runs locally."
+            )
+
+        try:
+            error, result = self._apply_and_run(
+                [("test patch", self.problem.test_patch), ("patch", patch)], tests
+            )
+        except subprocess.TimeoutExpired:
+            return self._result(
+                "ERROR",
+                feedback=f"Tests timed out after "
+                f"{self.config_agent.local_test_timeout_seconds}s: {' '.join(tests)}",
+            )
+        if error is not None:
+            return self._result("ERROR", feedback=error)
+
+        log = result.stdout + result.stderr
+        outcomes = _outcomes(result.stdout)
+        if not outcomes:
+            # pytest itself failed (missing plugin, interpreter): the
+            # environment, not the patch, is at fault.
+            self.logger.warning(f"[LocalTests] ⚠️ No test results:\n{log[-2000:]}")
+            return self._result(
+                "SKIPPED", feedback="pytest produced no results.", log=log
+            )
+
+        # These tests ran at baseline: if one is no longer collected, the
+        # candidate broke its imports.
+        passed = [t for t in tests if outcomes.get(t) in PASSING]
+        failed = [t for t in tests if outcomes.get(t) not in PASSING]
+        if not failed:
+            return self._result("PASSED", passed=passed, log=log)
+        lines = [f"{outcomes.get(t, 'NOT RUN')} {t}" for t in failed]
+        return self._result(
+            "ERROR",
+            failed=failed,
+            passed=passed,
+            feedback="\n".join(lines) + "\n\n" + self._failure_excerpt(result.stdout),
+            log=log,
+        )
+
+    def _apply_and_run(
+        self, patches: List[Tuple[str, str]], tests: List[str]
+    ) -> Tuple[Optional[str], Optional[subprocess.CompletedProcess]]:
+        """Runs `tests` on base_commit plus the named patches, then restores it."""
+        created = [
+            f.path for _, text in patches for f in parse_patch(text).files if f.is_new
+        ]
+        try:
+            self._reset()
+            for name, text in patches:
+                error = self._git_apply(text)
+                if error is not None:
+                    return f"The {name} does not apply:\n{error}", None
+            return None, self._run_pytest(tests)
+        finally:
+            self._reset(created)
+
+    # ---- checkout ----
+
+    def _reset(self, created: Optional[List[str]] = None):
+        subprocess.run(
+            ["git", "reset", "--hard", "-q", self.problem.base_commit],
+            cwd=self.repo_path,
+            check=True,
+        )
+        for path in created or []:
+            (self.repo_path / path).unlink(missing_ok=True)
+        get_tool_memo(self.repo_path).bump()
+        get_edit_journal(self.repo_path).clear()
+
+    def _git_apply(self, patch: str) -> Optional[str]:
+        if not patch.strip() or patch == "N/A":
+            return None
+        result = subprocess.run(
+            ["git", "apply", "--whitespace=nowarn", "-"],
+            cwd=self.repo_path,
+            input=patch if patch.endswith("\n") else patch + "\n",
+            capture_output=True,
+            text=True,
+        )
+        return None if result.returncode == 0 else result.stderr.strip()
+
+    # ---- pytest ----
+
+    def _pytest(self, tests: List[str], workers: int) -> subprocess.CompletedProcess:
+        command = shlex.split(self.config_agent.local_test_command)
+        command += ["-rA", "--tb=short", "-p", "no:cacheprovider"]
+        if workers > 1:
+            command += ["-n", str(workers)]
+        return subprocess.run(
+            command + tests,
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+            timeout=self.config_agent.local_test_timeout_seconds,
+        )
+
+    def _run_pytest(self, tests: List[str]) -> subprocess.CompletedProcess:
+        workers = self.config_agent.local_test_workers or os.cpu_count() or 1
+        workers = min(workers, len(tests))
+        self.logger.info(
+            f"[LocalTests] 🧪 Running {len(tests)} tests on {workers} workers"
+        )
+        result = self._pytest(tests, workers)
+        if workers > 1 and "-n" in result.stderr and "unrecognized" in result.stderr:
+            self.logger.info("[LocalTests] pytest-xdist unavailable, running serially")
+            result = self._pytest(tests, 1)
+        return result
+
+    @staticmethod
+    def _failure_excerpt(output: str) -> str:
+        """The FAILURES/ERRORS sections of pytest's output, trimmed."""
+        markers = [output.find(m) for m in ("= FAILURES =", "= ERRORS =")]
+        markers = [i for i in markers if i >= 0]
+        if not markers:
+            return ""
+        start = output.rfind("\n", 0, min(markers)) + 1
+        end = output.find("= short test summary info =", start)
+        end = output.rfind("\n", start, end) + 1 if end >= 0 else len(output)
+        excerpt = output[start:end].strip()
+        if len(excerpt) > MAX_FEEDBACK_CHARS:
+            excerpt = excerpt[:MAX_FEEDBACK_CHARS] + "\n... (truncated)"
+        return excerpt
+
+    @staticmethod
+    def _result(
+        status: str,
+        failed: Optional[List[str]] = None,
+        passed: Optional[List[str]] = None,
+        feedback: str = "",
+        log: str = "",
+    ) -> Dict:
+        return {
+            "status": status,
+            "failed": failed or [],
+            "passed": passed or [],
+            "feedback": feedback,
+            "log": log,
+        }
+
+
+# EOF
@@ -1,14 +1,17 @@
 # patch_evaluator.py
 import difflib
-import json
 import subprocess
-import uuid
 from typing import Optional
 
 from src.config.config_agent import ConfigAgent
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.utils.edit_journal import get_edit_journal
+from src.utils.evaluation_cache import EvaluationCache
 from src.utils.localization_scores import compute_localization_scores
+from src.utils.patch_model import check_applies
+from src.utils.tool_memo import get_tool_memo
+from src.workflow.evaluation_queue import make_evaluation_request, request_evaluation
 
 
 class PatchEvaluator:
@@ -22,6 +25,10 @@ class PatchEvaluator:
         self.environment = environment
         self.config_agent = config_agent
         self.logger = environment.logger
+        self.cache = EvaluationCache(
+            environment.cache_path / "evaluation.sqlite",
+            max_bytes=config_agent.evaluation_cache_max_mb * 1024 * 1024,
+        )
 
     def evaluate(self, patch: Optional[str] = None) -> dict:
         patch = self.normalize_patch(patch)
@@ -31,6 +38,8 @@ class PatchEvaluator:
             cwd=self.environment.repo_path,
             check=True,
         )
+        get_tool_memo(self.environment.repo_path).bump()
+        get_edit_journal(self.environment.repo_path).clear()
         self.logger.info(
             f"[Evaluator] 🔁 Reset repo to base_commit: {self.problem.base_commit}"
         )
@@ -60,15 +69,8 @@ class PatchEvaluator:
         patch_path = output_path / f"{instance_id}.patch"
         patch_path.write_text(patch)
 
-        apply_check = subprocess.run(
-            ["git", "apply", "--check", str(patch_path)],
-            cwd=repo_path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-
-        if apply_check.returncode != 0:
-            error_msg = apply_check.stderr.decode()
+        error_msg = check_applies(patch, repo_path, patch_path)
+        if error_msg is not None:
             self.logger.error(f"[Evaluator] ❌ Patch failed to apply:\n{error_msg}")
             self._maybe_log_gold_patch_diff(patch)
             return {
@@ -81,73 +83,23 @@ class PatchEvaluator:
                 },
             }
 
-        # Write predictions file
-        predictions_path = output_path / f"{instance_id}.predictions.json"
-        predictions_path.write_text(
-            json.dumps(
-                [
-                    {
-                        "instance_id": instance_id,
-                        "model_patch": patch,
-                        "model_name_or_path": model_name,
-                    }
-                ],
-                indent=2,
-            )
+        request = make_evaluation_request(
+            problem=self.problem,
+            patch=patch,
+            model_name=model_name,
+            swebench_path=swebench_path,
         )
-
-        run_id = f"agent-eval-{uuid.uuid4().hex[:8]}"
-        self.logger.info(f"[Evaluator] 📊 Running SWE-bench (run_id={run_id})")
-
-        try:
-            completed = subprocess.run(
-                [
-                    "python",
-                    "-m",
-                    "swebench.harness.run_evaluation",
-                    "--predictions_path",
-                    str(predictions_path),
-                    "--run_id",
-                    run_id,
-                    "--instance_ids",
-                    instance_id,
-                    "--max_workers",
-                    "1",
-                    "--namespace",
-                    "",
-                    "--dataset_name",
-                    "princeton-nlp/SWE-bench_Verified",
-                    "--split",
-                    "test",
-                ],
-                cwd=swebench_path,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            self.logger.info("[Evaluator] ✅ Evaluation subprocess completed.")
-            self.logger.debug(f"🔧 STDOUT:\n{completed.stdout.strip()}")
-            self.logger.debug(f"🛑 STDERR:\n{completed.stderr.strip()}")
-
-        except subprocess.CalledProcessError as e:
-            self.logger.error(
-                f"[Evaluator] ❌ SWE-bench failed with error code {e.returncode}"
-            )
-            self.logger.error(f"🔧 STDOUT:\n{e.stdout.strip()}")
-            self.logger.error(f"🛑 STDERR:\n{e.stderr.strip()}")
-            raise RuntimeError(
-                f"SWE-bench subprocess failed:\n{e.stderr.strip()}"
-            ) from e
-
-        report_name = f"{model_name}.{run_id}.json"
-        report_path = swebench_path / report_name
-        if not report_path.exists():
-            raise FileNotFoundError(f"No SWE-bench summary report found: {report_path}")
-
-        summary = json.loads(report_path.read_text())
-        self.logger.info(f"[Evaluator] 📁 Summary report saved to {report_path}")
+        result = request_evaluation(
+            request,
+            work_dir=output_path,
+            logger=self.logger,
+            cache=self.cache,
+            load_cache=self.config_agent.load_cache,
+            save_cache=self.config_agent.save_cache,
+        )
+        summary = result["summary"]
         self._print_summary_diagnostics(
-            summary, patch, completed.stdout, completed.stderr
+            summary, patch, result["stdout"], result["stderr"]
         )
         # Compute localization scores
         localization_scores = compute_localization_scores(patch, self.problem.patch)
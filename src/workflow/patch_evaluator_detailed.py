@@ -1,16 +1,17 @@
 # patch_evaluator_detailed.py
 import difflib
-import json
 import subprocess
-import uuid
 from typing import Optional
 
 from src.config.config_agent import ConfigAgent
 from src.models.environment import Environment
 from src.models.problem import Problem
+from src.utils.edit_journal import get_edit_journal
+from src.utils.evaluation_cache import EvaluationCache
 from src.utils.localization_scores import compute_localization_scores
-from swebench.harness.grading import get_eval_report, get_logs_eval
-from swebench.harness.test_spec.test_spec import TestSpec
+from src.utils.patch_model import check_applies
+from src.utils.tool_memo import get_tool_memo
+from src.workflow.evaluation_queue import make_evaluation_request, request_evaluation
 
 
 class PatchEvaluatorDetailed:
@@ -24,6 +25,10 @@ class PatchEvaluatorDetailed:
         self.environment = environment
         self.config_agent = config_agent
         self.logger = environment.logger
+        self.cache = EvaluationCache(
+            environment.cache_path / "evaluation.sqlite",
+            max_bytes=config_agent.evaluation_cache_max_mb * 1024 * 1024,
+        )
 
     def evaluate(self, patch: Optional[str] = None) -> dict:
         patch = self.normalize_patch(patch)
@@ -34,6 +39,8 @@ class PatchEvaluatorDetailed:
             cwd=self.environment.repo_path,
             check=True,
         )
+        get_tool_memo(self.environment.repo_path).bump()
+        get_edit_journal(self.environment.repo_path).clear()
         self.logger.info(
             f"[Evaluator] 🔁 Reset repo to base_commit: {self.problem.base_commit}"
         )
@@ -65,14 +72,8 @@ class PatchEvaluatorDetailed:
         patch_path = output_path / f"{instance_id}.patch"
         patch_path.write_text(patch)
 
-        apply_check = subprocess.run(
-            ["git", "apply", "--check", str(patch_path)],
-            cwd=repo_path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        if apply_check.returncode != 0:
-            error_msg = apply_check.stderr.decode()
+        error_msg = check_applies(patch, repo_path, patch_path)
+        if error_msg is not None:
             self.logger.error(f"[Evaluator] ❌ Patch failed to apply:\n{error_msg}")
             self._maybe_log_gold_patch_diff(patch)
             return {
@@ -85,90 +86,25 @@ class PatchEvaluatorDetailed:
                 },
             }
 
-        # Write predictions
-        predictions_path = output_path / f"{instance_id}.predictions.json"
-        prediction = {
-            "instance_id": instance_id,
-            "model_patch": patch,
-            "model_name_or_path": model_name,
-        }
-        predictions_path.write_text(json.dumps([prediction], indent=2))
-
-        # Run evaluation
-        run_id = f"agent-eval-{uuid.uuid4().hex[:8]}"
-        self.logger.info(f"[Evaluator] 📊 Running SWE-bench (run_id={run_id})")
-
-        try:
-            subprocess.run(
-                [
-                    "python",
-                    "-m",
-                    "swebench.harness.run_evaluation",
-                    "--predictions_path",
-                    str(predictions_path),
-                    "--run_id",
-                    run_id,
-                    "--instance_ids",
-                    instance_id,
-                    "--max_workers",
-                    "1",
-                    "--namespace",
-                    "",
-                    "--dataset_name",
-                    "princeton-nlp/SWE-bench_Verified",
-                    "--split",
-                    "test",
-                ],
-                cwd=swebench_path,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"[Evaluator] ❌ SWE-bench failed:\n{e}")
-            raise
-
-        # TestSpec + log file
-        test_spec = TestSpec(
-            instance_id=instance_id,
-            repo=self.problem.repo,
-            version=self.problem.version,
-            FAIL_TO_PASS=self.problem.fail_to_pass,
-            PASS_TO_PASS=self.problem.pass_to_pass,
-            repo_script_list=[],
-            eval_script_list=[],
-            env_script_list=[],
-            arch="amd64",
-            language="python",
-            docker_specs={},
-            namespace="",
-        )
-        log_path = (
-            swebench_path
-            / "logs"
-            / "run_evaluation"
-            / run_id
-            / model_name
-            / instance_id
-            / "run_instance.log"
+        # Run evaluation (batched with other instances when a queue is installed)
+        request = make_evaluation_request(
+            problem=self.problem,
+            patch=patch,
+            model_name=model_name,
+            swebench_path=swebench_path,
         )
-        logs, _ = get_logs_eval(test_spec, str(log_path))
-        log_output = logs.get(instance_id, "")
-
-        # Read summary to determine status
-        report_name = f"{model_name}.{run_id}.json"
-        report_path = swebench_path / report_name
-        summary = json.loads(report_path.read_text())
-        resolved = instance_id in summary.get("resolved_ids", [])
-        status = "RESOLVED" if resolved else "UNRESOLVED"
-
-        # Extract detailed test report
-        report_map = get_eval_report(
-            test_spec=test_spec,
-            prediction=prediction,
-            test_log_path=str(log_path),
-            include_tests_status=True,
+        result = request_evaluation(
+            request,
+            work_dir=output_path,
+            logger=self.logger,
+            cache=self.cache,
+            load_cache=self.config_agent.load_cache,
+            save_cache=self.config_agent.save_cache,
         )
-        instance_report = report_map.get(instance_id, {})
-        instance_report["resolved"] = resolved
+        run_id = result["run_id"]
+        status = result["status"]
+        instance_report = result["report"]
+        log_output = result["log"]
 
         # Add localization scores
         localization_scores = compute_localization_scores(patch, self.problem.patch)
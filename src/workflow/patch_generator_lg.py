@@ -5,9 +5,11 @@ from src.lang_graph.patch_state import PatchState
 from src.models.environment import Environment
 from src.models.problem import Problem
 from src.tools.bash_tool import BashTool
+from src.tools.code_search_tool import CodeSearchTool
 from src.tools.edit_tool import EditorTool
 from src.tools.patch_validator_tool import PatchValidatorTool
 from src.tools.sequential_thinking_tool import SequentialThinkingTool
+from src.tools.symbol_tool import SymbolTool
 
 
 class PatchGeneratorLG:
@@ -22,6 +24,8 @@ class PatchGeneratorLG:
         self.tools = [
             BashTool(problem, environment, config_agent),
             EditorTool(problem, environment, config_agent),
+            CodeSearchTool(problem, environment, config_agent),
+            SymbolTool(problem, environment, config_agent),
             PatchValidatorTool(problem, environment, config_agent),
             SequentialThinkingTool(problem, environment, config_agent),
         ]
@@ -37,6 +41,7 @@ class PatchGeneratorLG:
         attempt = state.get("generation_attempts", 0)
         err_msg = state.get("generation_err_msg") or ""
         prev_val_err = state.get("validation_err_msg") or ""
+        prev_test_err = state.get("local_test_err_msg") or ""
         prev_eval_err = state.get("evaluation_err_msg") or ""
 
         patch_path = (
@@ -51,6 +56,7 @@ class PatchGeneratorLG:
             self.logger.info(f"[Retry] 🧠 Attempt {attempt + 1} to generate patch.")
             self.logger.info(f"[Retry] ⚠️ Previous generation error: {err_msg}")
             self.logger.info(f"[Retry] ⚠️ Previous validation error: {prev_val_err}")
+            self.logger.info(f"[Retry] ⚠️ Previous local test error: {prev_test_err}")
             self.logger.info(f"[Retry] ⚠️ Previous evaluation error: {prev_eval_err}")
 
         patch_str = self.agent.generate_patch(state)
@@ -65,6 +71,7 @@ class PatchGeneratorLG:
             query=[
                 f"generation_err: {err_msg}",
                 f"validation_err: {prev_val_err}",
+                f"local_test_err: {prev_test_err}",
                 f"evaluation_err: {prev_eval_err}",
             ],
             state=state,
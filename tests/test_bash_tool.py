@@ -4,27 +4,28 @@ from unittest.mock import MagicMock
 import pytest
 
 from src.tools.bash_tool import BashTool
+from src.utils.shell_session import close_shell_sessions
+from src.utils.tool_memo import READ, WRITE, classify_command
 
 
 @pytest.fixture
-def tool():
-    import os
-
+def tool(tmp_path):
     mock_problem = MagicMock()
     mock_environment = MagicMock()
     mock_environment.logger = MagicMock()
     mock_environment.traj_logger = MagicMock()
-    mock_environment.repo_path = "/tmp/fake-repo"
-
-    os.makedirs(mock_environment.repo_path, exist_ok=True)
+    mock_environment.repo_path = tmp_path
 
     mock_config_agent = MagicMock()
     mock_config_agent.max_tool_output_chars = 10_000
-    return BashTool(
+    mock_config_agent.bash_timeout_seconds = 30
+    mock_config_agent.bash_max_timeout_seconds = 600
+    yield BashTool(
         problem=mock_problem,
         environment=mock_environment,
         config_agent=mock_config_agent,
     )
+    close_shell_sessions()
 
 
 def test_simple_echo(tool):
@@ -43,21 +44,17 @@ def test_invalid_command(tool):
     assert "No such file or directory" in result or "not found" in result
 
 
-def test_command_timeout(tool, monkeypatch):
-    # Simulate long-running command by monkeypatching subprocess
-    import subprocess
-
-    def fake_run(*args, **kwargs):
-        raise subprocess.TimeoutExpired(cmd=args[0], timeout=kwargs.get("timeout", 30))
-
-    monkeypatch.setattr("subprocess.run", fake_run)
-    result = tool.forward(command="sleep 60")
-    assert "timed out" in result.lower()
+def test_command_timeout(tool):
+    result = tool.forward(command="sleep 60", timeout=1)
+    assert "timed out after 1 seconds" in result.lower()
+    assert "Hello" in tool.forward(command="echo Hello")
 
 
 def test_command_exception(tool, monkeypatch):
     # Simulate a generic exception
-    monkeypatch.setattr("subprocess.run", lambda *args, **kwargs: 1 / 0)
+    monkeypatch.setattr(
+        "src.utils.shell_session.ShellSession.run", lambda *args, **kwargs: 1 / 0
+    )
     result = tool.forward(command="echo test")
     assert "STDOUT:" in result
     assert "STDERR:" in result
@@ -65,4 +62,82 @@ def test_command_exception(tool, monkeypatch):
     assert "division by zero" in result
 
 
+def test_session_keeps_cwd_and_env(tool, tmp_path):
+    (tmp_path / "pkg").mkdir()
+    tool.forward(command="cd pkg && export SWE_FLAG=on")
+    result = tool.forward(command='pwd; echo "flag=$SWE_FLAG"')
+    assert str(tmp_path / "pkg") in result
+    assert "flag=on" in result
+
+
+def test_pipes_and_exit_codes(tool, tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\ny = 2\n")
+    assert "y = 2" in tool.forward(command="cat a.py | grep y")
+    tool.forward(command="false")
+    assert tool.traj_logger.log_step.call_args.kwargs["state"]["exit_code"] == 1
+
+
+def test_large_output_keeps_head_and_tail(tool):
+    result = tool.forward(command="seq 1 200000")
+    assert result.startswith("STDOUT:\n1\n2\n")
+    assert "200000" in result
+    assert "bytes elided" in result
+    assert "200000 lines" in result
+    assert len(result) <= tool.MAX_OUTPUT_CHARS + 200
+    assert tool.traj_logger.log_step.call_args.kwargs["state"]["truncated"]
+
+
+def test_read_only_commands_are_memoized_until_a_write(tool, tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\n")
+    first = tool.forward(command="cat a.py")
+    (tmp_path / "a.py").write_text("x = 2\n")  # outside any tool: not seen
+    assert tool.forward(command="cat a.py") == first
+    assert tool.traj_logger.log_step.call_args.kwargs["state"]["memoized"]
+
+    tool.forward(command="sed -i s/2/3/ a.py")
+    assert "x = 3" in tool.forward(command="cat a.py")
+
+
+@pytest.mark.parametrize(
+    "command, kind",
+    [
+        ("find . -name '*.py'", READ),
+        ("find . -fprint out.txt", WRITE),
+        ("find . -fprint0 out.txt", WRITE),
+        ("find . -fprintf out.txt %p", WRITE),
+        ("git diff HEAD~1", READ),
+        ("git diff --output=out.diff", WRITE),
+        ("git log -p --output out.diff", WRITE),
+        ("tree -L 2", READ),
+        ("tree -o out.txt", WRITE),
+        ("uniq -c in.txt", READ),
+        ("uniq -f 1 in.txt -", READ),
+        ("uniq in.txt out.txt", WRITE),
+    ],
+)
+def test_commands_writing_files_are_writes(command, kind):
+    assert classify_command(command) == kind
+
+
+def test_close_kills_process_group(tool):
+    import time
+    from pathlib import Path
+
+    pid = int(tool.forward(command="sleep 60 & echo $!").split()[1])
+    close_shell_sessions()
+    status = Path(f"/proc/{pid}/status")
+
+    def dead():
+        # Gone, or a zombie waiting to be reaped by init.
+        try:
+            return "State:\tZ" in status.read_text()
+        except FileNotFoundError:
+            return True
+
+    deadline = time.monotonic() + 5
+    while not dead() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert dead()
+
+
 # EOF
@@ -0,0 +1,73 @@
+# test_batch_runner.py
+import os
+import json
+
+import pytest
+
+from src.models.enums import INSTANCE_STATUS
+from src.models.instance_result import InstanceResult
+from src.models.problem import Problem
+from src.workflow.batch_runner import BatchRunner
+
+
+def fake_worker(problem, root_path, root_output, config_agent):
+    if problem.instance_id == "raises":
+        raise RuntimeError("boom")
+    if problem.instance_id == "dies":
+        os._exit(1)
+    return InstanceResult(
+        instance_id=problem.instance_id,
+        status=INSTANCE_STATUS.RESOLVED,
+        resolved=problem.instance_id.startswith("ok"),
+    )
+
+
+def make_problems(*ids):
+    return [
+        Problem(instance_id=i, problem_statement="", repo="a/b", base_commit="0")
+        for i in ids
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_streams_results(tmp_path, workers):
+    runner = BatchRunner(
+        root_path=tmp_path,
+        root_output=tmp_path,
+        config_agent=None,
+        max_workers=workers,
+        worker=fake_worker,
+    )
+    seen = []
+    report = runner.run(make_problems("ok-1", "ok-2", "no-3"), on_result=seen.append)
+
+    assert report.total == 3
+    assert report.resolved == 2
+    assert sorted(r.instance_id for r in seen) == ["no-3", "ok-1", "ok-2"]
+    lines = (tmp_path / "results.jsonl").read_text().splitlines()
+    assert len(lines) == 3
+    assert {json.loads(line)["instance_id"] for line in lines} == {
+        "ok-1",
+        "ok-2",
+        "no-3",
+    }
+
+
+def test_crashing_instance_does_not_kill_batch(tmp_path):
+    runner = BatchRunner(
+        root_path=tmp_path,
+        root_output=tmp_path,
+        config_agent=None,
+        max_workers=2,
+        worker=fake_worker,
+    )
+    report = runner.run(make_problems("ok-1", "raises", "dies", "ok-2"))
+
+    by_id = {r.instance_id: r for r in report.results}
+    assert set(by_id) == {"ok-1", "ok-2", "raises", "dies"}
+    assert by_id["raises"].status == INSTANCE_STATUS.ERROR
+    assert "boom" in by_id["raises"].error
+    assert by_id["dies"].status == INSTANCE_STATUS.ERROR
+
+
+# EOF
@@ -0,0 +1,86 @@
+# test_blob_cache.py
+import subprocess  # nosec B404
+
+import pytest
+
+from src.utils.blob_cache import BlobCache, list_tree_blobs, read_blobs
+from src.utils.sqlite_cache import SqliteCache
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def _commit(repo, files):
+    for name, text in files.items():
+        (repo / name).parent.mkdir(parents=True, exist_ok=True)
+        (repo / name).write_text(text)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "change")
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    return repo
+
+
+def test_list_and_read_blobs(repo):
+    commit = _commit(repo, {"a.py": "x = 1\n", "b/c.py": "y = 2\n", "d.txt": "z"})
+    blobs = list_tree_blobs(repo, commit)
+    assert sorted(blobs) == ["a.py", "b/c.py"]
+    contents = dict(read_blobs(repo, [blobs["a.py"], "0" * 40, blobs["b/c.py"]]))
+    assert contents == {blobs["a.py"]: b"x = 1\n", blobs["b/c.py"]: b"y = 2\n"}
+
+
+def test_not_a_git_checkout(tmp_path):
+    assert list_tree_blobs(tmp_path, "HEAD") is None
+    assert BlobCache().analyze_tree(tmp_path, "HEAD", "size.v1", len) is None
+
+
+def test_only_changed_blobs_are_analyzed_again(repo, tmp_path):
+    first = _commit(repo, {"a.py": "x = 1\n", "b.py": "y = 22\n"})
+    second = _commit(repo, {"b.py": "y = 333\n", "c.py": "x = 1\n"})
+    calls = []
+
+    def size(data):
+        calls.append(data)
+        return len(data)
+
+    store = SqliteCache(tmp_path / "blobs.sqlite")
+    assert BlobCache(store).analyze_tree(repo, first, "size.v1", size) == {
+        "a.py": 6,
+        "b.py": 7,
+    }
+    # A new checkout, on the next commit, only reads the new b.py blob;
+    # c.py has the same content, hence the same blob, as a.py.
+    cache = BlobCache(store)
+    assert cache.analyze_tree(repo, second, "size.v1", size) == {
+        "a.py": 6,
+        "b.py": 8,
+        "c.py": 6,
+    }
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(calls) == 3
+    # A different analysis name never reuses results.
+    assert BlobCache(store).analyze_tree(repo, second, "size.v2", size)
+    assert len(calls) == 5
+
+
+def test_sqlite_cache_batches(tmp_path):
+    store = SqliteCache(tmp_path / "cache.sqlite")
+    store.put_many({f"k{i}": {"i": i} for i in range(1200)})
+    found = store.get_many([f"k{i}" for i in range(0, 1300, 100)])
+    assert found == {f"k{i}": {"i": i} for i in range(0, 1200, 100)}
+
+
+# EOF
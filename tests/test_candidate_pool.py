@@ -0,0 +1,198 @@
+# test_candidate_pool.py
+import logging
+import subprocess  # nosec B404
+import threading
+
+import pytest
+
+from src.config.config_agent import ConfigAgent
+from src.lang_graph import evaluate_patch_node, generate_patch_node
+from src.lang_graph.generate_patch_node import make_generate_patch_node
+from src.lang_graph.local_test_node import make_local_test_router
+from src.lang_graph.select_candidates_node import make_select_candidates_node
+from src.lang_graph.validate_patch_node import (
+    make_validate_patch_node,
+    route_from_validation,
+)
+from src.models.enums import GRAPH_STATE, RESULT
+from src.models.environment import Environment
+from src.models.problem import Problem
+from src.utils.edit_journal import get_edit_journal
+from src.utils.tool_memo import get_tool_memo
+from src.utils.trajectory_logger import TrajectoryLogger
+from src.workflow import candidate_pool
+from src.workflow.candidate_pool import CandidatePool
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+class FakeGenerator:
+    """Edits its own worktree, like the agent, and returns the diff."""
+
+    barrier = None
+    broken = False
+
+    def __init__(self, problem, environment, config_agent):
+        self.environment = environment
+        self.config_agent = config_agent
+
+    def generate_patch(self, state):
+        FakeGenerator.barrier.wait(timeout=10)  # all candidates run at once
+        temperature = self.config_agent.config_model.temperature
+        if temperature > 0.5 or FakeGenerator.broken:
+            raise RuntimeError("too hot")
+        repo = self.environment.repo_path
+        body = "return x +" if temperature else "return x *"
+        (repo / "calc.py").write_text(f"def double(x):\n    {body} 2\n")
+        return _git(repo, "diff") + "\n"
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "calc.py").write_text("def double(x):\n    return x\n")
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "base")
+    problem = Problem(
+        instance_id="calc__calc-1",
+        problem_statement="double() does not double",
+        repo="calc/calc",
+        base_commit=_git(repo, "rev-parse", "HEAD"),
+    )
+    environment = Environment.model_construct(
+        instance_id=problem.instance_id,
+        root_path=tmp_path,
+        root_output=tmp_path / "out",
+        repo_path=repo,
+        output_path=tmp_path / "out" / "outputs" / problem.instance_id,
+        problem=problem,
+    )
+    monkeypatch.setattr(candidate_pool, "PatchGeneratorLG", FakeGenerator)
+    FakeGenerator.barrier = threading.Barrier(3)
+    config_agent = ConfigAgent(num_patches=3, candidate_temperature_step=0.3)
+    return CandidatePool(problem, environment, config_agent)
+
+
+def test_candidates_run_in_separate_worktrees(pool):
+    candidates = pool.generate({})
+    assert [c["temperature"] for c in candidates] == [0.0, 0.3, 0.6]
+    assert "+    return x * 2" in candidates[0]["patch"]
+    assert "+    return x + 2" in candidates[1]["patch"]
+    assert candidates[2]["generation_err_msg"] == "RuntimeError: too hot"
+    # The shared checkout is untouched; every candidate has its own.
+    assert (pool.environment.repo_path / "calc.py").read_text().endswith("x\n")
+    paths = {pool.slot(i).environment.repo_path for i in range(3)}
+    assert len(paths) == 3 and pool.environment.repo_path not in paths
+
+    validated = pool.validate(candidates)
+    assert [c["validation_result"] for c in validated] == [
+        RESULT.PASSED,
+        RESULT.PASSED,
+        RESULT.ERROR,
+    ]
+    assert validated[2]["validation_err_msg"] == "RuntimeError: too hot"
+
+
+def test_selection_forwards_the_best_candidates(pool):
+    pool.config_agent = pool.config_agent.model_copy(
+        update={"candidates_forwarded": 2, "local_tests_enabled": True}
+    )
+    node = make_select_candidates_node(
+        pool.problem, pool.environment, pool.config_agent, pool
+    )
+    candidates = pool.validate(pool.generate({}))
+    state = node.invoke({"candidates": candidates})
+
+    # No runnable tests: both valid candidates are forwarded, scored.
+    assert [c.get("local_test", {}).get("status") for c in state["candidates"]] == [
+        "SKIPPED",
+        "SKIPPED",
+        None,
+    ]
+    assert [s["index"] for s in state["candidate_scores"]] == [0, 1]
+    assert state["selected_patches"] == [c["patch"] for c in candidates[:2]]
+    assert state["patch"] == candidates[0]["patch"]
+    assert state["local_test_result"] == RESULT.PASSED
+
+
+def test_failed_generation_goes_back_through_validation(pool, monkeypatch):
+    monkeypatch.setattr(generate_patch_node, "PatchGeneratorLG", FakeGenerator)
+    monkeypatch.setattr(FakeGenerator, "broken", True)
+    pool.environment._traj_logger = TrajectoryLogger()
+    node = make_generate_patch_node(
+        pool.problem, pool.environment, pool.config_agent, pool
+    )
+    state = node.invoke({})
+    assert state["patch"] == "" and state["generation_result"] == RESULT.ERROR
+    assert state["generation_err_msg"].count("RuntimeError: too hot") == 3
+
+    state = make_validate_patch_node(
+        pool.problem, pool.environment, pool.config_agent, pool
+    ).invoke(state)
+    assert state["validation_result"] == RESULT.ERROR
+    assert route_from_validation(state) == GRAPH_STATE.GENERATE_PATCH
+
+
+def test_selection_without_candidates_uses_the_single_patch(pool):
+    node = make_select_candidates_node(
+        pool.problem, pool.environment, pool.config_agent, pool
+    )
+    state = node.invoke({"patch": "gold", "selected_patches": ["stale"]})
+    assert state["selected_patches"] == [] and state["patch"] == "gold"
+    route = make_local_test_router(pool.config_agent)
+    assert route(state) == GRAPH_STATE.EVALUATE_PATCH
+
+
+def test_unresolved_evaluation_keeps_the_top_candidate(pool, monkeypatch):
+    tried = []
+
+    class FakeEvaluator:
+        def __init__(self, *args):
+            pass
+
+        def evaluate(self, patch):
+            tried.append(patch)
+            return {"evaluation": {"resolved_ids": []}}
+
+    monkeypatch.setattr(evaluate_patch_node, "PatchEvaluator", FakeEvaluator)
+    node = evaluate_patch_node.make_evaluate_patch_node(
+        pool.problem, pool.environment, pool.config_agent
+    )
+    state = node.invoke({"patch": "best", "selected_patches": ["best", "second"]})
+    assert tried == ["best", "second"]
+    assert state["patch"] == "best"
+    assert state["evaluation_result"] == RESULT.ERROR
+
+
+def test_worktrees_are_reset_for_each_attempt_and_removed(pool):
+    pool.generate({})
+    worktree = pool.environment._candidates[0].repo_path
+    assert (worktree / "calc.py").read_text().endswith("x * 2\n")
+
+    memo = get_tool_memo(worktree)
+    memo.put(("cat", "calc.py"), "return x * 2", memo.generation)
+    journal = get_edit_journal(worktree)
+    journal.record(worktree / "calc.py", 0, b"", b"abc")
+
+    assert pool.slot(0).environment.repo_path == worktree
+    assert (worktree / "calc.py").read_text().endswith("x\n")
+    # Nothing remembered about the discarded edits survives the reset.
+    assert memo.get(("cat", "calc.py")) is None
+    assert journal.depth(worktree / "calc.py") == 0
+
+    pool.environment._file_handler = logging.NullHandler()
+    pool.environment.close()
+    assert not worktree.exists()
+
+
+# EOF
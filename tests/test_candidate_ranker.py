@@ -0,0 +1,62 @@
+# test_candidate_ranker.py
+from src.models.enums import RESULT
+from src.workflow.candidate_ranker import mentioned_paths, score_candidates
+
+STATEMENT = "Calling `pkg.calc.double` in pkg/calc.py returns the wrong value."
+
+
+def _patch(path: str, *added: str) -> str:
+    lines = "".join(f"+{line}\n" for line in added)
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -1,1 +1,{len(added) + 1} @@\n def double(x):\n{lines}"
+    )
+
+
+def _candidate(index, patch, tests=None, lint_clean=True, result=RESULT.PASSED):
+    return {
+        "index": index,
+        "patch": patch,
+        "validation_result": result,
+        "lint_clean": lint_clean,
+        "local_test": tests,
+    }
+
+
+def test_mentioned_paths():
+    assert mentioned_paths(STATEMENT) >= {"pkg/calc/double", "pkg/calc.py"}
+
+
+def test_scores_rank_tests_then_agreement_files_and_size():
+    fix = "    return x * 2"
+    candidates = [
+        _candidate(0, _patch("pkg/other.py", fix), lint_clean=False),
+        _candidate(1, _patch("pkg/calc.py", fix)),
+        _candidate(2, _patch("pkg/calc.py", fix, "    # doubled", "    pass")),
+        _candidate(
+            3,
+            _patch("pkg/calc.py", "    return 2"),
+            tests={"status": "ERROR", "passed": ["a"], "failed": ["b", "c"]},
+        ),
+        _candidate(4, "", result=RESULT.ERROR),
+    ]
+    scores = score_candidates(candidates, STATEMENT)
+
+    # 3 fails most of its tests but, unlike 0, edits the file the issue names.
+    assert [s["index"] for s in scores] == [1, 2, 3, 0]
+    best = scores[0]
+    assert (best["tests"], best["files"], best["lint"], best["size"]) == (
+        0.5,
+        1.0,
+        1.0,
+        1.0,
+    )
+    by_index = {s["index"]: s for s in scores}
+    assert by_index[0]["files"] == 0.0 and by_index[0]["lint"] == 0.0
+    assert by_index[2]["size"] == round(1 / 3, 4)
+    assert by_index[3]["tests"] == round(1 / 3, 4) and by_index[3]["agreement"] == 0
+    # 1 and 2 agree on the fix; 2 loses on size.
+    assert by_index[1]["agreement"] == by_index[2]["agreement"] > 0
+
+
+# EOF
@@ -0,0 +1,111 @@
+# test_clone_repo.py
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from src.utils.io_utils import clone_repo
+
+
+def git(*args, cwd: Path) -> str:
+    return subprocess.check_output(["git", *args], cwd=cwd, text=True).strip()
+
+
+def commit_file(repo: Path, name: str, text: str) -> str:
+    (repo / name).write_text(text)
+    git("add", name, cwd=repo)
+    git(
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-q",
+        "-m",
+        name,
+        cwd=repo,
+    )
+    return git("rev-parse", "HEAD", cwd=repo)
+
+
+@pytest.fixture(autouse=True)
+def mirror_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SWE_MIRROR_CACHE", str(tmp_path / "mirrors"))
+    return tmp_path / "mirrors"
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = tmp_path / "origin"
+    repo.mkdir()
+    git("init", "-q", cwd=repo)
+    return repo
+
+
+def test_worktrees_share_one_mirror(tmp_path, origin, mirror_cache):
+    first = commit_file(origin, "a.py", "x = 1\n")
+    second = commit_file(origin, "a.py", "x = 2\n")
+    url = origin.as_uri()
+    target = tmp_path / "out" / "repos"
+
+    path_a = clone_repo("inst-a", "org/name", first, target, remote_url=url)
+    path_b = clone_repo("inst-b", "org/name", second, target, remote_url=url)
+
+    mirrors = list(mirror_cache.glob("*.git"))
+    assert [m.name for m in mirrors] == ["org__name.git"]
+    assert (path_a / "a.py").read_text() == "x = 1\n"
+    assert (path_b / "a.py").read_text() == "x = 2\n"
+    assert git("rev-parse", "HEAD", cwd=path_a) == first
+
+    # Already at the right commit: reused as-is.
+    assert clone_repo("inst-a", "org/name", first, target, remote_url=url) == path_a
+
+
+def test_mirror_fetches_new_commits_incrementally(tmp_path, origin):
+    first = commit_file(origin, "a.py", "x = 1\n")
+    url = origin.as_uri()
+    target = tmp_path / "out" / "repos"
+    clone_repo("inst-a", "org/name", first, target, remote_url=url)
+
+    newer = commit_file(origin, "b.py", "y = 1\n")
+    path = clone_repo("inst-b", "org/name", newer, target, remote_url=url)
+    assert (path / "b.py").exists()
+
+    # Re-checkout of an existing worktree at a different commit.
+    path = clone_repo("inst-a", "org/name", newer, target, remote_url=url)
+    assert git("rev-parse", "HEAD", cwd=path) == newer
+
+
+def test_mirror_skips_pull_request_refs(tmp_path, origin, mirror_cache):
+    first = commit_file(origin, "a.py", "x = 1\n")
+    git("update-ref", "refs/pull/1/head", first, cwd=origin)
+    git("tag", "v1", cwd=origin)
+    url = origin.as_uri()
+    target = tmp_path / "out" / "repos"
+    clone_repo("inst-a", "org/name", first, target, remote_url=url)
+
+    newer = commit_file(origin, "b.py", "y = 1\n")
+    git("update-ref", "refs/pull/2/head", newer, cwd=origin)
+    git("tag", "v2", cwd=origin)
+    clone_repo("inst-b", "org/name", newer, target, remote_url=url)
+
+    refs = git(
+        "for-each-ref", "--format=%(refname)", cwd=mirror_cache / "org__name.git"
+    )
+    assert "refs/tags/v2" in refs.splitlines()
+    assert "refs/pull" not in refs
+
+
+def test_unknown_commit_raises(tmp_path, origin):
+    commit_file(origin, "a.py", "x = 1\n")
+    with pytest.raises(RuntimeError):
+        clone_repo(
+            "inst-a",
+            "org/name",
+            "0" * 40,
+            tmp_path / "out" / "repos",
+            remote_url=origin.as_uri(),
+        )
+
+
+# EOF
@@ -0,0 +1,109 @@
+# test_code_search_tool.py
+import subprocess  # nosec B404
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.tools.code_search_tool import CodeSearchTool
+from src.tools.edit_tool import EditorTool
+from src.utils.code_index import drop_code_index, required_literals
+from src.utils.tool_memo import drop_tool_memo
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "pkg" / "core.py").write_text(
+        "import os\n\n\ndef compute_total(values):\n    return sum(values)\n"
+    )
+    (tmp_path / "pkg" / "report.py").write_text(
+        "from pkg.core import compute_total\n\n\n"
+        "def render(values):\n    return str(compute_total(values))\n"
+    )
+    (tmp_path / "tests" / "test_core.py").write_text(
+        "from pkg.core import compute_total\n\n\n"
+        "def test_total():\n    assert compute_total([1, 2]) == 3\n"
+    )
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    yield tmp_path
+    drop_code_index(tmp_path)
+    drop_tool_memo(tmp_path)
+
+
+def _tools(repo, max_tokens=1500):
+    environment = MagicMock()
+    environment.repo_path = repo
+    config_agent = MagicMock()
+    config_agent.code_search_max_tokens = max_tokens
+    search = CodeSearchTool(MagicMock(), environment, config_agent)
+    editor = EditorTool(MagicMock(), environment, config_agent)
+    return search, editor
+
+
+def test_identifier_search_ranks_definition_first(repo):
+    search, _ = _tools(repo)
+    result = search.forward(query="compute_total")
+    lines = result.splitlines()
+    assert lines[0].startswith("5 matching lines in 3 files")
+    assert lines[1] == "pkg/core.py"
+    assert "def compute_total(values):  [definition]" in lines[2]
+    # Source files are listed before tests.
+    assert result.index("pkg/report.py") < result.index("tests/test_core.py")
+
+
+def test_identifier_search_matches_whole_words(repo):
+    search, _ = _tools(repo)
+    assert search.forward(query="compute").startswith("No matches")
+
+
+def test_regex_search_and_path_glob(repo):
+    search, _ = _tools(repo)
+    result = search.forward(query=r"def \w+\(values\)", mode="regex")
+    assert "pkg/core.py" in result and "pkg/report.py" in result
+    result = search.forward(query="compute_total", path_glob="tests/*")
+    assert "tests/test_core.py" in result
+    assert "pkg/" not in result
+
+
+def test_hit_lines_ignore_form_feeds(repo):
+    (repo / "pkg" / "paged.py").write_text(
+        "# page 1\x0c\n# sep \u2028 here\n\ndef paged_total():\n    pass\n"
+    )
+    search, _ = _tools(repo)
+    result = search.forward(query="paged_total")
+    assert "4: def paged_total():  [definition]" in result
+
+
+def test_invalid_regex_reports_error(repo):
+    search, _ = _tools(repo)
+    assert search.forward(query="(", mode="regex").startswith("Error: invalid")
+
+
+def test_editor_writes_are_reindexed(repo):
+    search, editor = _tools(repo)
+    assert search.forward(query="grand_total").startswith("No matches")
+    editor.forward(
+        command="str_replace",
+        path="pkg/core.py",
+        old_str="return sum(values)",
+        new_str="grand_total = sum(values)\n    return grand_total",
+    )
+    result = search.forward(query="grand_total")
+    assert "pkg/core.py" in result
+    assert "grand_total = sum(values)" in result
+
+
+def test_results_are_cut_to_the_token_budget(repo):
+    search, _ = _tools(repo, max_tokens=20)
+    result = search.forward(query="compute_total")
+    assert "more matching lines not shown" in result
+    assert len(result) < 400
+
+
+def test_required_literals():
+    assert required_literals(r"def \w+_total\(") == ["def ", "_total("]
+    assert required_literals(r"a|b") == []
+
+
+# EOF
@@ -6,6 +6,8 @@ from unittest.mock import MagicMock
 import pytest
 
 from src.tools.edit_tool import EditorTool
+from src.utils.edit_journal import drop_edit_journal
+from src.utils.tool_memo import drop_tool_memo
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -25,6 +27,8 @@ def tool():
     mock_environment.repo_path = "/tmp/fake-repo"
 
     mock_config_agent = MagicMock()
+    drop_tool_memo(mock_environment.repo_path)
+    drop_edit_journal(mock_environment.repo_path)
     return EditorTool(
         problem=mock_problem,
         environment=mock_environment,
@@ -133,9 +137,169 @@ def test_view_nonexistent(tool):
     assert "is not a file or directory" in result
 
 
-def test_undo_not_implemented(tool, temp_file):
+def test_view_is_memoized_until_a_write(tool, temp_file):
+    first = tool.forward(command="view", path=temp_file)
+    Path(temp_file).write_text("changed\n")  # outside any tool: not seen
+    assert tool.forward(command="view", path=temp_file) == first
+
+    tool.forward(command="insert", path=temp_file, new_str="added", insert_line=1)
+    result = tool.forward(command="view", path=temp_file)
+    assert "changed" in result
+    assert "added" in result
+
+
+def test_large_file_ranged_view_and_edits(tool):
+    path = Path("/tmp/fake-repo/big.py")
+    path.write_text("".join(f"x_{i} = {i}\n" for i in range(50_000)) + "tail = 0")
+
+    result = tool.forward(command="view", path=str(path), view_range=[30_000, 30_001])
+    assert result.startswith("[Showing lines 30000 to 30001 of 50001]")
+    assert "30000 x_29999 = 29999" in result
+    assert "x_30001" not in result
+
+    tool.forward(command="str_replace", path=str(path), old_str="x_42 =", new_str="y =")
+    tool.forward(command="insert", path=str(path), insert_line=50_001, new_str="end")
+    lines = path.read_text().splitlines()
+    assert lines[42] == "y = 42"
+    assert lines[-2:] == ["tail = 0", "end"]
+    path.unlink()
+
+
+def test_view_range_keeps_form_feeds_inside_lines(tool):
+    path = Path("/tmp/fake-repo/feeds.py")
+    path.write_text("a = 1\n\x0c\nb = 2  # \u2028 sep\nc = 3\n")
+
+    result = tool.forward(command="view", path=str(path), view_range=[3, 4])
+    assert result.startswith("[Showing lines 3 to 4 of 4]")
+    assert "3 b = 2  # \u2028 sep\n" in result
+    assert "4 c = 3" in result
+    path.unlink()
+
+
+def test_str_replace_keeps_crlf_line_endings(tool):
+    path = Path("/tmp/fake-repo/crlf.txt")
+    path.write_bytes(b"a\r\nb\r\nc\r\n")
+    tool.forward(command="str_replace", path=str(path), old_str="a\nb", new_str="a\nB")
+    assert path.read_bytes() == b"a\r\nB\r\nc\r\n"
+    path.unlink()
+
+
+def test_view_directory_prunes_and_respects_gitignore(tool):
+    root = Path("/tmp/fake-repo/listing")
+    for rel in [
+        "pkg/mod.py",
+        "pkg/sub/deep/too_deep.py",
+        "pkg/__pycache__/mod.pyc",
+        "pkg/generated.log",
+        "build/lib.py",
+        ".git/HEAD",
+        "docs/keep.log",
+    ]:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text("")
+    (root / ".gitignore").write_text("*.log\n")
+    (root / "docs" / ".gitignore").write_text("!keep.log\n")
+
+    result = tool.forward(command="view", path=str(root))
+    shutil.rmtree(root)
+    assert result.splitlines()[0] == "listing/"
+    assert "        mod.py" in result
+    assert "        sub/" in result
+    assert "deep" not in result
+    assert "__pycache__" not in result
+    assert "generated.log" not in result
+    assert "keep.log" in result
+    assert "HEAD" not in result
+
+
+def test_undo_without_history(tool, temp_file):
     result = tool.forward(command="undo_edit", path=temp_file)
-    assert "not implemented" in result
+    assert "No edit history" in result
+
+
+def test_multi_level_undo(tool, temp_file):
+    original = Path(temp_file).read_text()
+    tool.forward(command="str_replace", path=temp_file, old_str="line2", new_str="L2")
+    tool.forward(command="insert", path=temp_file, insert_line=0, new_str="top")
+    assert Path(temp_file).read_text() == "top\nline1\nL2\nline3\n"
+
+    assert "1 earlier edit" in tool.forward(command="undo_edit", path=temp_file)
+    assert Path(temp_file).read_text() == "line1\nL2\nline3\n"
+    tool.forward(command="undo_edit", path=temp_file)
+    assert Path(temp_file).read_text() == original
+
+
+def test_undo_create_and_external_change(tool, temp_file):
+    path = Path("/tmp/fake-repo/created.txt")
+    tool.forward(command="create", path=str(path), file_text="new\n")
+    assert "file removed" in tool.forward(command="undo_edit", path=str(path))
+    assert not path.exists()
+
+    tool.forward(command="str_replace", path=temp_file, old_str="line1", new_str="A")
+    Path(temp_file).write_text("rewritten elsewhere\n")
+    result = tool.forward(command="undo_edit", path=temp_file)
+    assert "changed outside the editor" in result
+
+
+def test_batch_edit_applies_all_against_one_read(tool, temp_file):
+    other = Path("/tmp/fake-repo/other.py")
+    other.write_text("def f():\n    return 1\n")
+    result = tool.forward(
+        command="batch_edit",
+        path=temp_file,
+        operations=[
+            {"command": "str_replace", "old_str": "line1", "new_str": "first"},
+            {"command": "insert", "insert_line": 2, "new_str": "after line2"},
+            {"command": "insert", "insert_line": 0, "new_str": "top"},
+            {
+                "command": "str_replace",
+                "path": str(other),
+                "old_str": "return 1",
+                "new_str": "return 2",
+            },
+        ],
+    )
+    assert "Applied 4 edit(s) across 2 file(s)" in result
+    assert Path(temp_file).read_text() == "top\nfirst\nline2\nafter line2\nline3\n"
+    assert other.read_text() == "def f():\n    return 2\n"
+
+    # One journal entry per file: a single undo reverts the whole batch there.
+    tool.forward(command="undo_edit", path=temp_file)
+    assert Path(temp_file).read_text() == "line1\nline2\nline3\n"
+    other.unlink()
+
+
+def test_batch_edit_is_all_or_nothing(tool, temp_file):
+    other = Path("/tmp/fake-repo/other.py")
+    other.write_text("x = 1\n")
+    result = tool.forward(
+        command="batch_edit",
+        path=temp_file,
+        operations=[
+            {"command": "str_replace", "old_str": "line1", "new_str": "first"},
+            {"command": "str_replace", "path": str(other), "old_str": "y = 1"},
+            {"command": "str_replace", "old_str": "line1\nline2", "new_str": "x"},
+        ],
+    )
+    assert "no file was changed" in result
+    assert "operation 2" in result and "not found" in result
+    assert "operations 1 and 3" in result and "overlap" in result
+    assert Path(temp_file).read_text() == "line1\nline2\nline3\n"
+    assert other.read_text() == "x = 1\n"
+    other.unlink()
+
+
+def test_journal_memory_is_bounded(tmp_path):
+    from src.utils.edit_journal import EditJournal
+
+    journal = EditJournal(max_bytes=100, max_depth=3)
+    path = tmp_path / "f.txt"
+    for i in range(5):
+        journal.record(path, 0, b"x" * 10, b"y")
+    assert journal.depth(path) == 3
+    journal.record(path, 0, b"z" * 95, b"y")
+    assert journal.size <= 100
+    assert journal.depth(path) == 1
 
 
 # EOF
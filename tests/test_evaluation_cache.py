@@ -0,0 +1,71 @@
+# test_evaluation_cache.py
+import multiprocessing
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.models.environment import Environment
+from src.utils.evaluation_cache import EvaluationCache
+from src.utils.sqlite_cache import SqliteCache
+from src.workflow.patch_evaluator import PatchEvaluator
+from src.workflow.patch_evaluator_detailed import PatchEvaluatorDetailed
+
+PATCH = "diff --git a/x.py b/x.py\nindex 1..2 100644\n--- a/x.py\n+++ b/x.py\n"
+
+
+def test_identical_patches_share_an_entry(tmp_path):
+    cache = EvaluationCache(tmp_path / "evaluation.sqlite")
+    cache.put("inst-1", PATCH, {"status": "RESOLVED", "report": {"resolved": True}})
+
+    same_patch = PATCH.replace("\n", "\r\n").replace("index 1..2", "index 3..4")
+    assert cache.get("inst-1", same_patch + "\n\n")["status"] == "RESOLVED"
+    assert cache.get("inst-2", PATCH) is None
+    assert cache.get("inst-1", PATCH + "+x = 1\n") is None
+
+
+def test_results_outlive_the_output_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path / "home")
+    monkeypatch.delenv("SWE_CACHE", raising=False)
+    config_agent = MagicMock(evaluation_cache_max_mb=1)
+    first, rerun = (
+        evaluator(
+            MagicMock(),
+            Environment.model_construct(root_output=tmp_path / f"run-{i}"),
+            config_agent,
+        )
+        for i, evaluator in enumerate((PatchEvaluator, PatchEvaluatorDetailed))
+    )
+    first.cache.put("inst-1", PATCH, {"status": "RESOLVED"})
+    assert rerun.cache.get("inst-1", PATCH) == {"status": "RESOLVED"}
+    assert not (tmp_path / "run-0").exists()
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = SqliteCache(tmp_path / "lru.sqlite", max_bytes=10**9)
+    cache.put("a", "x" * 100)
+    cache.put("b", "y" * 100)
+    cache.get("a")
+    cache.max_bytes = 30  # room for two compressed entries
+    cache.put("c", "z" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def _write_entries(args):
+    path, worker = args
+    cache = SqliteCache(path)
+    for i in range(25):
+        cache.put(f"{worker}-{i}", {"i": i})
+        assert cache.get(f"{worker}-{i}") == {"i": i}
+
+
+def test_concurrent_processes(tmp_path):
+    path = tmp_path / "shared.sqlite"
+    SqliteCache(path)
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_write_entries, [(path, w) for w in range(4)])
+    assert len(SqliteCache(path)) == 100
+
+
+# EOF
@@ -0,0 +1,76 @@
+# test_evaluation_queue.py
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src.models.problem import Problem
+from src.workflow.evaluation_queue import EvaluationQueue, make_evaluation_request
+
+
+def make_request(instance_id: str) -> dict:
+    problem = Problem(
+        instance_id=instance_id, problem_statement="", repo="a/b", base_commit="0"
+    )
+    return make_evaluation_request(problem, "diff", "model", Path("/swe"))
+
+
+class FakeHarness:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, requests, work_dir, max_workers, logger):
+        self.batches.append([r["problem"].instance_id for r in requests])
+        return [
+            {"status": "RESOLVED", "instance": r["problem"].instance_id}
+            for r in requests
+        ]
+
+
+def test_requests_are_evaluated_in_one_batch(tmp_path):
+    harness = FakeHarness()
+    ids = ["a", "b", "c"]
+    with EvaluationQueue(
+        work_dir=tmp_path, batch_size=3, max_wait_seconds=60, run_batch=harness
+    ) as eval_queue:
+        clients = [eval_queue.client() for _ in ids]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(
+                pool.map(
+                    lambda args: args[0].evaluate(make_request(args[1])),
+                    zip(clients, ids),
+                )
+            )
+
+    assert len(harness.batches) == 1
+    assert sorted(harness.batches[0]) == ids
+    assert [r["instance"] for r in results] == ids
+
+
+def test_partial_batch_flushes_when_all_active_runs_wait(tmp_path):
+    harness = FakeHarness()
+    with EvaluationQueue(
+        work_dir=tmp_path,
+        batch_size=10,
+        max_wait_seconds=60,
+        active_count=lambda: 1,
+        run_batch=harness,
+    ) as eval_queue:
+        result = eval_queue.client().evaluate(make_request("a"))
+
+    assert result["instance"] == "a"
+    assert harness.batches == [["a"]]
+
+
+def test_batch_failure_is_raised_in_every_client(tmp_path):
+    def failing_harness(requests, work_dir, max_workers, logger):
+        raise RuntimeError("docker down")
+
+    with EvaluationQueue(
+        work_dir=tmp_path, batch_size=1, run_batch=failing_harness
+    ) as eval_queue:
+        with pytest.raises(RuntimeError, match="docker down"):
+            eval_queue.client().evaluate(make_request("a"))
+
+
+# EOF
@@ -0,0 +1,98 @@
+# test_llm_cache.py
+from pathlib import Path
+
+from smolagents.models import ChatMessage, Model
+
+from src.models.environment import Environment
+from src.utils.llm_cache import CachedModel
+from src.utils.sqlite_cache import SqliteCache
+
+MESSAGES = [{"role": "user", "content": "Fix the bug."}]
+
+
+class CountingModel(Model):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.model_id = "fake-model"
+        self.calls = 0
+
+    def __call__(self, messages, stop_sequences=None, grammar=None, **kwargs):
+        self.calls += 1
+        self.last_input_token_count = 11
+        self.last_output_token_count = 7
+        return ChatMessage(role="assistant", content=f"answer {self.calls}")
+
+
+def test_identical_requests_replay_from_disk(tmp_path):
+    path = tmp_path / "llm.sqlite"
+    inner = CountingModel(temperature=0.2)
+    model = CachedModel(inner, SqliteCache(path))
+    first = model(MESSAGES, stop_sequences=["Observation:"])
+
+    # A fresh wrapper (e.g. a resumed run) replays from the same file.
+    replay = CachedModel(CountingModel(temperature=0.2), SqliteCache(path))
+    second = replay(MESSAGES, stop_sequences=["Observation:"])
+
+    assert inner.calls == 1
+    assert replay.model.calls == 0
+    assert second.content == first.content == "answer 1"
+    assert replay.last_input_token_count == 11
+    assert replay.last_output_token_count == 7
+
+
+def test_key_covers_messages_and_sampling_params(tmp_path):
+    cache = SqliteCache(tmp_path / "llm.sqlite")
+    model = CachedModel(CountingModel(temperature=0.2), cache)
+    model(MESSAGES)
+    model([{"role": "user", "content": "Fix the other bug."}])
+    model(MESSAGES, stop_sequences=["Observation:"])
+    CachedModel(CountingModel(temperature=0.9), cache)(MESSAGES)
+
+    assert model.model.calls == 3
+    assert len(cache) == 4
+
+
+def test_key_covers_max_tokens_but_not_secrets(tmp_path):
+    cache = SqliteCache(tmp_path / "llm.sqlite")
+    CachedModel(CountingModel(max_tokens=100, api_key="a"), cache)(MESSAGES)
+    replay = CachedModel(CountingModel(max_tokens=100, api_key="b"), cache)
+    replay(MESSAGES)
+    longer = CachedModel(CountingModel(max_tokens=200, api_key="a"), cache)
+    longer(MESSAGES)
+
+    assert replay.model.calls == 0
+    assert longer.model.calls == 1
+    assert len(cache) == 2
+
+
+def test_cache_outlives_the_output_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path / "home")
+    monkeypatch.delenv("SWE_CACHE", raising=False)
+    runs = [
+        Environment.model_construct(root_output=tmp_path / f"run-{i}") for i in (1, 2)
+    ]
+    assert runs[0].cache_path == runs[1].cache_path
+    assert runs[0].cache_path == tmp_path / "home" / ".cache" / "swe_autonomous"
+
+    cache = SqliteCache(runs[0].cache_path / "llm.sqlite")
+    CachedModel(CountingModel(), cache)(MESSAGES)
+    rerun = CachedModel(CountingModel(), SqliteCache(runs[1].cache_path / "llm.sqlite"))
+    rerun(MESSAGES)
+    assert rerun.model.calls == 0
+
+    monkeypatch.setenv("SWE_CACHE", str(tmp_path / "run-1" / "cache"))
+    assert runs[1].cache_path == tmp_path / "run-1" / "cache"
+
+
+def test_load_and_save_flags(tmp_path):
+    cache = SqliteCache(tmp_path / "llm.sqlite")
+    CachedModel(CountingModel(), cache, save_cache=False)(MESSAGES)
+    assert len(cache) == 0
+
+    CachedModel(CountingModel(), cache)(MESSAGES)
+    no_load = CachedModel(CountingModel(), cache, load_cache=False)
+    assert no_load(MESSAGES).content == "answer 1"
+    assert no_load.model.calls == 1
+
+
+# EOF
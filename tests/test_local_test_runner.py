@@ -0,0 +1,150 @@
+# test_local_test_runner.py
+import subprocess  # nosec B404
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.config.config_agent import ConfigAgent
+from src.lang_graph.local_test_node import make_local_test_router
+from src.models.enums import GRAPH_STATE, RESULT
+from src.workflow.local_test_runner import LocalTestRunner, is_pytest_node_id
+
+TEST_PATCH = """diff --git a/tests/test_calc.py b/tests/test_calc.py
+new file mode 100644
+--- /dev/null
++++ b/tests/test_calc.py
+@@ -0,0 +1,9 @@
++from calc import double
++
++
++def test_double():
++    assert double(3) == 6
++
++
++def test_positive():
++    assert double(3) > 0
+"""
+
+FIX = """diff --git a/calc.py b/calc.py
+--- a/calc.py
++++ b/calc.py
+@@ -1,2 +1,2 @@
+ def double(x):
+-    return x + 2
++    return x * 2
+"""
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def runner(tmp_path):
+    (tmp_path / "calc.py").write_text("def double(x):\n    return x + 2\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "conftest.py").write_text(
+        "import sys, os\nsys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))\n"
+    )
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "base")
+
+    problem = MagicMock()
+    problem.instance_id = "calc__calc-1"
+    problem.base_commit = _git(tmp_path, "rev-parse", "HEAD")
+    problem.test_patch = TEST_PATCH
+    problem.fail_to_pass = ["tests/test_calc.py::test_double"]
+    problem.pass_to_pass = ["tests/test_calc.py::test_positive"]
+    environment = MagicMock()
+    environment.repo_path = tmp_path
+    config_agent = MagicMock()
+    config_agent.local_test_command = f"{sys.executable} -m pytest"
+    config_agent.local_test_workers = 2
+    config_agent.local_test_pass_to_pass_sample = 20
+    config_agent.local_test_timeout_seconds = 120
+    return LocalTestRunner(problem, environment, config_agent)
+
+
+def test_failures_are_reported_and_checkout_restored(runner):
+    (runner.repo_path / "calc.py").write_text("edited by the agent\n")
+    result = runner.run(FIX.replace("x * 2", "x * 3"))
+    assert result["status"] == "ERROR"
+    assert result["failed"] == ["tests/test_calc.py::test_double"]
+    assert result["passed"] == ["tests/test_calc.py::test_positive"]
+    assert "FAILED tests/test_calc.py::test_double" in result["feedback"]
+    assert "assert 9 == 6" in result["feedback"]
+
+    assert (runner.repo_path / "calc.py").read_text().endswith("x + 2\n")
+    assert not (runner.repo_path / "tests" / "test_calc.py").exists()
+
+
+def test_passing_patch(runner):
+    result = runner.run(FIX)
+    assert result["status"] == "PASSED"
+    assert len(result["passed"]) == 2
+
+
+def test_unapplicable_patch_and_unrunnable_tests(runner):
+    result = runner.run(FIX.replace(" def double", " def triple"))
+    assert result["status"] == "ERROR"
+    assert result["feedback"].startswith("The patch does not apply")
+
+    runner.problem.fail_to_pass = ["test_double (calc.tests.CalcTests)"]
+    assert runner.run(FIX)["status"] == "SKIPPED"
+
+
+def test_tests_that_cannot_run_locally_are_skipped(runner):
+    # The harness image has the dependency; this host does not.
+    missing = TEST_PATCH.replace(
+        "@@ -0,0 +1,9 @@\n+from calc import double\n",
+        "@@ -0,0 +1,10 @@\n+import not_installed_anywhere  # noqa: F401\n"
+        "+from calc import double\n",
+    )
+    runner.problem.test_patch = missing
+    result = runner.run(FIX.replace("x * 2", "x * 3"))
+    assert result["status"] == "SKIPPED"
+    assert not (runner.repo_path / "tests" / "test_calc.py").exists()
+
+
+def test_broken_imports_fail_once_tests_ran_at_baseline(runner):
+    broken = FIX.replace("-    return x + 2\n", "-    return x + 2\n+    x(\n")
+    broken = broken.replace("@@ -1,2 +1,2 @@", "@@ -1,2 +1,3 @@")
+    result = runner.run(broken)
+    assert result["status"] == "ERROR"
+    assert set(result["failed"]) == {
+        "tests/test_calc.py::test_double",
+        "tests/test_calc.py::test_positive",
+    }
+
+
+def test_route_goes_to_evaluation_once_local_attempts_run_out():
+    route = make_local_test_router(ConfigAgent(local_test_max_attempts=3))
+    state = {"local_test_result": RESULT.ERROR, "local_test_attempts": 1}
+    assert route(state) == GRAPH_STATE.GENERATE_PATCH
+    state["local_test_attempts"] = 3
+    assert route(state) == GRAPH_STATE.EVALUATE_PATCH
+
+    # One attempt: local failures are reported, never regenerated.
+    route = make_local_test_router(ConfigAgent(local_test_max_attempts=1))
+    state["local_test_attempts"] = 1
+    assert route(state) == GRAPH_STATE.EVALUATE_PATCH
+
+
+def test_pass_to_pass_sample_is_stable(runner):
+    runner.problem.pass_to_pass = [f"tests/test_x.py::test_{i}" for i in range(50)]
+    runner.config_agent.local_test_pass_to_pass_sample = 5
+    tests = runner.select_tests()
+    assert len(tests) == 6 and tests == runner.select_tests()
+    assert is_pytest_node_id("tests/test_x.py::TestA::test_b[a b]")
+    assert not is_pytest_node_id("test_foo")
+
+
+# EOF
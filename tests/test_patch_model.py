@@ -0,0 +1,194 @@
+# test_patch_model.py
+import subprocess  # nosec B404
+
+import pytest
+
+from src.utils.io_utils import apply_patch_to_file
+from src.utils.localization_scores import extract_file_and_lines_from_patch
+from src.utils.patch_model import (
+    apply_file_patch,
+    applies_cleanly,
+    check_applies,
+    parse_patch,
+)
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 21))
+
+PATCH = """diff --git a/pkg/a.py b/pkg/a.py
+index 1111111..2222222 100644
+--- a/pkg/a.py
++++ b/pkg/a.py
+@@ -2,3 +2,4 @@ def header():
+ line 2
+-line 3
++line three
++line 3.5
+ line 4
+@@ -18,3 +19,3 @@
+ line 18
+-line 19
++line nineteen
+ line 20
+diff --git a/pkg/new.py b/pkg/new.py
+new file mode 100644
+--- /dev/null
++++ b/pkg/new.py
+@@ -0,0 +1,2 @@
++x = 1
++y = 2
+\\ No newline at end of file
+diff --git a/pkg/gone.py b/pkg/gone.py
+deleted file mode 100644
+--- a/pkg/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-bye
+"""
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text(ORIGINAL)
+    (tmp_path / "pkg" / "gone.py").write_text("bye\n")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+def _git_applies(repo, patch: str) -> bool:
+    result = subprocess.run(
+        ["git", "apply", "--check", "-"], cwd=repo, input=patch, text=True
+    )
+    return result.returncode == 0
+
+
+def test_parse_files_and_hunks():
+    patch = parse_patch(PATCH)
+    assert patch.paths == ["pkg/a.py", "pkg/new.py", "pkg/gone.py"]
+    a, new, gone = patch.files
+    assert (a.is_new, a.is_deleted, new.is_new, gone.is_deleted) == (
+        False,
+        False,
+        True,
+        True,
+    )
+    assert [(h.source_start, h.target_start) for h in a.hunks] == [(2, 2), (18, 19)]
+    assert a.hunks[0].section == "def header():"
+    assert a.added_line_numbers == [3, 4, 20]
+    assert a.hunks[1].removed_line_numbers == [19]
+    assert new.hunks[0].target_lines == ["x = 1\n", "y = 2"]
+    assert a.text.startswith("diff --git a/pkg/a.py") and a.text.endswith("line 20\n")
+    assert parse_patch(PATCH) is patch
+
+
+def test_plain_unified_diff_without_git_headers():
+    patch = parse_patch(
+        "--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b\n"
+        "--- a/y.py\n+++ b/y.py\n@@ -1 +1 @@\n-c\n+d\n"
+    )
+    assert patch.paths == ["x.py", "y.py"]
+    assert not any(f.is_malformed for f in patch.files)
+
+
+def test_malformed_hunk_is_flagged():
+    patch = parse_patch("--- a/x.py\n+++ b/x.py\n@@ -1,3 +1,3 @@\n-a\n+b\n")
+    assert patch.files[0].is_malformed
+
+
+def test_apply_patch_to_file():
+    patched = apply_patch_to_file(ORIGINAL, PATCH, "a.py")
+    assert patched.splitlines()[1:5] == ["line 2", "line three", "line 3.5", "line 4"]
+    assert "line nineteen\nline 20\n" in patched
+    assert apply_patch_to_file("", PATCH, "new.py") == "x = 1\ny = 2"
+
+
+def test_hunks_apply_with_offset_fuzz_and_whitespace():
+    file_patch = parse_patch(PATCH).files[0]
+    shifted = "".join(f"extra {i}\n" for i in range(5)) + ORIGINAL
+    patched, placements = apply_file_patch(shifted, file_patch)
+    assert patched == "".join(f"extra {i}\n" for i in range(5)) + apply_patch_to_file(
+        ORIGINAL, PATCH, "a.py"
+    )
+    assert [(p.hunk, p.offset, p.fuzz) for p in placements] == [(1, 5, 0), (2, 5, 0)]
+
+    # Context that drifted is only accepted with fuzz, and is kept as is.
+    drifted = ORIGINAL.replace("line 4\n", "line four\n")
+    with pytest.raises(ValueError, match=r"hunk #1 .* near line 2"):
+        apply_file_patch(drifted, file_patch)
+    patched, placements = apply_file_patch(drifted, file_patch, fuzz=1)
+    assert "line three\nline 3.5\nline four\n" in patched
+    assert placements[0].fuzz == 1 and placements[1].is_exact
+
+    # Trailing whitespace differences are tolerated; context comes from the file.
+    spaced = ORIGINAL.replace("line 2\n", "line 2  \n")
+    patched, placements = apply_file_patch(spaced, file_patch)
+    assert "line 2  \nline three\n" in patched
+    assert placements[0].whitespace
+
+    # Matches farther than max_offset are not considered.
+    with pytest.raises(ValueError):
+        apply_file_patch(shifted, file_patch, max_offset=4)
+
+
+def test_applies_cleanly_agrees_with_git(repo):
+    assert applies_cleanly(parse_patch(PATCH), repo)
+    assert _git_applies(repo, PATCH)
+
+    # Shifted line numbers still apply, as with `git apply`.
+    shifted = PATCH.replace("@@ -2,3 +2,4 @@", "@@ -5,3 +5,4 @@")
+    assert applies_cleanly(parse_patch(shifted), repo)
+    assert _git_applies(repo, shifted)
+
+    # Wrong context, or creating a file that exists, does not.
+    for broken in (
+        PATCH.replace(" line 4\n", " line 4 changed\n"),
+        PATCH.replace("pkg/new.py", "pkg/a.py"),
+    ):
+        assert not applies_cleanly(parse_patch(broken), repo)
+        assert not _git_applies(repo, broken)
+
+
+def test_anchored_hunks_are_not_shifted(repo):
+    (repo / "anchored.py").write_text("x\na\nb\n")
+    for patch in (
+        # Starts at line 1: must match at the start of the file.
+        "@@ -1,2 +1,3 @@\n+new\n a\n b\n",
+        # No trailing context: must match at the end of the file.
+        "@@ -1,1 +1,2 @@\n x\n+new\n",
+    ):
+        patch = "--- a/anchored.py\n+++ b/anchored.py\n" + patch
+        assert not applies_cleanly(parse_patch(patch), repo)
+        assert not _git_applies(repo, patch)
+
+    patch = "--- a/anchored.py\n+++ b/anchored.py\n@@ -2,2 +2,3 @@\n a\n b\n+new\n"
+    assert applies_cleanly(parse_patch(patch), repo)
+    assert _git_applies(repo, patch)
+
+
+def test_header_only_patch_is_left_to_git(repo, tmp_path):
+    (repo / "m.py").write_text("x = 1\n")
+    patch = "diff --git a/m.py b/m.py\n"
+    assert not applies_cleanly(parse_patch(patch), repo)
+    patch_path = tmp_path / "empty.patch"
+    patch_path.write_text(patch)
+    assert "No valid patches" in check_applies(patch, repo, patch_path)
+
+
+def test_check_applies_falls_back_to_git(repo, tmp_path):
+    patch_path = tmp_path / "fix.patch"
+    broken = PATCH.replace("-line 19\n", "-line nineteen\n")
+    patch_path.write_text(broken)
+    error = check_applies(broken, repo, patch_path)
+    assert "patch failed" in error
+
+    patch_path.write_text(PATCH)
+    assert check_applies(PATCH, repo, patch_path) is None
+
+
+def test_localization_lines():
+    files, lines = extract_file_and_lines_from_patch(PATCH)
+    assert files == {"pkg/a.py", "pkg/new.py", "pkg/gone.py"}
+    assert lines == {1, 2, 3, 4, 20}
+
+
+# EOF
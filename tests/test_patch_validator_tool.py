@@ -0,0 +1,216 @@
+# test_patch_validator_tool.py
+import json
+import subprocess  # nosec B404
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.tools import patch_validator_tool
+from src.tools.patch_validator_tool import PatchValidatorTool
+from src.utils.syntax_check import check_syntax
+
+PATCH = """diff --git a/pkg/core.py b/pkg/core.py
+--- a/pkg/core.py
++++ b/pkg/core.py
+@@ -1,2 +1,6 @@
+ def total(values):
+     return sum(values)
++
++
++def mean(values):
++    return total(values) / len(values)
+diff --git a/pkg/extra.py b/pkg/extra.py
+new file mode 100644
+--- /dev/null
++++ b/pkg/extra.py
+@@ -0,0 +1,4 @@
++import os
++
++def size(values):
++    return len(values)
+diff --git a/README.md b/README.md
+--- a/README.md
++++ b/README.md
+@@ -1 +1,2 @@
+ # pkg
++More.
+"""
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "core.py").write_text(
+        "def total(values):\n    return sum(values)\n"
+    )
+    (tmp_path / "README.md").write_text("# pkg\n")
+    (tmp_path / "pyproject.toml").write_text('[tool.ruff.lint]\nselect = ["F401"]\n')
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+@pytest.fixture
+def tool(repo):
+    environment = MagicMock()
+    environment.repo_path = repo
+    config_agent = MagicMock()
+    config_agent.patch_fuzz_factor = 2
+    config_agent.patch_max_offset_lines = 1000
+    return PatchValidatorTool(MagicMock(), environment, config_agent)
+
+
+def test_ruff_runs_once_and_cleaned_patch_applies(tool, repo, monkeypatch):
+    calls = []
+    run = subprocess.run
+
+    def counting_run(command, **kwargs):
+        calls.append(command)
+        return run(command, **kwargs)
+
+    monkeypatch.setattr(patch_validator_tool.subprocess, "run", counting_run)
+    result = json.loads(tool.forward(PATCH))
+
+    assert result["status"] == "PASSED"
+    assert len(calls) == 1
+    assert calls[0][-2:] == ["pkg/core.py", "pkg/extra.py"]
+
+    cleaned = result["cleaned_patch"]
+    # The unused import is fixed away; the rest of the patch is kept.
+    assert "+import os" not in cleaned
+    assert "+def mean(values):" in cleaned
+    assert "+More." in cleaned
+    subprocess.run(
+        ["git", "apply", "-"], cwd=repo, input=cleaned, text=True, check=True
+    )
+    assert (repo / "pkg" / "extra.py").read_text() == (
+        "\ndef size(values):\n    return len(values)\n"
+    )
+    assert "def mean" in (repo / "pkg" / "core.py").read_text()
+
+
+def test_patch_without_fixes_is_returned_unchanged(tool):
+    patch = PATCH.split("diff --git a/pkg/extra.py")[0]
+    result = json.loads(tool.forward(patch))
+    assert result == {"status": "PASSED", "cleaned_patch": patch}
+
+
+def test_shifted_hunk_is_rediffed_to_apply_exactly(tool, repo):
+    (repo / "README.md").write_text("intro\n\n# pkg\n")
+    patch = PATCH.split("diff --git a/README.md")[1]
+    patch = "diff --git a/README.md" + patch.replace("# pkg", "# pkg  ")
+    cleaned = json.loads(tool.forward(patch))["cleaned_patch"]
+    assert "@@ -1,3 +1,4 @@" in cleaned
+    subprocess.run(
+        ["git", "apply", "-"], cwd=repo, input=cleaned, text=True, check=True
+    )
+    assert (repo / "README.md").read_text() == "intro\n\n# pkg\nMore.\n"
+
+
+def test_fuzzed_hunk_near_form_feed_is_rediffed_to_apply(tool, repo):
+    (repo / "pkg" / "paged.py").write_text("# header\n\nx = 1\n\x0c\ny = 2\nz = 3\n")
+    # Stale first context line and a two-line offset: fuzz 1.
+    patch = (
+        "diff --git a/pkg/paged.py b/pkg/paged.py\n"
+        "--- a/pkg/paged.py\n+++ b/pkg/paged.py\n"
+        "@@ -1,4 +1,4 @@\n x = 0\n \x0c\n-y = 2\n+y = 4\n z = 3\n"
+    )
+    cleaned = json.loads(tool.forward(patch))["cleaned_patch"]
+    assert cleaned != patch
+    subprocess.run(
+        ["git", "apply", "--check", "-"],
+        cwd=repo,
+        input=cleaned,
+        text=True,
+        check=True,
+    )
+    subprocess.run(
+        ["git", "apply", "-"], cwd=repo, input=cleaned, text=True, check=True
+    )
+    assert (repo / "pkg" / "paged.py").read_text() == (
+        "# header\n\nx = 1\n\x0c\ny = 4\nz = 3\n"
+    )
+
+
+def test_fixes_outside_the_patch_are_not_submitted(tool, repo):
+    (repo / "pkg" / "legacy.py").write_text(
+        "import os\nimport sys\n\n\ndef one():\n    return 1\n"
+    )
+    patch = (
+        "diff --git a/pkg/legacy.py b/pkg/legacy.py\n"
+        "--- a/pkg/legacy.py\n+++ b/pkg/legacy.py\n"
+        "@@ -1,6 +1,7 @@\n import os\n import sys\n+import json\n \n \n"
+        " def one():\n-    return 1\n+    return 2\n"
+    )
+    cleaned = json.loads(tool.forward(patch))["cleaned_patch"]
+    # Only the unused import the patch added is fixed away.
+    assert "+import json" not in cleaned
+    assert "-import os" not in cleaned and "-import sys" not in cleaned
+    subprocess.run(
+        ["git", "apply", "-"], cwd=repo, input=cleaned, text=True, check=True
+    )
+    assert (repo / "pkg" / "legacy.py").read_text() == (
+        "import os\nimport sys\n\n\ndef one():\n    return 2\n"
+    )
+
+
+def test_rediff_keeps_form_feeds_inside_lines(tool, repo):
+    (repo / "pkg" / "paged.py").write_text("x = 1\n\x0c\n\ndef one():\n    return 1\n")
+    patch = (
+        "diff --git a/pkg/paged.py b/pkg/paged.py\n"
+        "--- a/pkg/paged.py\n+++ b/pkg/paged.py\n"
+        "@@ -1,5 +1,6 @@\n+import json\n x = 1\n \x0c\n \n def one():\n"
+        "-    return 1\n+    return 2\n"
+    )
+    cleaned = json.loads(tool.forward(patch))["cleaned_patch"]
+    assert "+import json" not in cleaned
+    assert "No newline" not in cleaned
+    subprocess.run(
+        ["git", "apply", "-"], cwd=repo, input=cleaned, text=True, check=True
+    )
+    assert (repo / "pkg" / "paged.py").read_text() == (
+        "x = 1\n\x0c\n\ndef one():\n    return 2\n"
+    )
+
+
+def test_files_whose_changes_are_all_fixed_away_are_dropped(tool):
+    unused = (
+        "diff --git a/pkg/core.py b/pkg/core.py\n"
+        "--- a/pkg/core.py\n+++ b/pkg/core.py\n"
+        "@@ -1,2 +1,3 @@\n+import os\n def total(values):\n     return sum(values)\n"
+    )
+    result = json.loads(tool.forward(unused))
+    assert result == {
+        "status": "ERROR",
+        "error_message": "Patch has no effective changes.",
+    }
+
+    readme = "diff --git a/README.md" + PATCH.split("diff --git a/README.md")[1]
+    result = json.loads(tool.forward(unused + readme))
+    assert result == {"status": "PASSED", "cleaned_patch": readme}
+
+
+def test_syntax_errors_are_reported_before_ruff(tool, monkeypatch):
+    monkeypatch.setattr(patch_validator_tool.subprocess, "run", None)
+    patch = PATCH.replace("+def mean(values):", "+def mean(values)").replace(
+        "+def size(values):", "+def size(values):\n+  return\n+ return"
+    )
+    patch = patch.replace("@@ -0,0 +1,4 @@", "@@ -0,0 +1,6 @@")
+    result = json.loads(tool.forward(patch))
+    assert result["status"] == "ERROR"
+    message = result["error_message"]
+    assert "pkg/core.py:5:" in message and "    def mean(values)\n" in message
+    assert "pkg/extra.py:5:" in message and "IndentationError" in message
+
+
+def test_compile_only_errors_are_caught():
+    problems = check_syntax({"a.py": "x = 1\nreturn x\n", "b.txt": "(", "c.py": ""})
+    assert [(p.path, p.line, p.snippet) for p in problems] == [("a.py", 2, "return x")]
+
+
+def test_missing_file_is_an_error(tool):
+    patch = PATCH.replace("pkg/core.py", "pkg/missing.py")
+    result = json.loads(tool.forward(patch))
+    assert result["status"] == "ERROR"
+
+
+# EOF
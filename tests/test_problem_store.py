@@ -0,0 +1,58 @@
+# test_problem_store.py
+import pytest
+
+from src.utils.problem_store import ProblemStore, open_problem_store
+
+
+def make_record(instance_id, repo, difficulty):
+    return {
+        "instance_id": instance_id,
+        "problem_statement": f"issue {instance_id}",
+        "repo": repo,
+        "base_commit": "abc",
+        "patch": "diff",
+        "FAIL_TO_PASS": '["test_a"]',
+        "PASS_TO_PASS": "[]",
+        "difficulty": difficulty,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    records = [
+        make_record("django__django-2", "django/django", "<15 min fix"),
+        make_record("django__django-1", "django/django", "1-4 hours"),
+        make_record("astropy__astropy-1", "astropy/astropy", "<15 min fix"),
+    ]
+    return ProblemStore.build(tmp_path / "problems.sqlite", records)
+
+
+def test_get_by_instance_id(store):
+    problem = store.get("django__django-1")
+    assert problem.repo == "django/django"
+    assert problem.fail_to_pass == ["test_a"]
+    assert problem.hints_text == "N/A"
+    assert store.get("missing") is None
+
+
+def test_filters_keep_dataset_order(store):
+    easy = store.filter(difficulty="<15 min fix")
+    assert [p.instance_id for p in easy] == [
+        "django__django-2",
+        "astropy__astropy-1",
+    ]
+    assert store.instance_ids(repo="django/django") == [
+        "django__django-2",
+        "django__django-1",
+    ]
+    assert store.instance_ids(repo="django/django", difficulty="1-4 hours") == [
+        "django__django-1"
+    ]
+
+
+def test_open_existing_store_needs_no_dataset(store):
+    reopened = open_problem_store("unused/dataset", path=store.path)
+    assert len(reopened.instance_ids()) == 3
+
+
+# EOF
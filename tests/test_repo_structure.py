@@ -0,0 +1,89 @@
+# test_repo_structure.py
+import subprocess  # nosec B404
+from pathlib import Path
+
+import pytest
+
+from src.utils.repo_structure import RepoStructure
+from src.utils.sqlite_cache import SqliteCache
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for rel in [
+        "pkg/__init__.py",
+        "pkg/core.py",
+        "pkg/sub/deep.py",
+        "tests/test_core.py",
+        "README.md",
+        ".hidden/x.py",
+        "pkg/__pycache__/core.cpython-311.pyc",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    for i in range(30):
+        (tmp_path / "tests" / f"test_{i:02d}.py").write_text("")
+    return tmp_path
+
+
+def test_full_structure(repo):
+    text, files = RepoStructure(repo, [".py"], max_depth=None).generate_structure()
+    assert text.splitlines()[:5] == [
+        "├── pkg",
+        "│   ├── __init__.py",
+        "│   ├── core.py",
+        "│   └── sub",
+        "│       └── deep.py",
+    ]
+    assert "README.md" not in text and "hidden" not in text
+    assert "__pycache__" not in text
+    assert Path("pkg/sub/deep.py") in files
+    assert len(files) == 34
+
+
+def test_max_depth(repo):
+    text, files = RepoStructure(repo, [".py"], max_depth=1).generate_structure()
+    assert "│   └── sub" in text
+    assert "deep.py" not in text
+    assert Path("pkg/sub/deep.py") not in files
+
+
+def test_token_budget_collapses_large_directories(repo):
+    text, files = RepoStructure(repo, [".py"], max_depth=None).generate_structure(
+        max_tokens=30
+    )
+    assert "└── tests/ (31 files)" in text
+    assert "│   ├── core.py" in text
+    assert len(text) <= 30 * 4
+    assert len(files) == 34
+
+
+def test_scan_is_cached_per_commit(repo, tmp_path_factory, monkeypatch):
+    for args in (["init", "-q"], ["add", "."], ["commit", "-qm", "base"]):
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            cwd=repo,
+            check=True,
+        )
+    store = SqliteCache(tmp_path_factory.mktemp("cache") / "trees.sqlite")
+    first, _ = RepoStructure(repo, [".py"], store=store).generate_structure()
+    assert len(store) == 1
+
+    scans = []
+    original = RepoStructure._scan_root
+    monkeypatch.setattr(
+        RepoStructure,
+        "_scan_root",
+        lambda self: scans.append(1) or original(self),
+    )
+    again, _ = RepoStructure(repo, [".py"], store=store).generate_structure()
+    assert again == first and not scans
+
+    # Uncommitted changes: the commit no longer describes the tree.
+    (repo / "pkg" / "new.py").write_text("")
+    dirty, _ = RepoStructure(repo, [".py"], store=store).generate_structure()
+    assert scans and "new.py" in dirty
+
+
+# EOF
@@ -0,0 +1,49 @@
+# test_run_ledger.py
+from src.models.enums import INSTANCE_STATUS
+from src.models.instance_result import InstanceResult
+from src.utils.run_ledger import RunLedger
+
+
+def test_record_and_resume(tmp_path):
+    ledger = RunLedger(tmp_path / "ledger.sqlite")
+    ledger.mark_running("a")
+    ledger.mark_running("b")
+    ledger.mark_running("c")
+    assert ledger.status("a") == INSTANCE_STATUS.RUNNING
+
+    ledger.record(
+        InstanceResult(
+            instance_id="a",
+            status=INSTANCE_STATUS.RESOLVED,
+            resolved=True,
+            patch="diff --git a/x b/x\n",
+            duration_seconds=3.0,
+            evaluation_report={"localization_score_file": 1.0},
+        )
+    )
+    ledger.record(InstanceResult(instance_id="b", status=INSTANCE_STATUS.UNRESOLVED))
+    ledger.record(
+        InstanceResult(instance_id="c", status=INSTANCE_STATUS.ERROR, error="boom")
+    )
+
+    # A fresh ledger on the same file sees everything that was committed.
+    reopened = RunLedger(tmp_path / "ledger.sqlite")
+    assert reopened.completed_ids() == {"a", "b"}
+    results = {r.instance_id: r for r in reopened.completed_results()}
+    assert results["a"].resolved
+    assert results["a"].evaluation_report["localization_score_file"] == 1.0
+    assert reopened.status("c") == INSTANCE_STATUS.ERROR
+
+
+def test_rerun_overwrites_previous_entry(tmp_path):
+    ledger = RunLedger(tmp_path / "ledger.sqlite")
+    ledger.record(InstanceResult(instance_id="a", status=INSTANCE_STATUS.ERROR))
+    ledger.record(
+        InstanceResult(
+            instance_id="a", status=INSTANCE_STATUS.RESOLVED, resolved=True, patch="p"
+        )
+    )
+    assert ledger.completed_ids() == {"a"}
+
+
+# EOF
@@ -0,0 +1,161 @@
+# test_symbol_tool.py
+import subprocess  # nosec B404
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.tools.edit_tool import EditorTool
+from src.tools.symbol_tool import SymbolTool
+from src.utils.blob_cache import BlobCache
+from src.utils.sqlite_cache import SqliteCache
+from src.utils.symbol_index import drop_symbol_index, get_symbol_index, summarize
+from src.utils.tool_memo import drop_tool_memo
+
+CORE = '''import os
+from typing import List
+
+
+class Accumulator(object):
+    """Sums values."""
+
+    def __init__(self):
+        self.total = 0
+
+    @staticmethod
+    def compute_total(values: List[int]) -> int:
+        return sum(values)
+
+
+LIMIT = 10
+'''
+
+REPORT = """from pkg.core import Accumulator
+
+
+def render(values):
+    return str(Accumulator.compute_total(values))
+"""
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / "pkg" / "__init__.py").write_text("")
+    (repo / "pkg" / "core.py").write_text(CORE)
+    (repo / "pkg" / "report.py").write_text(REPORT)
+    _git(repo, "init", "-q")
+    _git(repo, "add", ".")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base")
+    yield repo
+    drop_symbol_index(repo)
+    drop_tool_memo(repo)
+
+
+def _tools(repo, tmp_path):
+    problem = MagicMock()
+    problem.repo = "owner/pkg"
+    problem.base_commit = _git(repo, "rev-parse", "HEAD")
+    environment = MagicMock()
+    environment.repo_path = repo
+    environment.cache_path = tmp_path / "cache"
+    config_agent = MagicMock()
+    config_agent.symbol_tool_max_tokens = 1500
+    config_agent.blob_cache_max_mb = 16
+    symbols = SymbolTool(problem, environment, config_agent)
+    editor = EditorTool(problem, environment, config_agent)
+    return symbols, editor
+
+
+def test_summarize_definitions_and_references():
+    summary = summarize(CORE.encode())
+    definitions = {d[1]: d for d in summary["definitions"]}
+    assert definitions["Accumulator"][2:5] == ["class", 5, 13]
+    assert definitions["Accumulator.compute_total"][2:6] == [
+        "method",
+        11,
+        13,
+        "(values: List[int]) -> int",
+    ]
+    assert definitions["LIMIT"][2] == "variable"
+    assert ["List", 2, "import"] in summary["references"]
+    assert ["sum", 13, "call"] in summary["references"]
+
+
+def test_summarize_syntax_error():
+    summary = summarize(b"def broken(:\n")
+    assert summary["error"]
+    assert summary["definitions"] == []
+
+
+def test_find_definition(repo, tmp_path):
+    symbols, _ = _tools(repo, tmp_path)
+    result = symbols.forward(command="find_definition", symbol="compute_total")
+    assert "pkg/core.py:11-13  method Accumulator.compute_total(values" in result
+    result = symbols.forward(
+        command="find_definition", symbol="pkg.core.Accumulator.compute_total"
+    )
+    assert "1 definition(s)" in result
+    assert "No definition" in symbols.forward(
+        command="find_definition", symbol="other.Accumulator"
+    )
+
+
+def test_find_references(repo, tmp_path):
+    symbols, _ = _tools(repo, tmp_path)
+    result = symbols.forward(command="find_references", symbol="Accumulator")
+    assert "pkg/report.py" in result
+    assert "1 [import] from pkg.core import Accumulator" in result
+    assert "5 [name] return str(Accumulator.compute_total(values))" in result
+    result = symbols.forward(
+        command="find_references", symbol="compute_total", path="pkg/core.py"
+    )
+    assert "No references" in result
+
+
+def test_outline(repo, tmp_path):
+    symbols, _ = _tools(repo, tmp_path)
+    result = symbols.forward(command="outline", path="pkg/core.py")
+    assert "  2: from typing import List" in result
+    assert "  5-13 class Accumulator(object)" in result
+    assert "    11-13 method Accumulator.compute_total" in result
+    assert "Error" in symbols.forward(command="outline", path="../outside.py")
+
+
+def test_edits_update_the_index(repo, tmp_path):
+    symbols, editor = _tools(repo, tmp_path)
+    assert "No definition" in symbols.forward(command="find_definition", symbol="fmt")
+    editor.forward(
+        command="insert",
+        path="pkg/report.py",
+        insert_line=5,
+        new_str="\n\ndef fmt(value):\n    return render([value])",
+    )
+    result = symbols.forward(command="find_definition", symbol="fmt")
+    assert "pkg/report.py:8-9  function fmt(value)" in result
+    assert "pkg/report.py" in symbols.forward(
+        command="find_references", symbol="render"
+    )
+
+
+def test_base_commit_summaries_are_reused(repo, tmp_path):
+    symbols, _ = _tools(repo, tmp_path)
+    symbols.forward(command="find_definition", symbol="render")
+    # A dirty checkout of the same commit parses no base file again and
+    # only overlays its own changes.
+    (repo / "pkg" / "extra.py").write_text("def render():\n    pass\n")
+    drop_symbol_index(repo)
+    blobs = BlobCache(SqliteCache(tmp_path / "cache" / "blobs.sqlite"))
+    index = get_symbol_index(repo, _git(repo, "rev-parse", "HEAD"), blobs=blobs)
+    paths = [d.path for d in index.find_definition("render")]
+    assert (blobs.hits, blobs.misses) == (3, 0)
+    assert paths == ["pkg/extra.py", "pkg/report.py"]
+
+
+# EOF